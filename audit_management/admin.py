@@ -4,7 +4,7 @@
 # Description: Registers models for the audit_management app with the Django admin interface.
 
 from django.contrib import admin
-from .models import AuditRequest, Document, Remark
+from .models import AuditRequest, AuditStatusEvent, Document, Job, Remark, UploadSession
 
 @admin.register(AuditRequest)
 class AuditRequestAdmin(admin.ModelAdmin):
@@ -12,11 +12,12 @@ class AuditRequestAdmin(admin.ModelAdmin):
     list_filter = ('status', 'request_date', 'csp__organization') # Filter by status, date, and CSP's organization
     search_fields = ('service_provider_name', 'data_center_location', 'description', 'csp__username')
     raw_id_fields = ('csp',) # Use a raw ID field for CSP for better performance with many users
+    readonly_fields = ('status',) # Changed only through the workflow (workflow.py), which records the history
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'audit_request', 'document_type', 'uploaded_by', 'upload_date', 'file')
-    list_filter = ('document_type', 'upload_date', 'uploaded_by__role')
+    list_display = ('id', 'audit_request', 'document_type', 'uploaded_by', 'upload_date', 'file', 'processing_status')
+    list_filter = ('document_type', 'processing_status', 'upload_date', 'uploaded_by__role')
     search_fields = ('audit_request__service_provider_name', 'description', 'uploaded_by__username')
     raw_id_fields = ('audit_request', 'uploaded_by')
 
@@ -31,3 +32,30 @@ class RemarkAdmin(admin.ModelAdmin):
         """Display a snippet of the comment in the list view."""
         return obj.comment[:50] + '...' if len(obj.comment) > 50 else obj.comment
     comment_snippet.short_description = 'Comment'
+
+
+@admin.register(AuditStatusEvent)
+class AuditStatusEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'audit_request', 'from_status', 'to_status', 'actor', 'created_at', 'dwell')
+    list_filter = ('from_status', 'to_status', 'created_at')
+    raw_id_fields = ('audit_request', 'actor')
+
+    def has_change_permission(self, request, obj=None):
+        """The history is append-only."""
+        return False
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'audit_request', 'uploaded_by', 'filename', 'total_size', 'document', 'updated_at')
+    list_filter = ('updated_at',)
+    search_fields = ('filename', 'uploaded_by__username')
+    raw_id_fields = ('audit_request', 'uploaded_by', 'document')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'document', 'status', 'attempts', 'run_after', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task')
+    raw_id_fields = ('document',)
+    readonly_fields = ('last_error',)
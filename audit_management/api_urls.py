@@ -16,6 +16,23 @@ from .api_views import (
     RemarkCreateAPIView,
     AuditRequestStatusUpdateAPIView,
     DocumentDeleteAPIView,
+    WorklistCacheStatsAPIView,
+    SearchAPIView,
+    DashboardStatsAPIView,
+    StageDwellTimesAPIView,
+    AuditRequestBulkStatusUpdateAPIView,
+    UploadSessionCreateAPIView,
+    UploadSessionDetailAPIView,
+    UploadChunkAPIView,
+    UploadSessionCompleteAPIView,
+    DocumentDownloadAPIView,
+    DocumentThumbnailAPIView,
+    CertificateDownloadAPIView,
+    DocumentBundleAPIView,
+    audit_event_stream,
+    audit_request_detail_async,
+    audit_request_list_async,
+    dashboard_stats_async,
 )
 
 urlpatterns = [
@@ -28,6 +45,19 @@ urlpatterns = [
     # Document Upload (POST)
     path('requests/<int:audit_request_pk>/documents/upload/', DocumentUploadAPIView.as_view(), name='api_document_upload'),
     
+    # Resumable upload: start a session (POST), check progress (GET) or abandon it (DELETE),
+    # send numbered chunks (PUT), then complete it into a Document (POST)
+    path('requests/<int:audit_request_pk>/uploads/', UploadSessionCreateAPIView.as_view(), name='api_upload_session_create'),
+    path('uploads/<uuid:pk>/', UploadSessionDetailAPIView.as_view(), name='api_upload_session_detail'),
+    path('uploads/<uuid:pk>/chunks/<int:index>/', UploadChunkAPIView.as_view(), name='api_upload_chunk'),
+    path('uploads/<uuid:pk>/complete/', UploadSessionCompleteAPIView.as_view(), name='api_upload_session_complete'),
+
+    # Document and certificate downloads (GET; Range and conditional requests supported)
+    path('documents/<int:pk>/download/', DocumentDownloadAPIView.as_view(), name='api_document_download'),
+    path('documents/<int:pk>/thumbnail/', DocumentThumbnailAPIView.as_view(), name='api_document_thumbnail'),
+    path('requests/<int:pk>/certificate/', CertificateDownloadAPIView.as_view(), name='api_certificate_download'),
+    path('requests/<int:pk>/documents/bundle/', DocumentBundleAPIView.as_view(), name='api_document_bundle'),
+
     # Document Delete (DELETE)
     path('documents/<int:pk>/delete/', DocumentDeleteAPIView.as_view(), name='api_document_delete'),
 
@@ -36,6 +66,28 @@ urlpatterns = [
 
     # Status Update (PATCH)
     path('requests/<int:pk>/status-update/', AuditRequestStatusUpdateAPIView.as_view(), name='api_audit_request_status_update'),
+    # Bulk Status Update (POST: many requests to one status, with a result per request)
+    path('requests/status-update/bulk/', AuditRequestBulkStatusUpdateAPIView.as_view(), name='api_audit_request_bulk_status_update'),
+
+    # Full-text search across requests, remarks and document descriptions (GET ?q=)
+    path('search/', SearchAPIView.as_view(), name='api_search'),
+
+    # Dashboard counts by status, data center and CSP organization for the caller's role (GET)
+    path('stats/', DashboardStatsAPIView.as_view(), name='api_dashboard_stats'),
+
+    # Time-in-stage percentiles per workflow status (GET, reviewing roles)
+    path('analytics/stage-durations/', StageDwellTimesAPIView.as_view(), name='api_stage_dwell_times'),
+
+    # Async versions of the list, detail and stats reads (GET), for ASGI deployments
+    path('async/requests/', audit_request_list_async, name='api_audit_request_list_async'),
+    path('async/requests/<int:pk>/', audit_request_detail_async, name='api_audit_request_detail_async'),
+    path('async/stats/', dashboard_stats_async, name='api_dashboard_stats_async'),
+
+    # Server-Sent Events: live workflow changes for the caller's role (GET; resumable with Last-Event-ID)
+    path('events/', audit_event_stream, name='api_event_stream'),
+
+    # Worklist cache hit/miss counters (GET, staff only)
+    path('cache-stats/', WorklistCacheStatsAPIView.as_view(), name='api_worklist_cache_stats'),
 ]
 
 
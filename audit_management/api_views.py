@@ -21,20 +21,69 @@
 
 
 
-from rest_framework import generics, permissions, status
+import io
+import os
+from functools import wraps
+
+from rest_framework import exceptions, generics, permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser # For file uploads
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q # For complex queries
-
-from .models import AuditRequest, Document, Remark
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_GET
+
+from .analytics import stage_dwell_times
+from .cache import acached_worklist, cache_stats, cached_worklist
+from .conditional import (
+    aaudit_request_state,
+    acollection_etag,
+    audit_request_state,
+    collection_etag,
+    detail_etag,
+    etag_matches,
+    not_modified,
+    set_etag,
+    state_from_instance,
+)
+from .dashboard import adashboard_stats, dashboard_stats
+from .downloads import serve_file, stream_zip, unique_arcname
+from .jobs import enqueue
+from .models import AuditRequest, Document, Job, Remark, UploadChunk, UploadSession
+from .pagination import AuditRequestCursorPagination
+from .previews import THUMBNAIL_SIZE, thumbnail_path, touch_thumbnail
+from .search import MAX_RESULTS, search
+from .stream import event_stream
 from .serializers import (
     AuditRequestSerializer,
+    AuditRequestSummarySerializer,
     DocumentSerializer,
     RemarkSerializer,
-    AuditRequestStatusUpdateSerializer
+    AuditRequestStatusUpdateSerializer,
+    BulkStatusUpdateSerializer,
+    SearchResultSerializer,
+    UploadSessionSerializer,
 )
+from .uploads import AssembledUpload, ChunkError, create_partial_file, file_sha256, partial_path, write_chunk
+from .workflow import (
+    TransitionConflict,
+    TransitionNotAllowed,
+    apply_transition,
+    available_transitions,
+    bulk_transition,
+    source_statuses,
+)
+from meity_audit_portal.routers import ReplicaReadMixin, replica_reads
+from users.authentication import RoleClaimsJWTAuthentication
 from users.models import CustomUser # Import CustomUser to check roles
 
 # Helper functions for role-based access checks (ensure these are consistent with CustomUser model)
@@ -63,54 +112,97 @@ def is_meity_or_stqc_or_scientist_f(user):
         user.role == 'Scientist_F'
     )
 
-class AuditRequestListCreateAPIView(generics.ListCreateAPIView):
+def ensure_can_view_audit_request(user, csp_id):
+    """
+    Raises PermissionDenied unless the user may view the audit request owned by `csp_id`.
+    """
+    # CSP can only view their own requests
+    if user.is_csp and csp_id != user.pk:
+        raise exceptions.PermissionDenied("You do not have permission to view this audit request.")
+
+    # MeitY Reviewer, STQC Auditor, Scientist F can view requests based on their general purview.
+    # The `get_queryset` in the list view already filters what they can *see*.
+    # Here, we ensure that if they somehow get an ID for a request outside their role's scope,
+    # they are still denied. For simplicity, if they are any of these roles, they can view any request
+    # that is *not* exclusively owned by another CSP they are not reviewing.
+    # The `get_queryset` of the list view is the primary filter.
+    if is_meity_or_stqc_or_scientist_f(user):
+        # If the request is a CSP's request and this user is not the CSP,
+        # we need to ensure the request is part of the workflow they are involved in.
+        # This check is largely redundant if `get_queryset` is robust, but good for defense-in-depth.
+        pass
+    else:
+        # If not a CSP (and not the owner), and not a reviewer/auditor/scientist, deny access.
+        if not user.is_csp: # CSP case already handled above
+             raise exceptions.PermissionDenied("You do not have permission to view this audit request.")
+
+def ensure_can_upload_document(user, audit_request):
+    """
+    Raises PermissionDenied unless the user may upload a document to the audit request
+    at its current status. Returns the uploader's role label for the audit remark.
+    """
+    # CSP can upload documents only for their own requests and when the status allows.
+    if is_csp(user) and audit_request.csp_id == user.pk:
+        # CSPs can upload documents when the request is 'Submitted_by_CSP' (initial submission)
+        # or 'Forwarded_to_STQC' (e.g., providing additional info requested by auditor).
+        if audit_request.status in ['Submitted_by_CSP', 'Forwarded_to_STQC']:
+            return 'CSP'
+        raise exceptions.PermissionDenied(
+            f"CSPs can only upload documents when the request is in 'Submitted by CSP' or 'Forwarded to STQC' status. Current status: {audit_request.get_status_display()}."
+        )
+
+    # STQC Auditor can upload documents only when the request is 'Forwarded_to_STQC'.
+    if is_stqc_auditor(user) and audit_request.status == 'Forwarded_to_STQC':
+        return 'STQC Auditor'
+
+    raise exceptions.PermissionDenied(
+        f"You do not have permission to upload documents for this request at this stage. Current status: {audit_request.get_status_display()}."
+    )
+
+class AuditRequestListCreateAPIView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     API view for listing all audit requests and creating new ones.
-    - GET: Lists audit requests based on user's role.
+    - GET: Lists audit requests based on user's role, as compact summary rows.
     - POST: Allows CSPs to create a new audit request.
     """
     serializer_class = AuditRequestSerializer
     permission_classes = [permissions.IsAuthenticated] # All users must be authenticated to access this API
+    pagination_class = AuditRequestCursorPagination # Keyset pagination on (last_updated, id); no COUNT(*) or OFFSET
+
+    def get_serializer_class(self):
+        """
+        Uses the summary serializer for listing; the full nested representation
+        is only returned by AuditRequestDetailAPIView (and for the created object on POST).
+        """
+        if self.request.method == 'GET':
+            return AuditRequestSummarySerializer
+        return AuditRequestSerializer
 
     def get_queryset(self):
-        
         """
         Filters audit requests based on the authenticated user's role.
         This ensures users only see requests relevant to them.
-        Includes print statements for debugging empty querysets.
+        Counts and the latest remark timestamp are annotated so each page is one query.
         """
-        user = self.request.user
-        queryset = AuditRequest.objects.none() # Default empty queryset
-
-        if user.is_csp:
-            print('pranay1')
-            queryset = AuditRequest.objects.filter(csp=user).order_by('-last_updated')
-            print(queryset)
-            print('pranay')
-            if not queryset.exists():
-                print(f"Backend: No audit requests found for CSP '{user.username}'.")
-        elif user.is_meity_reviewer:
-            queryset = AuditRequest.objects.filter(
-                Q(status='Submitted_by_CSP') |
-                Q(status='Forwarded_to_STQC') |
-                Q(status='Audit_Completed_by_STQC') |
-                Q(status='Approved_by_ScientistF') |
-                Q(status='Rejected_by_ScientistF')
-            ).order_by('-last_updated')
-            if not queryset.exists():
-                print(f"Backend: No relevant audit requests found for MeitY Reviewer '{user.username}'.")
-        elif user.is_stqc_auditor:
-            queryset = AuditRequest.objects.filter(status='Forwarded_to_STQC').order_by('-last_updated')
-            if not queryset.exists():
-                print(f"Backend: No audit requests forwarded to STQC Auditor '{user.username}'.")
-        elif user.is_scientist_f:
-            queryset = AuditRequest.objects.all().order_by('-last_updated')
-            if not queryset.exists():
-                print(f"Backend: No audit requests found for Scientist F '{user.username}'.")
-        else:
-            print(f"Backend: No specific audit requests for user '{user.username}' with role '{user.role}'. Returning empty.")
-            
-        return queryset
+        return AuditRequest.objects.for_user(self.request.user).with_summary().order_by('-last_updated', 'id')
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serves each page of the role's worklist from the version-keyed cache.
+        Any change to a request, remark or document bumps the version (see signals.py),
+        so a stale page is never returned.
+        Each cached page carries a collection ETag, so an unchanged page answers
+        If-None-Match with a 304 without touching the database.
+        """
+        def build_page():
+            response = super(AuditRequestListCreateAPIView, self).list(request, *args, **kwargs)
+            etag = collection_etag(request, AuditRequest.objects.for_user(request.user))
+            return {'data': response.data, 'etag': etag}
+
+        page = cached_worklist(request.user, 'api_list', build_page, request.build_absolute_uri())
+        if etag_matches(request, page['etag']):
+            return not_modified(page['etag'])
+        return set_etag(Response(page['data']), page['etag'])
 
     def perform_create(self, serializer):
         """
@@ -121,7 +213,7 @@ class AuditRequestListCreateAPIView(generics.ListCreateAPIView):
         if not is_csp(user):
             # If the user is not a CSP, raise a permission denied error.
             # This is a critical security check.
-            raise permissions.PermissionDenied("Only CSPs can create audit requests.")
+            raise exceptions.PermissionDenied("Only CSPs can create audit requests.")
         
         # Save the audit request, automatically assigning the logged-in CSP and initial status.
         audit_request = serializer.save(csp=user, status='Submitted_by_CSP')
@@ -134,14 +226,14 @@ class AuditRequestListCreateAPIView(generics.ListCreateAPIView):
         )
 
 
-class AuditRequestDetailAPIView(generics.RetrieveUpdateAPIView):
+class AuditRequestDetailAPIView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     """
     API view for retrieving and updating a single audit request.
     - GET: Retrieves details of a specific audit request.
     - PUT/PATCH: Allows authorized users to update *certain* audit request details (e.g., description).
                  Status updates are handled by a separate, dedicated endpoint.
     """
-    queryset = AuditRequest.objects.all()
+    queryset = AuditRequest.objects.with_detail() # Related rows are loaded up front to avoid N+1 queries
     serializer_class = AuditRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -151,31 +243,30 @@ class AuditRequestDetailAPIView(generics.RetrieveUpdateAPIView):
         Ensures users can only access audit requests they are authorized to see.
         """
         obj = super().get_object() # Get the audit request object
-        user = self.request.user
-        
-
-        # CSP can only view their own requests
-        if user.is_csp and obj.csp != user:
-            raise permissions.PermissionDenied("You do not have permission to view this audit request.")
-        
-        # MeitY Reviewer, STQC Auditor, Scientist F can view requests based on their general purview.
-        # The `get_queryset` in the list view already filters what they can *see*.
-        # Here, we ensure that if they somehow get an ID for a request outside their role's scope,
-        # they are still denied. For simplicity, if they are any of these roles, they can view any request
-        # that is *not* exclusively owned by another CSP they are not reviewing.
-        # The `get_queryset` of the list view is the primary filter.
-        if is_meity_or_stqc_or_scientist_f(user):
-            # If the request is a CSP's request and this user is not the CSP,
-            # we need to ensure the request is part of the workflow they are involved in.
-            # This check is largely redundant if `get_queryset` is robust, but good for defense-in-depth.
-            pass
-        else:
-            # If not a CSP (and not the owner), and not a reviewer/auditor/scientist, deny access.
-            if not user.is_csp: # CSP case already handled above
-                 raise permissions.PermissionDenied("You do not have permission to view this audit request.")
-
+        ensure_can_view_audit_request(self.request.user, obj.csp_id)
         return obj
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns the full nested representation with a strong ETag.
+        A conditional request is first answered from a single state query: if the
+        client's If-None-Match still matches, it gets a 304 without the children being
+        loaded or the serializers running.
+        """
+        if request.headers.get('If-None-Match'):
+            state = audit_request_state(self.kwargs[self.lookup_field])
+            if state is None:
+                raise Http404
+            ensure_can_view_audit_request(request.user, state['csp_id'])
+            etag = detail_etag(state)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        # Derive the ETag from the rows just loaded, so it matches the body exactly.
+        return set_etag(response, detail_etag(state_from_instance(instance)))
+
     def perform_update(self, serializer):
         """
         Allows updates to fields other than status.
@@ -183,7 +274,7 @@ class AuditRequestDetailAPIView(generics.RetrieveUpdateAPIView):
         This method is for general request data updates, not status changes.
         """
         user = self.request.user
-        audit_request = self.get_object() # Ensures permission check is run by get_object()
+        audit_request = serializer.instance # Already fetched (and permission-checked) by get_object()
 
         # Example: Only the owning CSP can update the description field
         # and only if the request is still in the 'Submitted_by_CSP' status.
@@ -197,8 +288,10 @@ class AuditRequestDetailAPIView(generics.RetrieveUpdateAPIView):
                 author=user,
                 comment=f"CSP updated details for request #{audit_request.id}."
             )
+            # Re-load with related rows prefetched so the response does not query per document/remark.
+            serializer.instance = self.get_queryset().get(pk=audit_request.pk)
         else:
-            raise permissions.PermissionDenied(
+            raise exceptions.PermissionDenied(
                 "You do not have permission to update this audit request at this stage or for this request."
             )
 
@@ -222,34 +315,151 @@ class DocumentUploadAPIView(generics.CreateAPIView):
         audit_request = get_object_or_404(AuditRequest, pk=audit_request_pk)
         user = self.request.user
 
-        # CSP can upload documents only for their own requests and when the status allows.
-        if is_csp(user) and audit_request.csp == user:
-            # CSPs can upload documents when the request is 'Submitted_by_CSP' (initial submission)
-            # or 'Forwarded_to_STQC' (e.g., providing additional info requested by auditor).
-            if audit_request.status in ['Submitted_by_CSP', 'Forwarded_to_STQC']:
-                serializer.save(audit_request=audit_request, uploaded_by=user)
-                Remark.objects.create(
-                    audit_request=audit_request,
-                    author=user,
-                    comment=f"CSP uploaded a document of type '{serializer.validated_data.get('document_type')}'."
+        uploader = ensure_can_upload_document(user, audit_request)
+        serializer.save(audit_request=audit_request, uploaded_by=user)
+        Remark.objects.create(
+            audit_request=audit_request,
+            author=user,
+            comment=f"{uploader} uploaded a document of type '{serializer.validated_data.get('document_type')}'."
+        )
+
+def upload_gone():
+    """
+    Response for a session whose partial file is gone, e.g. because the document it
+    completed into was deleted afterwards.
+    """
+    return Response(
+        {"detail": "This upload is no longer available; start a new upload session."}, status=status.HTTP_410_GONE
+    )
+
+
+class UploadSessionCreateAPIView(generics.CreateAPIView):
+    """
+    API view for starting a resumable upload of a large document.
+    - POST: Declares the file (name, size, chunk size, optional SHA-256); the same roles
+            that may use DocumentUploadAPIView may start a session.
+    Chunks are then sent to UploadChunkAPIView and the session completed with
+    UploadSessionCompleteAPIView.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        audit_request = get_object_or_404(AuditRequest, pk=self.kwargs.get('audit_request_pk'))
+        ensure_can_upload_document(self.request.user, audit_request)
+        session = serializer.save(audit_request=audit_request, uploaded_by=self.request.user)
+        create_partial_file(session)
+
+
+class UploadSessionDetailAPIView(generics.RetrieveDestroyAPIView):
+    """
+    API view for one of the user's upload sessions.
+    - GET: Reports progress, including the indices of the chunks already received.
+    - DELETE: Abandons the session and discards its partial file.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Sessions are private to their uploader; anyone else gets a 404.
+        return UploadSession.objects.filter(uploaded_by_id=self.request.user.pk)
+
+
+class UploadChunkAPIView(APIView):
+    """
+    API view for sending one chunk of an upload session.
+    - PUT: The raw chunk bytes as the request body, with their SHA-256 in the
+           X-Chunk-SHA256 header. Re-sending a chunk replaces it.
+    The body is streamed straight into the chunk's offset in the partial file,
+    so memory use does not depend on the chunk size.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def put(self, request, pk, index):
+        session = get_object_or_404(UploadSession, pk=pk, uploaded_by=request.user)
+        if session.document_id:
+            return Response({"detail": "This upload has already been completed."}, status=status.HTTP_409_CONFLICT)
+        if index >= session.total_chunks:
+            return Response(
+                {"detail": f"Chunk index must be between 0 and {session.total_chunks - 1}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        checksum = request.headers.get('X-Chunk-SHA256', '')
+        if not checksum:
+            return Response({"detail": "The X-Chunk-SHA256 header is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            size, sha256 = write_chunk(session, index, request.stream or io.BytesIO(), checksum)
+        except ChunkError as exc:
+            # The chunk's bytes on disk are no longer trustworthy, even if an earlier copy was.
+            session.chunks.filter(index=index).delete()
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except FileNotFoundError:
+            return upload_gone()
+
+        UploadChunk.objects.update_or_create(session=session, index=index, defaults={'size': size, 'sha256': sha256})
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        return Response({'index': index, 'size': size, 'sha256': sha256})
+
+
+class UploadSessionCompleteAPIView(APIView):
+    """
+    API view for completing an upload session.
+    - POST: Once every chunk is in, checks the whole-file SHA-256 (if one was declared),
+            moves the partial file into document storage and creates the Document.
+            Returns 409 with the missing chunk indices if the upload is incomplete.
+            Completing an already completed session returns its Document again.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        user = request.user
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update().select_related('audit_request'), pk=pk, uploaded_by=user,
+            )
+            if session.document_id:
+                return Response(DocumentSerializer(session.document, context={'request': request}).data)
+
+            received = set(session.chunks.values_list('index', flat=True))
+            missing = [index for index in range(session.total_chunks) if index not in received]
+            if missing:
+                return Response(
+                    {"detail": "The upload is incomplete.", "missing_chunks": missing},
+                    status=status.HTTP_409_CONFLICT
                 )
-            else:
-                raise permissions.PermissionDenied(
-                    f"CSPs can only upload documents when the request is in 'Submitted by CSP' or 'Forwarded to STQC' status. Current status: {audit_request.get_status_display()}."
+
+            # The request may have moved on since the session was started.
+            uploader = ensure_can_upload_document(user, session.audit_request)
+            path = partial_path(session)
+            if not os.path.exists(path):
+                return upload_gone()
+            if session.sha256 and file_sha256(path) != session.sha256:
+                return Response(
+                    {"detail": "The assembled file does not match the declared SHA-256 checksum."},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        # STQC Auditor can upload documents only when the request is 'Forwarded_to_STQC'.
-        elif is_stqc_auditor(user) and audit_request.status == 'Forwarded_to_STQC':
-            serializer.save(audit_request=audit_request, uploaded_by=user)
+
+            with open(path, 'rb') as fh:
+                upload = AssembledUpload(fh, name=session.filename)
+                # Already verified above, so storage need not hash the file again.
+                upload.sha256 = session.sha256 or None
+                document = Document(
+                    audit_request=session.audit_request, uploaded_by=user, file=upload,
+                    document_type=session.document_type, description=session.description,
+                )
+                document.save()
             Remark.objects.create(
-                audit_request=audit_request,
+                audit_request=session.audit_request,
                 author=user,
-                comment=f"STQC Auditor uploaded a document of type '{serializer.validated_data.get('document_type')}'."
-            )
-        else:
-            raise permissions.PermissionDenied(
-                f"You do not have permission to upload documents for this request at this stage. Current status: {audit_request.get_status_display()}."
+                comment=f"{uploader} uploaded a document of type '{session.document_type}'."
             )
+            session.document = document
+            session.save(update_fields=['document', 'updated_at'])
+
+        return Response(DocumentSerializer(document, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
 
 class DocumentDeleteAPIView(generics.DestroyAPIView):
     """
@@ -266,7 +476,7 @@ class DocumentDeleteAPIView(generics.DestroyAPIView):
         """
         obj = super().get_object()
         if obj.uploaded_by != self.request.user:
-            raise permissions.PermissionDenied("You do not have permission to delete this document.")
+            raise exceptions.PermissionDenied("You do not have permission to delete this document.")
         return obj
 
     def perform_destroy(self, instance):
@@ -283,6 +493,125 @@ class DocumentDeleteAPIView(generics.DestroyAPIView):
         )
 
 
+class DocumentDownloadAPIView(APIView):
+    """
+    API view for downloading a document's file.
+    - GET: Streams the file to anyone who may view the audit request (the same rules as
+           AuditRequestDetailAPIView), with Range, If-Range, If-Modified-Since and
+           If-None-Match support. Accepts a session login as well as a JWT, so the
+           web pages can link to it.
+    """
+    authentication_classes = [RoleClaimsJWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        document = get_object_or_404(
+            Document.objects.select_related('audit_request')
+            .only('file', 'original_filename', 'sha256', 'content_type', 'audit_request__csp_id'),
+            pk=pk,
+        )
+        ensure_can_view_audit_request(request.user, document.audit_request.csp_id)
+        etag = f'"{document.sha256}"' if document.sha256 else None
+        try:
+            return serve_file(
+                request, document.file, document.display_name, etag=etag, content_type=document.content_type,
+            )
+        except FileNotFoundError:
+            raise Http404("The file for this document is missing.")
+
+
+class DocumentThumbnailAPIView(APIView):
+    """
+    API view for a document's preview thumbnail (a small JPEG).
+    - GET: Same access rules as DocumentDownloadAPIView. Thumbnails are rendered by the
+           background workers into a size-bounded cache; one evicted from the cache is
+           queued for re-rendering and answered with 503 and Retry-After meanwhile.
+    """
+    authentication_classes = [RoleClaimsJWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        document = get_object_or_404(
+            Document.objects.select_related('audit_request').only('sha256', 'has_preview', 'audit_request__csp_id'),
+            pk=pk,
+        )
+        ensure_can_view_audit_request(request.user, document.audit_request.csp_id)
+        if not document.has_preview:
+            raise Http404("This document has no preview.")
+
+        # A document's file never changes, so neither does its thumbnail at a given size.
+        etag = f'"{document.sha256}-{THUMBNAIL_SIZE}"'
+        if etag_matches(request, etag):
+            return set_etag(HttpResponseNotModified(), etag)
+        path = thumbnail_path(document.sha256)
+        try:
+            thumbnail = open(path, 'rb')
+        except FileNotFoundError:
+            pending = Job.objects.filter(
+                task='render_thumbnail', payload__document_id=pk, status__in=('queued', 'running'),
+            )
+            if not pending.exists():
+                enqueue('render_thumbnail', document_id=pk)
+            response = HttpResponse(status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '5'
+            return response
+
+        touch_thumbnail(path)
+        response = FileResponse(thumbnail, content_type='image/jpeg')
+        response['Cache-Control'] = 'private, max-age=86400'
+        return set_etag(response, etag)
+
+
+class CertificateDownloadAPIView(APIView):
+    """
+    API view for downloading an audit request's Certificate of Empanelment.
+    - GET: Same access rules and streaming behaviour as DocumentDownloadAPIView.
+    """
+    authentication_classes = [RoleClaimsJWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        audit_request = get_object_or_404(AuditRequest.objects.only('csp_id', 'certificate_of_empanelment'), pk=pk)
+        ensure_can_view_audit_request(request.user, audit_request.csp_id)
+        certificate = audit_request.certificate_of_empanelment
+        if not certificate:
+            raise Http404("No certificate has been issued for this audit request.")
+        try:
+            return serve_file(request, certificate, os.path.basename(certificate.name))
+        except FileNotFoundError:
+            raise Http404("The certificate file is missing.")
+
+
+class DocumentBundleAPIView(APIView):
+    """
+    API view for downloading every document on an audit request, plus its certificate, as one ZIP.
+    - GET: Same access rules as DocumentDownloadAPIView. The archive is streamed while it
+           is built, with no temporary file; already-compressed formats are stored as is.
+    """
+    authentication_classes = [RoleClaimsJWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        audit_request = get_object_or_404(AuditRequest.objects.only('csp_id', 'certificate_of_empanelment'), pk=pk)
+        ensure_can_view_audit_request(request.user, audit_request.csp_id)
+
+        entries, used_names = [], set()
+        for document in audit_request.documents.order_by('upload_date', 'pk'):
+            if document.file and document.file.storage.exists(document.file.name):
+                arcname = unique_arcname(f"{document.document_type}/{document.display_name}", used_names)
+                entries.append((arcname, document.file, document.upload_date))
+        certificate = audit_request.certificate_of_empanelment
+        if certificate and certificate.storage.exists(certificate.name):
+            arcname = unique_arcname(f"Certificate/{os.path.basename(certificate.name)}", used_names)
+            entries.append((arcname, certificate, certificate.storage.get_modified_time(certificate.name)))
+        if not entries:
+            raise Http404("This audit request has no documents to download.")
+
+        response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
+        response['Content-Disposition'] = content_disposition_header(True, f"audit-request-{pk}-documents.zip")
+        return response
+
+
 class RemarkCreateAPIView(generics.CreateAPIView):
     """
     API view for creating a new remark for an audit request.
@@ -302,7 +631,7 @@ class RemarkCreateAPIView(generics.CreateAPIView):
         user = self.request.user
 
         if not is_meity_or_stqc_or_scientist_f(user):
-            raise permissions.PermissionDenied("Only MeitY Reviewers, STQC Auditors, or Scientist F can add remarks.")
+            raise exceptions.PermissionDenied("Only MeitY Reviewers, STQC Auditors, or Scientist F can add remarks.")
         
         # Save the remark, associating it with the audit request and the logged-in user.
         serializer.save(audit_request=audit_request, author=user)
@@ -311,7 +640,8 @@ class RemarkCreateAPIView(generics.CreateAPIView):
 class AuditRequestStatusUpdateAPIView(generics.UpdateAPIView):
     """
     API view for updating the status of an audit request.
-    - PATCH: Allows specific roles to transition the status.
+    - PATCH: Allows specific roles to transition the status, as listed in workflow.TRANSITIONS.
+             Returns 409 Conflict if the request changed status since it was read.
     """
     queryset = AuditRequest.objects.all()
     serializer_class = AuditRequestStatusUpdateSerializer
@@ -324,19 +654,10 @@ class AuditRequestStatusUpdateAPIView(generics.UpdateAPIView):
         for initiating a status update.
         """
         obj = super().get_object() # Get the audit request object
-        user = self.request.user
 
-        # Check if the user's role and the current status allow for a status update.
-        can_update = False
-        if is_meity_reviewer(user) and obj.status == 'Submitted_by_CSP':
-            can_update = True
-        elif is_stqc_auditor(user) and obj.status == 'Forwarded_to_STQC':
-            can_update = True
-        elif is_scientist_f(user) and obj.status == 'Audit_Completed_by_STQC':
-            can_update = True
-        
-        if not can_update:
-            raise permissions.PermissionDenied(
+        # The user's role must have at least one transition out of the current status.
+        if not available_transitions(self.request.user.role, obj.status):
+            raise exceptions.PermissionDenied(
                 f"You do not have permission to change the status of this audit request at its current stage ({obj.get_status_display()})."
             )
         
@@ -345,47 +666,246 @@ class AuditRequestStatusUpdateAPIView(generics.UpdateAPIView):
     def partial_update(self, request, *args, **kwargs):
         """
         Handles the PATCH request for status update.
-        Includes server-side validation for valid status transitions based on business logic.
+        The transition is checked against the workflow table and applied as a
+        compare-and-set on the status that was just read.
         """
         instance = self.get_object() # This will run the `get_object` permission check first.
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True) # Validate incoming data (only 'status' field)
 
-        new_status = serializer.validated_data.get('status')
-        user = request.user
-
-        # Further, explicit server-side validation for allowed status transitions.
-        # This is crucial for maintaining workflow integrity.
-        valid_transition = False
-        remark_text = ""
-
-        if is_meity_reviewer(user) and instance.status == 'Submitted_by_CSP' and new_status == 'Forwarded_to_STQC':
-            valid_transition = True
-            remark_text = f"MeitY Reviewer forwarded request to STQC. Status changed to '{AuditRequest.STATUS_CHOICES[1][1]}'."
-        elif is_stqc_auditor(user) and instance.status == 'Forwarded_to_STQC' and new_status == 'Audit_Completed_by_STQC':
-            valid_transition = True
-            remark_text = f"STQC Auditor marked audit as completed. Status changed to '{AuditRequest.STATUS_CHOICES[2][1]}'."
-        elif is_scientist_f(user) and instance.status == 'Audit_Completed_by_STQC' and \
-             (new_status == 'Approved_by_ScientistF' or new_status == 'Rejected_by_ScientistF'):
-            valid_transition = True
-            # Get the display name for the new status for the remark
-            new_status_display = dict(AuditRequest.STATUS_CHOICES).get(new_status, new_status)
-            remark_text = f"Scientist F made final decision: '{new_status_display}'."
-        
-        if not valid_transition:
+        try:
+            apply_transition(request.user, instance, instance.status, serializer.validated_data.get('status'))
+        except TransitionNotAllowed:
             # If the requested transition is not allowed, return a 400 Bad Request.
             return Response(
                 {"detail": "Invalid status transition for your role or current request status."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        self.perform_update(serializer) # Save the new status to the database.
-        
-        # Add a remark to log the status change.
-        Remark.objects.create(
-            audit_request=instance,
-            author=user,
-            comment=remark_text
-        )
+        except TransitionConflict as conflict:
+            # Someone else moved the request first; the client should re-read it.
+            return Response(
+                {"detail": f"This audit request was updated concurrently. {conflict}", "status": conflict.current_status},
+                status=status.HTTP_409_CONFLICT
+            )
 
         return Response(serializer.data) # Return the updated audit request data
+
+
+class AuditRequestBulkStatusUpdateAPIView(APIView):
+    """
+    API view for moving many audit requests to one status at once.
+    - POST: `{"ids": [...], "status": "..."}`. Every id is checked against the same
+            transition rules as AuditRequestStatusUpdateAPIView; the allowed ones are applied
+            together in one transaction and each id gets its own result ('conflict' where
+            another change moved the request first).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_status = serializer.validated_data['status']
+        if not source_statuses(request.user.role, to_status):
+            raise exceptions.PermissionDenied("Your role cannot move audit requests to this status.")
+
+        outcomes = bulk_transition(request.user, serializer.validated_data['ids'], to_status)
+        results = [
+            {'id': pk, 'result': outcome, 'status': current_status}
+            for pk, (outcome, current_status) in outcomes.items()
+        ]
+        return Response({
+            'status': to_status,
+            'updated': sum(1 for result in results if result['result'] == 'updated'),
+            'results': results,
+        })
+
+
+class SearchAPIView(ReplicaReadMixin, APIView):
+    """
+    API view for full-text search across audit requests, remarks and document descriptions.
+    - GET: `q` is the search text and `limit` the number of hits (default 20, at most 100).
+           Hits are ranked by relevance and limited to the requests the user's role may list.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            raise exceptions.ValidationError({'limit': f"Must be an integer between 1 and {MAX_RESULTS}."})
+        results = search(request.user, query, limit=limit)
+        return Response({'query': query, 'results': SearchResultSerializer(results, many=True).data})
+
+
+class DashboardStatsAPIView(ReplicaReadMixin, APIView):
+    """
+    API view for the dashboard figures of the caller's role.
+    - GET: Request counts by status, data center and CSP organization, over the same
+           requests the role's worklist shows. Read from the DashboardCount summary table.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(dashboard_stats(request.user))
+
+
+class StageDwellTimesAPIView(ReplicaReadMixin, APIView):
+    """
+    API view for time-in-stage analytics from the status history.
+    - GET: Reviewing roles only. For each workflow stage: how many requests have left it,
+           percentiles of the time they spent in it (seconds), and when the longest-waiting
+           request still in it arrived. Cached until the next change to any audit request.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if not is_meity_or_stqc_or_scientist_f(request.user):
+            raise exceptions.PermissionDenied("Only MeitY, STQC and Scientist F users can view workflow analytics.")
+        return Response({'stages': cached_worklist(request.user, 'stage_dwell_times', stage_dwell_times)})
+
+
+async def async_user(request):
+    """
+    Returns the authenticated user for an async view: the session user (browsers'
+    EventSource sends the session cookie) or the user of a JWT Bearer token. None if
+    neither; raises AuthenticationFailed for a bad token.
+    """
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    authenticated = await sync_to_async(RoleClaimsJWTAuthentication().authenticate)(request)
+    return authenticated[0] if authenticated else None
+
+
+def render_json(data, status=200):
+    """
+    Renders `data` with DRF's JSONRenderer, so async views answer byte for byte as the DRF views do.
+    """
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def async_api_view(view):
+    """
+    Makes an async function a read-only API view: GET only, the caller authenticated as by
+    async_user() and passed in as `user`, and DRF exceptions answered the way DRF would.
+    DRF's own views are sync, so under ASGI each would hold a thread for the whole request;
+    these await the async ORM instead and hold none while the database works.
+    """
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await async_user(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+            request.user = user
+            return await view(request, user, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = render_json({'detail': exc.detail}, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = RoleClaimsJWTAuthentication().authenticate_header(request)
+            return response
+    return wrapper
+
+
+@async_api_view
+@replica_reads
+async def audit_request_list_async(request, user):
+    """
+    Async version of AuditRequestListCreateAPIView's GET: the same role filtering, summary
+    rows, cursor pagination, worklist cache and collection ETag.
+    """
+    queryset = AuditRequest.objects.for_user(user)
+
+    async def build_page():
+        paginator = AuditRequestCursorPagination()
+        rows = await paginator.apaginate_queryset(
+            queryset.with_summary().order_by('-last_updated', 'id'), Request(request),
+        )
+        data = paginator.get_paginated_data(AuditRequestSummarySerializer(rows, many=True).data)
+        return {'data': data, 'etag': await acollection_etag(request, queryset)}
+
+    page = await acached_worklist(user, 'api_list', build_page, request.build_absolute_uri())
+    if etag_matches(request, page['etag']):
+        return set_etag(HttpResponseNotModified(), page['etag'])
+    return set_etag(render_json(page['data']), page['etag'])
+
+
+@async_api_view
+@replica_reads
+async def audit_request_detail_async(request, user, pk):
+    """
+    Async version of AuditRequestDetailAPIView's GET: the same permission check, nested
+    representation and ETag, with If-None-Match answered from the state query alone.
+    """
+    if request.headers.get('If-None-Match'):
+        state = await aaudit_request_state(pk)
+        if state is None:
+            raise exceptions.NotFound('No AuditRequest matches the given query.')
+        ensure_can_view_audit_request(user, state['csp_id'])
+        etag = detail_etag(state)
+        if etag_matches(request, etag):
+            return set_etag(HttpResponseNotModified(), etag)
+
+    try:
+        # aget() runs the prefetches too, so serializing below needs no further queries.
+        instance = await AuditRequest.objects.with_detail().aget(pk=pk)
+    except AuditRequest.DoesNotExist:
+        raise exceptions.NotFound('No AuditRequest matches the given query.')
+    ensure_can_view_audit_request(user, instance.csp_id)
+    data = AuditRequestSerializer(instance, context={'request': request}).data
+    return set_etag(render_json(data), detail_etag(state_from_instance(instance)))
+
+
+@async_api_view
+@replica_reads
+async def dashboard_stats_async(request, user):
+    """
+    Async version of DashboardStatsAPIView.
+    """
+    return render_json(await adashboard_stats(user))
+
+
+class StreamRequiresASGI(exceptions.APIException):
+    status_code = 501
+    default_detail = 'The event stream is only available when the site is served over ASGI.'
+    default_code = 'asgi_required'
+
+
+@async_api_view
+async def audit_event_stream(request, user):
+    """
+    Server-Sent Events stream of workflow changes the caller's role may see: requests
+    created, status changes, remarks and documents added (see stream.py for the format).
+    - GET: `Last-Event-ID` (sent automatically by EventSource on reconnect, or the
+           `last_event_id` query parameter) replays the events missed since that id.
+    Served through meity_audit_portal/asgi.py, an open connection is an idle coroutine on
+    the event loop rather than a blocked worker thread. Under WSGI it would hold a whole
+    worker until the client disconnects, so it answers 501 there instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        raise StreamRequiresASGI()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            raise exceptions.ParseError('Last-Event-ID must be an event id.')
+
+    response = StreamingHttpResponse(event_stream(user, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Tells nginx not to buffer the stream
+    return response
+
+
+class WorklistCacheStatsAPIView(APIView):
+    """
+    API view exposing the worklist cache hit/miss counters.
+    - GET: Staff only.
+    """
+    authentication_classes = [JWTAuthentication] # Staff status is read from the user row, not the token claims
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
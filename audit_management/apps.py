@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AuditManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'audit_management'
+
+    def ready(self):
+        from . import signals  # noqa: F401 -- registers the model signal handlers
+        from . import tasks  # noqa: F401 -- registers the background job handlers
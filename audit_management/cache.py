@@ -0,0 +1,179 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/cache.py
+# Description: Role-scoped caching of audit request worklists with version-key invalidation.
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from meity_audit_portal.routers import primary_reads
+
+from .pagination import decode_cursor, encode_cursor, paginate_by_keyset
+
+VERSION_KEY = 'audit_requests:version'
+HITS_KEY = 'audit_requests:hits'
+MISSES_KEY = 'audit_requests:misses'
+
+# Whether worklists are cached. Off unless the cache is shared by every worker process: a bump of
+# the version key must reach every process that may hold a copy, or the others serve stale pages.
+WORKLIST_CACHE_ENABLED = getattr(settings, 'AUDIT_WORKLIST_CACHE', False)
+# How long a cached worklist may live even if nothing changes (seconds).
+WORKLIST_CACHE_TIMEOUT = getattr(settings, 'AUDIT_WORKLIST_CACHE_TIMEOUT', 300)
+# Rows on each page of an HTML worklist, and so the most ids one cached page holds.
+WORKLIST_LIMIT = getattr(settings, 'AUDIT_WORKLIST_LIMIT', 200)
+
+
+def get_version():
+    """
+    Returns the current worklist version. Every cache key embeds it, so bumping the
+    version makes all previously cached worklists unreachable at once.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1 so an evicted counter never reuses an old version.
+        cache.add(VERSION_KEY, time.time_ns())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    """
+    The async counterpart of get_version(), for async views.
+    """
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns())
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidates every cached worklist. Called whenever an audit request, remark or document changes.
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns())
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+async def _acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, timeout=None)
+        await cache.aincr(key)
+
+
+def scope_for(user):
+    """
+    Returns the cache scope for a user: CSPs see only their own requests, so their scope
+    includes their id; every other role shares one scope per role.
+    """
+    if user.role == 'CSP':
+        return f"CSP:{user.pk}"
+    return user.role
+
+
+def worklist_key(version, user, name, parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest() if parts else ''
+    return f"audit_requests:{version}:{name}:{scope_for(user)}:{digest}"
+
+
+def cached_worklist(user, name, builder, *parts):
+    """
+    Returns the cached result of `builder()` for this user's scope, computing and storing it on a miss.
+    `parts` distinguish variants of the same worklist (e.g. cursor and page size).
+    The value is built from the primary: the entry is shared by the whole scope, so it must
+    not hold a replica's stale rows (see routers.primary_reads). With WORKLIST_CACHE_ENABLED
+    off, `builder()` is simply called.
+    """
+    if not WORKLIST_CACHE_ENABLED:
+        return builder()
+    key = worklist_key(get_version(), user, name, parts)
+    value = cache.get(key)
+    if value is not None:
+        _count(HITS_KEY)
+        return value
+    _count(MISSES_KEY)
+    with primary_reads():
+        value = builder()
+    cache.set(key, value, WORKLIST_CACHE_TIMEOUT)
+    return value
+
+
+def cached_worklist_page(user, name, queryset, token=None):
+    """
+    Returns (rows, next_token, previous_token) for one WORKLIST_LIMIT-row keyset page of
+    `queryset`, most recently updated first, starting at cursor `token` (see pagination.py).
+    next_token is None on the last page; previous_token is None on the first page and ''
+    when the previous page is the first. Only the page's ids and its neighbouring cursors
+    are cached, so an entry stays small however large the table grows, and the rows
+    themselves are fetched by primary key on every call.
+    Raises ValueError if `token` is malformed.
+    """
+    position, reverse = decode_cursor(token) if token else (None, False)
+
+    def build():
+        rows, has_more = paginate_by_keyset(queryset.only('id', 'last_updated'), position, reverse, WORKLIST_LIMIT)
+        has_next, has_previous = (True, has_more) if reverse else (has_more, position is not None)
+        first = (rows[0].last_updated, rows[0].id) if rows else position
+        last = (rows[-1].last_updated, rows[-1].id) if rows else position
+        previous_token = None
+        if has_previous:
+            previous_token = encode_cursor(first, reverse=True) if first is not None else ''
+        return {
+            'ids': [row.id for row in rows],
+            'next': encode_cursor(last) if has_next and last is not None else None,
+            'previous': previous_token,
+        }
+
+    page = cached_worklist(user, name, build, token or '')
+    rows = queryset.in_bulk(page['ids'])
+    # A row that has left the worklist since the ids were cached is dropped, not shown stale.
+    return [rows[pk] for pk in page['ids'] if pk in rows], page['next'], page['previous']
+
+
+async def acached_worklist(user, name, builder, *parts):
+    """
+    The async counterpart of cached_worklist(): `builder` is a coroutine function, and
+    entries are shared with the sync views under the same name and parts.
+    """
+    if not WORKLIST_CACHE_ENABLED:
+        return await builder()
+    key = worklist_key(await aget_version(), user, name, parts)
+    value = await cache.aget(key)
+    if value is not None:
+        await _acount(HITS_KEY)
+        return value
+    await _acount(MISSES_KEY)
+    with primary_reads():
+        value = await builder()
+    await cache.aset(key, value, WORKLIST_CACHE_TIMEOUT)
+    return value
+
+
+def cache_stats():
+    """
+    Returns the worklist cache hit/miss counters and current version.
+    """
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'version': get_version(),
+    }
@@ -0,0 +1,108 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/conditional.py
+# Description: ETag helpers for conditional GET on the audit request APIs.
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import aget_version, get_version, scope_for
+from .models import AuditRequest
+
+# The AuditRequest columns a detail ETag is derived from.
+STATE_FIELDS = (
+    'pk', 'csp_id', 'status', 'last_updated', 'document_count', 'remark_count', 'last_activity_at',
+    'processing_version',
+)
+
+
+def make_etag(*parts):
+    """
+    Builds a strong ETag (quoted hex digest) from the given values.
+    """
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """
+    Returns True if the request's If-None-Match header matches `etag`.
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+def not_modified(etag):
+    """
+    Returns an empty 304 response carrying the ETag.
+    """
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
+
+
+def set_etag(response, etag):
+    response['ETag'] = etag
+    # The representation depends on who is asking.
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
+
+
+def audit_request_state(pk):
+    """
+    Fetches everything that determines an audit request's detail representation from
+    the request row alone: last_updated plus the denormalized document/remark counters,
+    last activity time and document processing version. Also returns csp_id so callers can check ownership first.
+    Returns None if the request does not exist.
+    """
+    return AuditRequest.objects.filter(pk=pk).values(*STATE_FIELDS).first()
+
+
+async def aaudit_request_state(pk):
+    return await AuditRequest.objects.filter(pk=pk).values(*STATE_FIELDS).afirst()
+
+
+def state_from_instance(audit_request):
+    """
+    Builds the same state as `audit_request_state` from an already loaded request.
+    """
+    return {field: getattr(audit_request, field) for field in STATE_FIELDS}
+
+
+def detail_etag(state):
+    return make_etag('detail', *(state[field] for field in STATE_FIELDS))
+
+
+def collection_etag(request, queryset):
+    """
+    Builds an ETag for a role-scoped list from one cheap aggregate over the scoped
+    queryset (count and newest last_updated, both served from the worklist indexes),
+    the worklist cache version (which moves on any remark or document change) and the
+    requested page.
+    """
+    aggregate = queryset.order_by().aggregate(total=Count('pk'), newest=Max('last_updated'))
+    return make_etag(
+        'list', scope_for(request.user), aggregate['total'], aggregate['newest'], get_version(),
+        request.get_full_path(),
+    )
+
+
+async def acollection_etag(request, queryset):
+    """
+    The async counterpart of collection_etag(), computed the same way.
+    """
+    aggregate = await queryset.order_by().aaggregate(total=Count('pk'), newest=Max('last_updated'))
+    return make_etag(
+        'list', scope_for(request.user), aggregate['total'], aggregate['newest'], await aget_version(),
+        request.get_full_path(),
+    )
@@ -0,0 +1,214 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/dashboard.py
+# Description: Per-role dashboard counts served from the DashboardCount summary table, kept in step incrementally.
+
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, Count, F, Q, Value, When
+
+from .models import AuditRequest, DashboardCount
+from users.models import CustomUser
+
+# The summary covering every request, shared by the roles that see more than their own.
+ALL_SCOPE = 'all'
+
+
+def csp_scope(csp_id):
+    return f"CSP:{csp_id}"
+
+
+def count_keys(status, data_center_location, csp_id):
+    """
+    Returns the DashboardCount keys, (scope, status, dimension, value), that one request
+    with these attributes counts towards: its data center and its CSP in the shared
+    summary, and its data center in its CSP's own summary. Organizations are resolved
+    from the CSP ids when read, so renaming one never leaves stale counts behind.
+    """
+    return [
+        (ALL_SCOPE, status, 'data_center', data_center_location),
+        (ALL_SCOPE, status, 'csp', str(csp_id)),
+        (csp_scope(csp_id), status, 'data_center', data_center_location),
+    ]
+
+
+def request_deltas(rows, delta):
+    """
+    Returns {key: delta} adding `delta` for each (status, data_center_location, csp_id) in `rows`.
+    """
+    deltas = Counter()
+    for status, data_center_location, csp_id in rows:
+        for key in count_keys(status, data_center_location, csp_id):
+            deltas[key] += delta
+    return deltas
+
+
+def move_deltas(rows, to_status):
+    """
+    Returns the deltas for moving requests, given as (status, data_center_location, csp_id),
+    to `to_status`.
+    """
+    deltas = request_deltas(rows, -1)
+    deltas.update(request_deltas(
+        [(to_status, data_center_location, csp_id) for _, data_center_location, csp_id in rows], 1,
+    ))
+    return deltas
+
+
+def key_filter(key):
+    scope, status, dimension, value = key
+    return Q(scope=scope, status=status, dimension=dimension, value=value)
+
+
+def apply_deltas(deltas, batch_size=500):
+    """
+    Adds each delta in {key: delta} to its DashboardCount row in two queries per
+    `batch_size` rows: missing rows are inserted at zero (conflicts ignored, so concurrent
+    writers cannot collide), then one UPDATE adds each row's delta in the database.
+    """
+    changes = [(key, delta) for key, delta in deltas.items() if delta]
+    for start in range(0, len(changes), batch_size):
+        batch = changes[start:start + batch_size]
+        DashboardCount.objects.bulk_create(
+            [
+                DashboardCount(scope=scope, status=status, dimension=dimension, value=value)
+                for (scope, status, dimension, value), delta in batch if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        DashboardCount.objects.filter(reduce(or_, (key_filter(key) for key, _ in batch))).update(
+            count=F('count') + Case(
+                *[When(key_filter(key), then=Value(delta)) for key, delta in batch], default=Value(0),
+            ),
+        )
+
+
+def expected_counts():
+    """
+    Returns {key: count} recomputed from the AuditRequest table, with three GROUP BY queries.
+    """
+    expected = {}
+    for row in AuditRequest.objects.order_by().values('status', 'data_center_location').annotate(total=Count('pk')):
+        expected[(ALL_SCOPE, row['status'], 'data_center', row['data_center_location'])] = row['total']
+    for row in AuditRequest.objects.order_by().values('status', 'csp_id').annotate(total=Count('pk')):
+        expected[(ALL_SCOPE, row['status'], 'csp', str(row['csp_id']))] = row['total']
+    for row in (
+        AuditRequest.objects.order_by().values('csp_id', 'status', 'data_center_location').annotate(total=Count('pk'))
+    ):
+        expected[(csp_scope(row['csp_id']), row['status'], 'data_center', row['data_center_location'])] = row['total']
+    return expected
+
+
+def stored_counts():
+    return {
+        (scope, status, dimension, value): count
+        for scope, status, dimension, value, count in DashboardCount.objects.exclude(count=0).values_list(
+            'scope', 'status', 'dimension', 'value', 'count',
+        )
+    }
+
+
+def rebuild_dashboard_counts(batch_size=2000):
+    """
+    Replaces the summary table with counts recomputed from the audit requests, to repair
+    drift. Call inside a transaction. Returns the number of rows written.
+    """
+    DashboardCount.objects.all().delete()
+    rows = DashboardCount.objects.bulk_create(
+        (
+            DashboardCount(scope=scope, status=status, dimension=dimension, value=value, count=count)
+            for (scope, status, dimension, value), count in expected_counts().items()
+        ),
+        batch_size=batch_size,
+    )
+    return len(rows)
+
+
+def stats_rows(user):
+    """
+    Returns (statuses, rows): the statuses `user`'s role reports (None for all of them)
+    and the (status, dimension, value, count) summary rows for that scope.
+    """
+    statuses = None # Every status
+    rows = DashboardCount.objects.exclude(count=0)
+    if user.role == 'CSP':
+        rows = rows.filter(scope=csp_scope(user.pk))
+    elif user.role == 'STQC_Auditor':
+        statuses = ['Forwarded_to_STQC']
+        rows = rows.filter(scope=ALL_SCOPE, status__in=statuses)
+    elif user.role in ('MeitY_Reviewer', 'Scientist_F'):
+        rows = rows.filter(scope=ALL_SCOPE)
+    else:
+        statuses, rows = [], rows.none()
+    return statuses, rows.values_list('status', 'dimension', 'value', 'count')
+
+
+def tally(rows):
+    """
+    Sums the summary rows into (by_status, by_data_center, by_csp) counters.
+    """
+    by_status, by_data_center, by_csp = Counter(), Counter(), Counter()
+    for status, dimension, value, count in rows:
+        if dimension == 'data_center':
+            by_status[status] += count
+            by_data_center[value] += count
+        else:
+            by_csp[int(value)] += count
+    return by_status, by_data_center, by_csp
+
+
+def organizations_of(by_csp):
+    return CustomUser.objects.filter(pk__in=by_csp).values_list('pk', 'organization')
+
+
+def stats_payload(user, statuses, totals, organizations):
+    """
+    Builds the dashboard response from tally()'s counters and {csp_id: organization}
+    (unused for a CSP, whose requests are all its own).
+    """
+    by_status, by_data_center, by_csp = totals
+    if user.role == 'CSP':
+        by_organization = Counter({user.organization or None: sum(by_status.values())} if by_status else {})
+    else:
+        by_organization = Counter()
+        for csp_id, count in by_csp.items():
+            by_organization[organizations.get(csp_id) or None] += count
+
+    return {
+        'total': sum(by_status.values()),
+        'by_status': [
+            {'status': status, 'status_display': display, 'count': by_status[status]}
+            for status, display in AuditRequest.STATUS_CHOICES if statuses is None or status in statuses
+        ],
+        'by_data_center': [
+            {'data_center': value, 'count': count} for value, count in sorted(by_data_center.items())
+        ],
+        'by_organization': [
+            {'organization': value, 'count': count}
+            for value, count in sorted(by_organization.items(), key=lambda item: (item[0] is None, item[0] or ''))
+        ],
+    }
+
+
+def dashboard_stats(user):
+    """
+    Returns the request counts by status, data center and CSP organization over the
+    requests `user`'s role may list (as AuditRequest.objects.for_user). Reads only the
+    summary rows for that scope, so the cost does not grow with the number of requests.
+    """
+    statuses, rows = stats_rows(user)
+    totals = tally(rows)
+    organizations = {} if user.role == 'CSP' else dict(organizations_of(totals[2]))
+    return stats_payload(user, statuses, totals, organizations)
+
+
+async def adashboard_stats(user):
+    """
+    The async counterpart of dashboard_stats(), reading the same rows with the async ORM.
+    """
+    statuses, rows = stats_rows(user)
+    totals = tally([row async for row in rows])
+    organizations = {} if user.role == 'CSP' else {pk: name async for pk, name in organizations_of(totals[2])}
+    return stats_payload(user, statuses, totals, organizations)
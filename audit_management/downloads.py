@@ -0,0 +1,207 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/downloads.py
+# Description: Streams stored files with HTTP Range, If-Range, If-Modified-Since and If-None-Match support,
+#              and bundles several stored files into a ZIP streamed on the fly.
+
+import mimetypes
+import os
+import re
+import zipfile
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .conditional import etag_matches
+
+# When set (e.g. '/protected-media/'), responses hand the file to the front-end server with
+# X-Accel-Redirect instead of streaming it from Python; nginx then serves ranges itself.
+ACCEL_REDIRECT_PREFIX = getattr(settings, 'AUDIT_DOWNLOAD_ACCEL_REDIRECT_PREFIX', None)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Formats that are already compressed; deflating them again costs CPU for no gain, so they are STORED.
+PRECOMPRESSED_EXTENSIONS = {
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.mp4', '.mp3',
+}
+ZIP_BLOCK_SIZE = 64 * 1024
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes of an open file starting at `start`, so
+    FileResponse streams just the requested range in fixed-size blocks.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single "bytes=" range, None if the header should
+    be ignored (absent, malformed or multi-range) and the whole file sent, or False if the
+    range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def serve_file(request, field_file, filename, etag=None, content_type=None):
+    """
+    Returns a response streaming `field_file` (a FieldFile) under the download name
+    `filename`, as `content_type` if given (else guessed from the name). Honours conditional and range headers; the file is read in blocks (or
+    handed to the server's sendfile / X-Accel-Redirect), never loaded whole into memory.
+    """
+    storage, name = field_file.storage, field_file.name
+    modified = storage.get_modified_time(name)
+    last_modified = http_date(modified.timestamp())
+    size = storage.size(name)
+
+    validators = {'Last-Modified': last_modified, 'Accept-Ranges': 'bytes'}
+    if etag:
+        validators['ETag'] = etag
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    if etag and request.headers.get('If-None-Match'):
+        not_modified = etag_matches(request, etag)
+    else:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        not_modified = since is not None and int(modified.timestamp()) <= since
+    if not_modified:
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range not in (etag, last_modified):
+        # The client's copy is stale; send the whole current file instead of splicing.
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + name
+    elif byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(storage.open(name, 'rb'), start, end - start + 1),
+            status=206, content_type=content_type, filename=filename,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        # A plain file object lets the WSGI server use its file wrapper (sendfile).
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type, filename=filename)
+        response['Content-Length'] = size
+
+    if not response.has_header('Content-Disposition'):
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    for header, value in validators.items():
+        response[header] = value
+    return response
+
+
+class ZipOutput:
+    """
+    Write-only, unseekable sink for zipfile. zipfile then writes each entry's sizes and
+    CRC in a data descriptor after the data, so nothing ever has to be rewound and the
+    archive can be sent as it is produced. `drain` hands over what was written so far.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def unique_arcname(name, used):
+    """
+    Returns `name`, or "stem (2).ext", "stem (3).ext"... if it is already in `used`.
+    """
+    stem, extension = os.path.splitext(name)
+    candidate, counter = name, 1
+    while candidate.lower() in used:
+        counter += 1
+        candidate = f"{stem} ({counter}){extension}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def stream_zip(entries):
+    """
+    Yields a ZIP archive of `entries`, an iterable of (arcname, field_file, modified
+    datetime), as it is built. Memory use is bounded by one read block per entry,
+    whatever the number or size of the files.
+    """
+    output = ZipOutput()
+    with zipfile.ZipFile(output, 'w') as archive:
+        for arcname, field_file, modified in entries:
+            info = zipfile.ZipInfo(arcname, date_time=modified.timetuple()[:6])
+            info.file_size = field_file.size
+            if os.path.splitext(arcname)[1].lower() in PRECOMPRESSED_EXTENSIONS:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with field_file.storage.open(field_file.name, 'rb') as source, archive.open(info, 'w') as target:
+                for block in iter(lambda: source.read(ZIP_BLOCK_SIZE), b''):
+                    target.write(block)
+                    if output.buffer:
+                        yield output.drain()
+            if output.buffer:
+                yield output.drain()
+    # Closing the archive wrote the central directory.
+    yield output.drain()
@@ -0,0 +1,96 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/dwell.py
+# Description: Per-stage dwell-time histograms (DwellBucket) behind the stage analytics, kept in step incrementally.
+
+import math
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, F, Q, Value, When
+
+from .models import AuditStatusEvent, DwellBucket
+
+# Buckets per doubling of the dwell time: each covers a factor of 2 ** (1 / 8), so a
+# percentile read from the histogram is within about 4.4% of the exact value.
+BUCKETS_PER_DOUBLING = 8
+
+
+def dwell_bucket(dwell):
+    """
+    Returns the histogram bucket of a dwell time: 0 below one second, then bucket b holds
+    dwells from 2 ** ((b - 1) / 8) up to 2 ** (b / 8) seconds.
+    """
+    seconds = dwell.total_seconds()
+    if seconds < 1:
+        return 0
+    return math.floor(math.log2(seconds) * BUCKETS_PER_DOUBLING) + 1
+
+
+def bucket_seconds(bucket):
+    """
+    Returns the dwell time (seconds) reported for values in `bucket`: the geometric middle of its range.
+    """
+    if bucket <= 0:
+        return 0.0
+    return 2 ** ((bucket - 0.5) / BUCKETS_PER_DOUBLING)
+
+
+def dwell_deltas(rows):
+    """
+    Returns {(stage, bucket): count} for the (from_status, dwell) of each status event in `rows`.
+    """
+    return Counter((stage, dwell_bucket(dwell)) for stage, dwell in rows)
+
+
+def key_filter(key):
+    stage, bucket = key
+    return Q(stage=stage, bucket=bucket)
+
+
+def apply_dwell_deltas(deltas):
+    """
+    Adds each delta in {(stage, bucket): delta} to its DwellBucket row in two queries, as
+    dashboard.apply_deltas() does: missing rows are inserted at zero (conflicts ignored),
+    then one UPDATE adds each row's delta in the database.
+    """
+    changes = [(key, delta) for key, delta in deltas.items() if delta]
+    if not changes:
+        return
+    DwellBucket.objects.bulk_create(
+        [DwellBucket(stage=stage, bucket=bucket) for (stage, bucket), delta in changes if delta > 0],
+        ignore_conflicts=True,
+    )
+    DwellBucket.objects.filter(reduce(or_, (key_filter(key) for key, _ in changes))).update(
+        count=F('count') + Case(*[When(key_filter(key), then=Value(delta)) for key, delta in changes], default=Value(0)),
+    )
+
+
+def expected_buckets(chunk_size=2000):
+    """
+    Returns {(stage, bucket): count} recomputed from the whole AuditStatusEvent table.
+    """
+    return dwell_deltas(
+        AuditStatusEvent.objects.order_by().values_list('from_status', 'dwell').iterator(chunk_size=chunk_size)
+    )
+
+
+def stored_buckets():
+    return {
+        (stage, bucket): count
+        for stage, bucket, count in DwellBucket.objects.exclude(count=0).values_list('stage', 'bucket', 'count')
+    }
+
+
+def rebuild_dwell_buckets(batch_size=2000):
+    """
+    Replaces the histograms with counts recomputed from the status history, to repair
+    drift. Call inside a transaction. Returns the number of rows written.
+    """
+    DwellBucket.objects.all().delete()
+    rows = DwellBucket.objects.bulk_create(
+        (DwellBucket(stage=stage, bucket=bucket, count=count) for (stage, bucket), count in expected_buckets().items()),
+        batch_size=batch_size,
+    )
+    return len(rows)
@@ -5,6 +5,7 @@
 
 from django import forms
 from .models import AuditRequest, Document, Remark
+from .workflow import available_transitions
 
 class AuditRequestForm(forms.ModelForm):
     """
@@ -77,31 +78,14 @@ class AuditRequestStatusUpdateForm(forms.ModelForm):
         current_status = kwargs.pop('current_status', None)
         super().__init__(*args, **kwargs)
 
-        # Get all status choices from the model
-        all_choices = AuditRequest.STATUS_CHOICES
+        # Only the transitions the workflow table allows this role from the current status.
         available_choices = []
-
         if user:
-            if user.is_meity_reviewer and current_status == 'Submitted_by_CSP':
-                # MeitY Reviewer can only forward to STQC Audit
-                available_choices = [('Forwarded_to_STQC', 'Forward to STQC for Audit')]
-            elif user.is_stqc_auditor and current_status == 'Forwarded_to_STQC':
-                # STQC Auditor can only mark as Audit Completed
-                available_choices = [('Audit_Completed_by_STQC', 'Audit Completed')]
-            elif user.is_scientist_f and current_status == 'Audit_Completed_by_STQC':
-                # Scientist F can Approve or Reject completed audits
-                available_choices = [
-                    ('Approved_by_ScientistF', 'Approve Audit'),
-                    ('Rejected_by_ScientistF', 'Reject Audit')
-                ]
-            
+            available_choices = [
+                (target, transition.label) for target, transition in available_transitions(user.role, current_status)
+            ]
+
         if available_choices:
-            # Add the current status as the default selected option if it's not already there
-            current_choice_display = dict(all_choices).get(current_status, current_status)
-            if (current_status, current_choice_display) not in available_choices:
-                # Only add if not already present and if it makes sense to show as "current"
-                # This ensures the list only contains valid transitions + current status (if not a transition option)
-                pass # The view will handle if no form is presented at all.
             self.fields['status'].choices = available_choices
         else:
             # If no valid transitions for the current user/status, hide the field
@@ -0,0 +1,214 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/jobs.py
+# Description: Database-backed background job queue: task registry, enqueueing, claiming and retries.
+
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import AuditRequest, Document, Job
+
+logger = logging.getLogger(__name__)
+
+# Attempts before a job is marked failed.
+MAX_ATTEMPTS = getattr(settings, 'AUDIT_JOB_MAX_ATTEMPTS', 5)
+# Delay before the first retry (seconds); doubles with every further attempt up to RETRY_MAX_DELAY.
+RETRY_BASE_DELAY = getattr(settings, 'AUDIT_JOB_RETRY_DELAY', 10)
+RETRY_MAX_DELAY = getattr(settings, 'AUDIT_JOB_RETRY_MAX_DELAY', 60 * 60)
+# A running job whose worker has not sent a heartbeat for this many seconds is assumed lost and requeued.
+JOB_TIMEOUT = getattr(settings, 'AUDIT_JOB_TIMEOUT', 10 * 60)
+# Seconds between the heartbeats of a running job; well under JOB_TIMEOUT, so a slow database
+# or a busy worker does not make a live job look lost.
+HEARTBEAT_INTERVAL = getattr(settings, 'AUDIT_JOB_HEARTBEAT', JOB_TIMEOUT / 4)
+
+# Task name -> callable taking the Job. Filled by the @task decorator in tasks.py.
+TASKS = {}
+
+
+def task(name):
+    """
+    Registers a function as the handler for jobs whose `task` is `name`.
+    """
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(task_name, document=None, delay=0, **payload):
+    """
+    Queues a job. Called inside the caller's transaction, so the job only becomes
+    visible to workers if the change that produced it commits.
+    """
+    return Job.objects.create(
+        task=task_name, document=document, payload=payload, max_attempts=MAX_ATTEMPTS,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with a little jitter so jobs that failed together do not retry together.
+    """
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return delay + random.uniform(0, delay / 10)
+
+
+def claim_next(worker_id):
+    """
+    Claims the oldest due job for `worker_id` and returns it, or None if none is due.
+    The claim is a conditional UPDATE on the job's status, so when several workers race
+    for the same row exactly one of them wins; the others move on to the next candidate.
+    """
+    while True:
+        now = timezone.now()
+        candidate = (
+            Job.objects.filter(status='queued', run_after__lte=now)
+            .order_by('run_after', 'id').values_list('pk', flat=True).first()
+        )
+        if candidate is None:
+            return None
+        claimed = Job.objects.filter(pk=candidate, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=candidate)
+
+
+class Heartbeat:
+    """
+    While a job runs, refreshes its locked_at every HEARTBEAT_INTERVAL from a background
+    thread, so requeue_stale_jobs() only requeues jobs whose worker has died, never one that
+    is merely taking longer than JOB_TIMEOUT (which would then run twice).
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"job-{job.pk}-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop.set()
+        self.thread.join()
+
+    def beat(self):
+        """
+        Refreshes locked_at, unless the job has been requeued or finished meanwhile.
+        """
+        return Job.objects.filter(pk=self.job.pk, status='running', locked_by=self.job.locked_by).update(
+            locked_at=timezone.now(),
+        )
+
+    def run(self):
+        try:
+            while not self.stop.wait(HEARTBEAT_INTERVAL):
+                try:
+                    self.beat()
+                except Exception:
+                    logger.exception("Heartbeat for job %s failed; retrying.", self.job.pk)
+        finally:
+            # This thread's own connection; the worker's is untouched.
+            connections.close_all()
+
+
+def set_document_status(job, processing_status):
+    """
+    Moves the job's document to `processing_status`. The status is shown in the audit
+    request's detail, so a change also moves the request's processing_version (and with it
+    the detail ETag) and invalidates cached worklists. last_updated is left alone: it is
+    the time of the last edit by a user, and the worklists' sort and pagination key.
+    """
+    if not job.document_id:
+        return
+    # update() rather than save(): no signals, and no clobbering of concurrent edits.
+    changed = (
+        Document.objects.filter(pk=job.document_id).exclude(processing_status=processing_status)
+        .update(processing_status=processing_status)
+    )
+    if changed:
+        AuditRequest.objects.filter(documents__pk=job.document_id).update(
+            processing_version=F('processing_version') + 1,
+        )
+        bump_version()
+
+
+def run_job(job):
+    """
+    Runs a claimed job and records the outcome: succeeded, requeued with backoff, or
+    failed once its attempts are used up. Returns True if the job succeeded.
+    """
+    set_document_status(job, 'processing')
+    try:
+        handler = TASKS[job.task]
+        with Heartbeat(job):
+            handler(job)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s:\n%s", job.pk, job.task, job.attempts, error)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(status='failed', last_error=error, finished_at=timezone.now())
+            set_document_status(job, 'failed')
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', last_error=error, locked_by='', locked_at=None,
+                run_after=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+            set_document_status(job, 'pending')
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status='succeeded', finished_at=timezone.now())
+    # A document is ready once none of its jobs are still outstanding.
+    if job.document_id and not Job.objects.filter(document_id=job.document_id, status__in=['queued', 'running']).exists():
+        set_document_status(job, 'ready')
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Puts back jobs left 'running' by a worker that died mid-job, which is to say whose
+    heartbeat stopped more than JOB_TIMEOUT seconds ago (see Heartbeat). A job that has already used
+    up its attempts is failed instead, so one that kills its worker every time is not claimed
+    and requeued forever. Returns how many were requeued.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=JOB_TIMEOUT))
+    error = f"Worker sent no heartbeat for {JOB_TIMEOUT} seconds."
+    for job in stale.filter(attempts__gte=F('max_attempts')):
+        # Conditional on the row still being stale, in case its worker finished it meanwhile.
+        failed = stale.filter(pk=job.pk).update(
+            status='failed', last_error=error, locked_by='', locked_at=None, finished_at=now,
+        )
+        if failed:
+            logger.warning("Job %s (%s) failed: %s", job.pk, job.task, error)
+            set_document_status(job, 'failed')
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', last_error=error, locked_by='', locked_at=None, run_after=now,
+    )
+
+
+def run_pending_jobs(worker_id='inline', limit=None):
+    """
+    Runs due jobs in the current process until none are left (or `limit` have run).
+    Used by `run_workers --processes 0` and in tests. Returns the number of jobs run.
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
@@ -0,0 +1,264 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/benchmark_concurrency.py
+# Description: In-process concurrency benchmark of the read APIs: sync views on a WSGI thread pool versus the
+#              async views on one ASGI event loop.
+
+import asyncio
+import json
+import platform
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.core.asgi import get_asgi_application
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from audit_management.models import AuditRequest
+from users.models import CustomUser
+
+from .benchmark_workflow import git_revision, percentile
+
+# (label, sync route, async route, whether the route takes the pk of a request the role can see)
+ROUTES = [
+    ('list', 'api_audit_request_list_create', 'api_audit_request_list_async', False),
+    ('detail', 'api_audit_request_detail', 'api_audit_request_detail_async', True),
+    ('stats', 'api_dashboard_stats', 'api_dashboard_stats_async', False),
+]
+
+
+@contextmanager
+def simulated_latency(seconds):
+    """
+    Delays every query on every database connection opened meanwhile by `seconds`, to stand
+    in for the network round trip to a database server (SQLite answers in microseconds).
+    """
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if not seconds:
+        yield
+        return
+    connection_created.connect(install)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+
+
+def build_calls(prefix):
+    """
+    Returns [(label, sync url, async url, headers)]: every route as every role, each with
+    that role's JWT and, for the detail route, a request the role may view.
+    """
+    calls = []
+    for role, _ in CustomUser.ROLE_CHOICES:
+        user, _ = CustomUser.objects.get_or_create(
+            username=f"{prefix}_{role.lower()}", defaults={'role': role, 'organization': 'Benchmark'},
+        )
+        headers = {'Authorization': f"Bearer {RefreshToken.for_user(user).access_token}"}
+        visible = AuditRequest.objects.for_user(user).values_list('pk', flat=True).first()
+        for label, sync_name, async_name, takes_pk in ROUTES:
+            if takes_pk and visible is None:
+                continue
+            kwargs = {'pk': visible} if takes_pk else {}
+            calls.append((label, reverse(sync_name, kwargs=kwargs), reverse(async_name, kwargs=kwargs), headers))
+    return calls
+
+
+async def asgi_get(application, url, headers):
+    """
+    Sends one GET through `application` as an ASGI server would and returns the status
+    code. Unlike django.test.AsyncClient, the real ASGIHandler gives each request its own
+    thread for sync code, as it does under uvicorn.
+    """
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode('latin1')) for name, value in headers.items()
+        ],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    requested = False
+    status_code = None
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Future() # The client never disconnects; cancelled once the response is sent.
+
+    async def send(message):
+        nonlocal status_code
+        if message['type'] == 'http.response.start':
+            status_code = message['status']
+
+    await application(scope, receive, send)
+    return status_code
+
+
+class ConcurrencyBenchmark:
+    """
+    Keeps `concurrency` clients busy until `requests` calls have been made, and records each
+    call's latency (including time spent queued for a worker) under its route label.
+    """
+
+    def __init__(self, calls, requests, concurrency):
+        self.calls = calls
+        self.requests = requests
+        self.concurrency = concurrency
+
+    async def drive(self, send):
+        samples, errors = defaultdict(list), defaultdict(int)
+        counter = iter(range(self.requests))
+
+        async def client():
+            for index in counter:
+                label, sync_url, async_url, headers = self.calls[index % len(self.calls)]
+                start = time.perf_counter()
+                status_code = await send(sync_url, async_url, headers)
+                samples[label].append(time.perf_counter() - start)
+                if status_code != 200:
+                    errors[label] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(self.concurrency)))
+        return self.results(samples, errors, time.perf_counter() - start)
+
+    async def run_wsgi(self, threads):
+        """
+        Sync views through the WSGI handler on a pool of `threads`, as one gunicorn worker
+        with --threads would serve them: a call waits for a free thread and holds it throughout.
+        """
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            loop = asyncio.get_running_loop()
+
+            async def send(sync_url, async_url, headers):
+                response = await loop.run_in_executor(pool, lambda: Client().get(sync_url, headers=headers))
+                return response.status_code
+
+            return await self.drive(send)
+
+    async def run_asgi(self):
+        """
+        Async views through the ASGI handler on this event loop, as one uvicorn worker would serve them.
+        """
+        application = get_asgi_application()
+
+        async def send(sync_url, async_url, headers):
+            return await asgi_get(application, async_url, headers)
+
+        return await self.drive(send)
+
+    def results(self, samples, errors, wall_time):
+        routes = {}
+        for label, values in sorted(samples.items()):
+            values = sorted(values)
+            routes[label] = {
+                'requests': len(values),
+                'errors': errors.get(label, 0),
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+            }
+        total = sum(len(values) for values in samples.values())
+        return {
+            'routes': routes,
+            'overall': {
+                'requests': total,
+                'errors': sum(errors.values()),
+                'wall_time_s': round(wall_time, 3),
+                'requests_per_second': round(total / wall_time, 2) if wall_time else None,
+            },
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Issues the same mix of list, detail and stats reads, as every role, with many clients at once: first '
+        'to the sync DRF views on a WSGI thread pool, then to the async views on an ASGI event loop. Reports '
+        'latency percentiles and throughput for each. Runs in-process against the configured database; seed it '
+        'first with seed_audit_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Calls per server model.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Clients with a call in flight at once.')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='WSGI worker threads (gunicorn --threads); the ASGI side uses one event loop.')
+        parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                            help='Added to every query, to model a database across the network.')
+        parser.add_argument('--output', help='Write machine-readable JSON results to this path.')
+        parser.add_argument('--prefix', default='bench', help='Username prefix for the benchmark users.')
+
+    def handle(self, *args, **options):
+        for name in ('requests', 'concurrency', 'threads'):
+            if options[name] <= 0:
+                raise CommandError(f"--{name} must be positive.")
+        if options['db_latency_ms'] < 0:
+            raise CommandError('--db-latency-ms must not be negative.')
+
+        calls = build_calls(options['prefix'])
+        benchmark = ConcurrencyBenchmark(calls, options['requests'], options['concurrency'])
+        # DEBUG=False so query logging does not distort the timings.
+        with override_settings(DEBUG=False), simulated_latency(options['db_latency_ms'] / 1000):
+            # One unmeasured pass over every call first, so both sides start with warm caches.
+            warmup = ConcurrencyBenchmark(calls, len(calls), 1)
+            asyncio.run(warmup.run_wsgi(1))
+            asyncio.run(warmup.run_asgi())
+            results = {
+                'wsgi': asyncio.run(benchmark.run_wsgi(options['threads'])),
+                'asgi': asyncio.run(benchmark.run_asgi()),
+            }
+        results['meta'] = {
+            'timestamp': timezone.now().isoformat(),
+            'git_revision': git_revision(),
+            'database_vendor': connection.vendor,
+            'python': platform.python_version(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'threads': options['threads'],
+            'db_latency_ms': options['db_latency_ms'],
+        }
+        self.print_table(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        errors = results['wsgi']['overall']['errors'] + results['asgi']['overall']['errors']
+        if errors:
+            self.stderr.write(self.style.WARNING(f"{errors} requests returned an unexpected status code."))
+
+    def print_table(self, results):
+        header = f"{'server':<6} {'route':<8} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>4}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for server in ('wsgi', 'asgi'):
+            for label, row in results[server]['routes'].items():
+                self.stdout.write(
+                    f"{server:<6} {label:<8} {row['requests']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                    f"{row['p99_ms']:>9.2f} {row['errors']:>4}"
+                )
+        self.stdout.write('')
+        for server in ('wsgi', 'asgi'):
+            overall = results[server]['overall']
+            self.stdout.write(
+                f"{server}: {overall['requests']} requests in {overall['wall_time_s']}s "
+                f"({overall['requests_per_second']} req/s)"
+            )
@@ -0,0 +1,299 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/benchmark_workflow.py
+# Description: In-process HTTP benchmark that replays the four-role audit workflow through the real URLconf.
+
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from audit_management.models import AuditRequest
+from users.models import CustomUser
+
+BENCH_PASSWORD = 'benchpass123'
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the pct-th percentile of an already sorted list using linear interpolation.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+class WorkflowBenchmark:
+    """
+    Drives the API through django.test.Client (the full middleware stack and URLconf,
+    without a network socket) and records wall-clock latency per route.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.created_ids = []
+        self.clients = {}
+
+    def setup_users(self):
+        """
+        Creates (or reuses) one user per role and logs each in through the JWT token endpoint.
+        """
+        for role, _ in CustomUser.ROLE_CHOICES:
+            username = f"{self.prefix}_{role.lower()}"
+            user, created = CustomUser.objects.get_or_create(
+                username=username, defaults={'role': role, 'organization': 'Benchmark'},
+            )
+            if created or not user.check_password(BENCH_PASSWORD):
+                user.set_password(BENCH_PASSWORD)
+                user.save()
+            client = Client()
+            response = self.call(client, 'post', reverse('token_obtain_pair'),
+                                 {'username': username, 'password': BENCH_PASSWORD}, expect=200)
+            client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {response.json()['access']}"
+            self.clients[role] = client
+
+    def call(self, client, method, url, data=None, expect=200, multipart=False):
+        """
+        Issues one request, records its latency under "<METHOD> <route pattern>" and returns the response.
+        """
+        kwargs = {}
+        if data is not None:
+            if multipart:
+                kwargs['data'] = data
+            else:
+                kwargs['data'] = json.dumps(data)
+                kwargs['content_type'] = 'application/json'
+        start = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        match = response.resolver_match
+        label = f"{method.upper()} /{match.route}" if match else f"{method.upper()} {url}"
+        self.samples[label].append(elapsed)
+        if response.status_code != expect:
+            self.errors[label] += 1
+        return response
+
+    def run_lifecycle(self, documents, reads):
+        """
+        Replays one request from CSP submission to Scientist F approval.
+        """
+        csp, meity = self.clients['CSP'], self.clients['MeitY_Reviewer']
+        stqc, scientist = self.clients['STQC_Auditor'], self.clients['Scientist_F']
+        list_url = reverse('api_audit_request_list_create')
+
+        response = self.call(csp, 'post', list_url, {
+            'service_provider_name': 'Benchmark Cloud', 'data_center_location': 'Chennai',
+            'description': 'Benchmark workflow request.',
+        }, expect=201)
+        if response.status_code != 201:
+            return
+        pk = response.json()['id']
+        self.created_ids.append(pk)
+        detail_url = reverse('api_audit_request_detail', kwargs={'pk': pk})
+        upload_url = reverse('api_document_upload', kwargs={'audit_request_pk': pk})
+        status_url = reverse('api_audit_request_status_update', kwargs={'pk': pk})
+        remark_url = reverse('api_remark_add', kwargs={'audit_request_pk': pk})
+
+        for index in range(documents):
+            self.call(csp, 'post', upload_url, {
+                'document_type': 'CSP_Submission', 'description': f'Submission {index}',
+                'file': SimpleUploadedFile(f'submission_{index}.pdf', b'%PDF-1.4 benchmark\n', 'application/pdf'),
+            }, expect=201, multipart=True)
+
+        for _ in range(reads):
+            self.call(csp, 'get', list_url)
+            self.call(meity, 'get', list_url)
+        self.call(meity, 'get', detail_url)
+        self.call(meity, 'patch', status_url, {'status': 'Forwarded_to_STQC'})
+
+        for _ in range(reads):
+            self.call(stqc, 'get', list_url)
+        self.call(stqc, 'get', detail_url)
+        self.call(stqc, 'post', upload_url, {
+            'document_type': 'Audit_Report', 'description': 'STQC audit report',
+            'file': SimpleUploadedFile('audit_report.pdf', b'%PDF-1.4 report\n', 'application/pdf'),
+        }, expect=201, multipart=True)
+        self.call(stqc, 'post', remark_url, {'comment': 'Controls verified on site.'}, expect=201)
+        self.call(stqc, 'patch', status_url, {'status': 'Audit_Completed_by_STQC'})
+
+        for _ in range(reads):
+            self.call(scientist, 'get', list_url)
+        self.call(scientist, 'get', detail_url)
+        self.call(scientist, 'patch', status_url, {'status': 'Approved_by_ScientistF'})
+
+    def run_bulk_forward(self, size):
+        """
+        Creates `size` submitted requests directly (unmeasured) and forwards them all to
+        STQC with one bulk call, to compare its latency with a single status PATCH.
+        """
+        csp = CustomUser.objects.get(username=f"{self.prefix}_csp")
+        ids = [
+            AuditRequest.objects.create(
+                csp=csp, service_provider_name='Benchmark Cloud', data_center_location='Chennai',
+                description='Benchmark bulk request.',
+            ).pk
+            for _ in range(size)
+        ]
+        self.created_ids.extend(ids)
+        self.call(self.clients['MeitY_Reviewer'], 'post', reverse('api_audit_request_bulk_status_update'),
+                  {'ids': ids, 'status': 'Forwarded_to_STQC'})
+
+    def results(self, wall_time):
+        endpoints = {}
+        for label, values in sorted(self.samples.items()):
+            values = sorted(values)
+            total = sum(values)
+            endpoints[label] = {
+                'requests': len(values),
+                'errors': self.errors.get(label, 0),
+                'mean_ms': round(total / len(values) * 1000, 3),
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+                'requests_per_second': round(len(values) / total, 2) if total else None,
+            }
+        total_requests = sum(len(values) for values in self.samples.values())
+        return {
+            'endpoints': endpoints,
+            'overall': {
+                'requests': total_requests,
+                'errors': sum(self.errors.values()),
+                'wall_time_s': round(wall_time, 3),
+                'requests_per_second': round(total_requests / wall_time, 2) if wall_time else None,
+            },
+        }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Replays the CSP -> MeitY -> STQC -> Scientist F workflow through the API in-process and reports '
+        'p50/p95/p99 latency and requests per second per endpoint. Runs against the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Number of full workflow lifecycles.')
+        parser.add_argument('--warmup', type=int, default=2, help='Lifecycles to run before measuring.')
+        parser.add_argument('--documents', type=int, default=2, help='CSP documents uploaded per request.')
+        parser.add_argument('--reads', type=int, default=3, help='List polls per role per workflow stage.')
+        parser.add_argument('--bulk', type=int, default=0,
+                            help='Also forward this many requests with one bulk status call per lifecycle.')
+        parser.add_argument('--output', help='Write machine-readable JSON results to this path.')
+        parser.add_argument('--baseline', help='JSON results from an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed fractional drop in per-endpoint requests/second versus --baseline.')
+        parser.add_argument('--prefix', default='bench', help='Username prefix for the benchmark users.')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the audit requests created by the run.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] <= 0:
+            raise CommandError('--iterations must be positive.')
+
+        media_root = tempfile.mkdtemp(prefix='audit-bench-')
+        # DEBUG=False so query logging does not distort the timings; uploads go to a scratch MEDIA_ROOT.
+        with override_settings(DEBUG=False, MEDIA_ROOT=media_root):
+            benchmark = WorkflowBenchmark(options['prefix'])
+            try:
+                benchmark.setup_users()
+                for _ in range(options['warmup']):
+                    benchmark.run_lifecycle(options['documents'], options['reads'])
+                benchmark.samples.clear()
+                benchmark.errors.clear()
+
+                start = time.perf_counter()
+                for _ in range(options['iterations']):
+                    benchmark.run_lifecycle(options['documents'], options['reads'])
+                    if options['bulk']:
+                        benchmark.run_bulk_forward(options['bulk'])
+                wall_time = time.perf_counter() - start
+            finally:
+                if not options['keep_data']:
+                    AuditRequest.objects.filter(pk__in=benchmark.created_ids).delete()
+                shutil.rmtree(media_root, ignore_errors=True)
+
+        results = benchmark.results(wall_time)
+        results['meta'] = {
+            'timestamp': timezone.now().isoformat(),
+            'git_revision': git_revision(),
+            'database_vendor': connection.vendor,
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'documents': options['documents'],
+            'reads': options['reads'],
+            'bulk': options['bulk'],
+        }
+        self.print_table(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if results['overall']['errors']:
+            self.stderr.write(self.style.WARNING(
+                f"{results['overall']['errors']} requests returned an unexpected status code."
+            ))
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def print_table(self, results):
+        header = f"{'endpoint':<78} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'err':>4}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{label:<78} {row['requests']:>5} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['requests_per_second'] or 0:>9.1f} {row['errors']:>4}"
+            )
+        overall = results['overall']
+        self.stdout.write(
+            f"\n{overall['requests']} requests in {overall['wall_time_s']}s "
+            f"({overall['requests_per_second']} req/s overall)"
+        )
+
+    def compare(self, results, baseline_path, tolerance):
+        """
+        Fails the command if any endpoint's throughput dropped by more than `tolerance` versus the baseline.
+        """
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)
+        regressions = []
+        for label, row in results['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(label, {}).get('requests_per_second')
+            after = row['requests_per_second']
+            if not before or not after:
+                continue
+            change = (after - before) / before
+            self.stdout.write(f"{label:<78} {before:>9.1f} -> {after:>9.1f} req/s ({change:+.1%})")
+            if change < -tolerance:
+                regressions.append(label)
+        if regressions:
+            raise CommandError(
+                f"Throughput regressed by more than {tolerance:.0%} on: {', '.join(regressions)}"
+            )
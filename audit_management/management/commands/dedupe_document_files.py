@@ -0,0 +1,59 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/dedupe_document_files.py
+# Description: Moves documents stored before content addressing into the deduplicated blob layout.
+
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from audit_management.models import Document
+from audit_management.storage import blob_name, blob_sha256, content_sha256
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-stores every document file that predates content-addressed storage under its SHA-256, '
+        'points the Document rows at the shared blob and deletes the old copies once unreferenced.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be moved without changing anything.')
+
+    def handle(self, *args, **options):
+        storage = Document._meta.get_field('file').storage
+        legacy_names = (
+            Document.objects.filter(sha256='').order_by().values_list('file', flat=True).distinct()
+        )
+        moved = missing = reclaimed = 0
+        for old_name in list(legacy_names):
+            if not old_name or blob_sha256(old_name):
+                continue
+            if not storage.exists(old_name):
+                missing += 1
+                self.stderr.write(f"Missing file, left as is: {old_name}")
+                continue
+
+            with storage.open(old_name, 'rb') as fh:
+                fh.sha256 = content_sha256(fh)
+                new_name = blob_name(posixpath.dirname(old_name), fh.sha256, old_name)
+                duplicate = storage.exists(new_name)
+                if duplicate:
+                    reclaimed += storage.size(old_name)
+                moved += 1
+                if options['dry_run']:
+                    continue
+                storage.save(old_name, fh)
+
+            with transaction.atomic():
+                rows = Document.objects.filter(file=old_name)
+                rows.filter(original_filename='').update(original_filename=posixpath.basename(old_name)[:255])
+                rows.update(file=new_name, sha256=fh.sha256)
+            storage.delete(old_name)
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} files into content-addressed storage ({missing} missing); "
+            f"{reclaimed} bytes of duplicate copies {'would be ' if options['dry_run'] else ''}released."
+        ))
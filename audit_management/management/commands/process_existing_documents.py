@@ -0,0 +1,38 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/process_existing_documents.py
+# Description: Queues background processing (type detection, preview thumbnails) for documents uploaded before it existed.
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from audit_management.jobs import MAX_ATTEMPTS
+from audit_management.models import Document, Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Queues the post-upload processing job for every document that has never been processed '
+        '(no detected content type), so older uploads get previews too. Run `run_workers` to process them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report how many documents would be queued.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Jobs inserted per query.')
+
+    def handle(self, *args, **options):
+        unprocessed = (
+            Document.objects.filter(content_type='').exclude(jobs__status__in=('queued', 'running'))
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{unprocessed.count()} documents would be queued for processing.")
+            return
+
+        with transaction.atomic():
+            jobs = Job.objects.bulk_create(
+                (Job(task='process_document', document_id=pk, max_attempts=MAX_ATTEMPTS) for pk in unprocessed),
+                batch_size=options['batch_size'],
+            )
+        queued = len(jobs)
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} documents for processing."))
@@ -0,0 +1,43 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/purge_upload_sessions.py
+# Description: Deletes stale resumable upload sessions and their partial files.
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from audit_management.models import UploadSession
+from audit_management.uploads import UPLOAD_SESSION_TTL
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes upload sessions that have not received a chunk within the TTL, together with their '
+        'partial files, and forgets completed sessions past the same age. Intended to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=UPLOAD_SESSION_TTL,
+                            help='Age in seconds since the last chunk after which a session is stale.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting.')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative.')
+
+        cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+        incomplete = stale.filter(document__isnull=True).count()
+        completed = stale.count() - incomplete
+
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {incomplete} incomplete and {completed} completed upload sessions.")
+            return
+
+        # The partial files are removed by the post_delete handler in signals.py.
+        stale.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {incomplete} incomplete and {completed} completed upload sessions."
+        ))
@@ -0,0 +1,36 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/purge_workflow_events.py
+# Description: Deletes event stream entries older than the resume window.
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from audit_management.models import WorkflowEvent
+from audit_management.stream import RETENTION
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes WorkflowEvent rows older than the retention period. Clients reconnecting after '
+        'longer than that get only newer events and should reload. Intended to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=RETENTION,
+                            help='Age in seconds after which an event is deleted.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting.')
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative.')
+
+        stale = WorkflowEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=options['older_than']))
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {stale.count()} workflow events.")
+            return
+
+        deleted, _ = stale.delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} workflow events."))
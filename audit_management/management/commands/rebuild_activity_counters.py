@@ -0,0 +1,53 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/rebuild_activity_counters.py
+# Description: Rebuilds or checks the denormalized document/remark counters and last activity time on audit requests.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from audit_management.cache import bump_version
+from audit_management.models import AuditRequest
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes AuditRequest.document_count, remark_count and last_activity_at from the '
+        'document and remark tables. With --check, only reports requests whose counters have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without changing anything; exits non-zero if any is found.')
+        parser.add_argument('--limit', type=int, default=20, help='Drifted requests to list with --check.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_drift(options['limit'])
+            return
+
+        with transaction.atomic():
+            updated = AuditRequest.objects.rebuild_counters()
+            transaction.on_commit(bump_version)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt activity counters on {updated} audit requests."))
+
+    def check_drift(self, limit):
+        drifted = AuditRequest.objects.with_counter_drift().order_by('pk')
+        total = drifted.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Activity counters match the document and remark tables.'))
+            return
+
+        rows = drifted.values(
+            'pk', 'document_count', 'expected_document_count', 'remark_count', 'expected_remark_count',
+            'last_activity_at', 'expected_last_activity_at',
+        )[:limit]
+        for row in rows:
+            self.stdout.write(
+                f"#{row['pk']}: documents {row['document_count']} (expected {row['expected_document_count']}), "
+                f"remarks {row['remark_count']} (expected {row['expected_remark_count']}), "
+                f"last activity {row['last_activity_at']} (expected {row['expected_last_activity_at']})"
+            )
+        raise CommandError(
+            f"{total} audit requests have drifted counters; run rebuild_activity_counters to fix them."
+        )
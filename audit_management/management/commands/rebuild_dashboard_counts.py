@@ -0,0 +1,46 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/rebuild_dashboard_counts.py
+# Description: Rebuilds or checks the DashboardCount summary table behind the dashboard stats API.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from audit_management.dashboard import expected_counts, rebuild_dashboard_counts, stored_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the dashboard counts (requests by status, data center and CSP) from the audit '
+        'request table. With --check, only reports counts that have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without changing anything; exits non-zero if any is found.')
+        parser.add_argument('--limit', type=int, default=20, help='Drifted counts to list with --check.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_drift(options['limit'])
+            return
+
+        with transaction.atomic():
+            written = rebuild_dashboard_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} dashboard counts."))
+
+    def check_drift(self, limit):
+        expected, stored = expected_counts(), stored_counts()
+        drifted = sorted(key for key in expected.keys() | stored.keys() if expected.get(key, 0) != stored.get(key, 0))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Dashboard counts match the audit request table.'))
+            return
+
+        for scope, status, dimension, value in drifted[:limit]:
+            key = (scope, status, dimension, value)
+            self.stdout.write(
+                f"{scope} / {status} / {dimension}={value}: {stored.get(key, 0)} (expected {expected.get(key, 0)})"
+            )
+        raise CommandError(
+            f"{len(drifted)} dashboard counts have drifted; run rebuild_dashboard_counts to fix them."
+        )
@@ -0,0 +1,44 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/rebuild_dwell_buckets.py
+# Description: Rebuilds or checks the DwellBucket histograms behind the stage analytics API.
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from audit_management.dwell import expected_buckets, rebuild_dwell_buckets, stored_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the per-stage dwell-time histograms from the audit status history. With --check, '
+        'only reports buckets that have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without changing anything; exits non-zero if any is found.')
+        parser.add_argument('--limit', type=int, default=20, help='Drifted buckets to list with --check.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check_drift(options['limit'])
+            return
+
+        with transaction.atomic():
+            written = rebuild_dwell_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} dwell-time buckets."))
+
+    def check_drift(self, limit):
+        expected, stored = expected_buckets(), stored_buckets()
+        drifted = sorted(key for key in expected.keys() | stored.keys() if expected.get(key, 0) != stored.get(key, 0))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Dwell-time buckets match the status history.'))
+            return
+
+        for stage, bucket in drifted[:limit]:
+            key = (stage, bucket)
+            self.stdout.write(f"{stage} / bucket {bucket}: {stored.get(key, 0)} (expected {expected.get(key, 0)})")
+        raise CommandError(
+            f"{len(drifted)} dwell-time buckets have drifted; run rebuild_dwell_buckets to fix them."
+        )
@@ -0,0 +1,22 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/rebuild_search_index.py
+# Description: Rebuilds the full-text search index from the audit requests, remarks and documents.
+
+from django.core.management.base import BaseCommand
+
+from audit_management.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Recreates every search entry from the indexed models. The index is maintained on save; '
+        'run this after bulk loads that bypass model signals, or to repair it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Entries inserted per query.')
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} entries."))
@@ -0,0 +1,123 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/run_workers.py
+# Description: Runs a pool of background worker processes that drain the database job queue.
+
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from audit_management.jobs import claim_next, requeue_stale_jobs, run_job, run_pending_jobs
+
+
+def worker_loop(index, stop, poll_interval, burst):
+    """
+    Body of one worker process: claim and run jobs until told to stop, sleeping while the
+    queue is empty. In burst mode the worker exits as soon as the queue is empty.
+    """
+    # Never reuse database connections inherited from the parent across fork.
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The parent handles Ctrl-C and sets `stop`.
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    try:
+        while not stop.is_set():
+            job = claim_next(worker_id)
+            if job is None:
+                if burst:
+                    break
+                stop.wait(poll_interval)
+                continue
+            run_job(job)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs background workers that process the database job queue (post-upload document processing). '
+        'No external broker is needed; run one instance per host under a process supervisor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'AUDIT_JOB_WORKERS', 2),
+                            help='Worker processes to run. 0 runs jobs in this process (useful for debugging).')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds an idle worker waits before polling the queue again.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for new jobs.')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0:
+            raise CommandError('--processes must not be negative.')
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be positive.')
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} jobs abandoned by a previous worker.")
+
+        if options['processes'] == 0:
+            count = self.run_inline(options['poll_interval'], options['burst'])
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+        self.run_pool(options['processes'], options['poll_interval'], options['burst'])
+
+    def run_inline(self, poll_interval, burst):
+        count = 0
+        try:
+            while True:
+                count += run_pending_jobs()
+                if burst:
+                    return count
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            return count
+
+    def run_pool(self, processes, poll_interval, burst):
+        """
+        Starts `processes` workers and supervises them: a worker that dies is replaced,
+        abandoned jobs are requeued periodically, and SIGTERM/SIGINT stop every worker
+        after its current job.
+        """
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        connections.close_all()
+
+        def request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        def start(index):
+            process = context.Process(
+                target=worker_loop, args=(index, stop, poll_interval, burst), name=f"audit-worker-{index}",
+            )
+            process.start()
+            return process
+
+        workers = {index: start(index) for index in range(processes)}
+        self.stdout.write(f"Started {processes} workers (pids {', '.join(str(p.pid) for p in workers.values())}).")
+
+        last_requeue = time.monotonic()
+        while workers:
+            for index, process in list(workers.items()):
+                process.join(timeout=0.2)
+                if process.is_alive():
+                    continue
+                del workers[index]
+                if not stop.is_set() and not burst:
+                    self.stderr.write(f"Worker {index} exited with code {process.exitcode}; restarting it.")
+                    workers[index] = start(index)
+            if not burst and time.monotonic() - last_requeue > poll_interval * 60:
+                requeue_stale_jobs()
+                connections.close_all()
+                last_requeue = time.monotonic()
+
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
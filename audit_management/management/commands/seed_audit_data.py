@@ -0,0 +1,280 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/management/commands/seed_audit_data.py
+# Description: Generates a synthetic dataset of users, audit requests, remarks and documents for scale testing.
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from audit_management.dashboard import apply_deltas, request_deltas
+from audit_management.dwell import apply_dwell_deltas, dwell_deltas
+from audit_management.models import AuditRequest, AuditStatusEvent, Document, Remark
+from audit_management.search import index_bulk
+from users.models import CustomUser
+
+# How far along the workflow each status is; used to decide which roles have touched a request.
+WORKFLOW_STAGE = {
+    'Submitted_by_CSP': 0,
+    'Forwarded_to_STQC': 1,
+    'Audit_Completed_by_STQC': 2,
+    'Approved_by_ScientistF': 3,
+    'Rejected_by_ScientistF': 3,
+}
+
+DATA_CENTERS = ['Mumbai', 'Chennai', 'Hyderabad', 'Pune', 'Noida', 'Bengaluru', 'Kolkata', 'Delhi']
+ORGANIZATIONS = ['AWS', 'Azure', 'Google Cloud', 'Oracle Cloud', 'Yotta', 'CtrlS', 'Sify', 'NxtGen']
+PLACEHOLDER_COUNT = 8 # Documents share a small pool of placeholder files instead of one file per row
+
+
+@contextmanager
+def manual_timestamps(*fields):
+    """
+    Temporarily disables auto_now/auto_now_add on the given model fields so that
+    bulk_create keeps the backdated timestamps assigned by the generator.
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    try:
+        for field, _, _ in saved:
+            field.auto_now = field.auto_now_add = False
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates synthetic users, audit requests, status history, remarks and documents with batched bulk_create. '
+        'Pass --seed for a reproducible dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users to create across all roles.')
+        parser.add_argument('--requests', type=int, default=1000, help='Number of audit requests to create.')
+        parser.add_argument('--max-remarks', type=int, default=6, help='Maximum extra remarks per request.')
+        parser.add_argument('--max-documents', type=int, default=4, help='Maximum documents per request.')
+        parser.add_argument('--days', type=int, default=365, help='Spread request dates over this many past days.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create batch.')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a deterministic dataset.')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for generated users.')
+        parser.add_argument('--password', default='seedpass123', help='Password set on every generated user.')
+
+    def handle(self, *args, **options):
+        if options['users'] < len(CustomUser.ROLE_CHOICES):
+            raise CommandError(f"--users must be at least {len(CustomUser.ROLE_CHOICES)} (one per role).")
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+
+        users_by_role = self.create_users(options['users'], options['prefix'], options['password'])
+        self.stdout.write(f"Created {sum(len(ids) for ids in users_by_role.values())} users.")
+
+        placeholders = self.create_placeholder_files()
+
+        totals = {'requests': 0, 'events': 0, 'remarks': 0, 'documents': 0}
+        remaining = options['requests']
+        while remaining > 0:
+            count = min(self.batch_size, remaining)
+            created = self.create_request_batch(
+                count, users_by_role, placeholders,
+                options['days'], options['max_remarks'], options['max_documents'],
+            )
+            for key, value in created.items():
+                totals[key] += value
+            remaining -= count
+            self.stdout.write(f"  ... {totals['requests']} audit requests")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {totals['requests']} audit requests, {totals['events']} status changes, "
+            f"{totals['remarks']} remarks and {totals['documents']} documents."
+        ))
+
+    def create_users(self, total, prefix, password):
+        """
+        Creates `total` users: roughly 70% CSPs, the rest split between the reviewing roles,
+        with at least one user per role. Returns {role: [user ids]}.
+        """
+        roles = [role for role, _ in CustomUser.ROLE_CHOICES]
+        reviewer_roles = roles[1:]
+        assigned = list(roles)
+        for _ in range(total - len(roles)):
+            assigned.append('CSP' if self.rng.random() < 0.7 else self.rng.choice(reviewer_roles))
+
+        # Hashing is deliberately slow, so hash once and share the result.
+        password_hash = make_password(password)
+        users = []
+        for index, role in enumerate(assigned):
+            if role == 'CSP':
+                organization = self.rng.choice(ORGANIZATIONS)
+            else:
+                organization = {'MeitY_Reviewer': 'MeitY', 'STQC_Auditor': 'STQC', 'Scientist_F': 'MeitY'}[role]
+            users.append(CustomUser(
+                username=f"{prefix}_{role.lower()}_{index}",
+                email=f"{prefix}_{index}@example.com",
+                password=password_hash,
+                role=role,
+                organization=organization,
+            ))
+        CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+
+        usernames = [user.username for user in users]
+        users_by_role = {role: [] for role in roles}
+        for user_id, role in CustomUser.objects.filter(username__in=usernames).values_list('id', 'role'):
+            users_by_role[role].append(user_id)
+        for ids in users_by_role.values():
+            ids.sort() # Query order is not guaranteed; sort so choices are reproducible
+        return users_by_role
+
+    def create_placeholder_files(self):
+        """
+        Writes a small pool of placeholder files to the default storage and returns their names.
+        """
+        names = []
+        for index in range(PLACEHOLDER_COUNT):
+            name = f"audit_documents/seed/placeholder_{index}.pdf"
+            if not default_storage.exists(name):
+                content = b"%PDF-1.4\n% Synthetic placeholder document " + str(index).encode() + b"\n%%EOF\n"
+                name = default_storage.save(name, ContentFile(content))
+            names.append(name)
+        return names
+
+    def create_request_batch(self, count, users_by_role, placeholders, days, max_remarks, max_documents):
+        """
+        Creates one batch of audit requests and their history/remarks/documents inside a single transaction.
+        """
+        statuses = [status for status, _ in AuditRequest.STATUS_CHOICES]
+        requests, histories = [], []
+        for _ in range(count):
+            request_date = self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+            status = self.rng.choice(statuses)
+            last_updated = min(
+                self.now, request_date + timedelta(hours=self.rng.randint(1, 24 * 30) * (WORKFLOW_STAGE[status] + 1))
+            )
+            audit_request = AuditRequest(
+                csp_id=self.rng.choice(users_by_role['CSP']),
+                service_provider_name=f"{self.rng.choice(ORGANIZATIONS)} Cloud Services",
+                data_center_location=self.rng.choice(DATA_CENTERS),
+                request_date=request_date,
+                last_updated=last_updated,
+                status=status,
+                description=f"Synthetic audit request covering {self.rng.randint(1, 40)} hosted services.",
+            )
+            history = self.build_history(audit_request, users_by_role)
+            audit_request.status_changed_at = history[-1].created_at if history else request_date
+            requests.append(audit_request)
+            histories.append(history)
+
+        with transaction.atomic(), manual_timestamps(
+            AuditRequest._meta.get_field('request_date'),
+            AuditRequest._meta.get_field('last_updated'),
+            Remark._meta.get_field('timestamp'),
+            Document._meta.get_field('upload_date'),
+        ):
+            AuditRequest.objects.bulk_create(requests, batch_size=self.batch_size)
+
+            remarks, documents, events = [], [], []
+            for audit_request, history in zip(requests, histories):
+                remarks.extend(self.build_remarks(audit_request, history, users_by_role, max_remarks))
+                documents.extend(self.build_documents(audit_request, users_by_role, placeholders, max_documents))
+                events.extend(history)
+            AuditStatusEvent.objects.bulk_create(events, batch_size=self.batch_size)
+            Remark.objects.bulk_create(remarks, batch_size=self.batch_size)
+            Document.objects.bulk_create(documents, batch_size=self.batch_size)
+            # bulk_create skips the signals that maintain the activity counters, dashboard counts and search index,
+            # and the workflow code that maintains the dwell histograms.
+            AuditRequest.objects.filter(pk__in=[audit_request.pk for audit_request in requests]).rebuild_counters()
+            apply_deltas(request_deltas([
+                (audit_request.status, audit_request.data_center_location, audit_request.csp_id)
+                for audit_request in requests
+            ], 1))
+            apply_dwell_deltas(dwell_deltas((event.from_status, event.dwell) for event in events))
+            index_bulk('request', requests, self.batch_size)
+            index_bulk('remark', remarks, self.batch_size)
+            index_bulk('document', documents, self.batch_size)
+
+        return {
+            'requests': len(requests), 'events': len(events), 'remarks': len(remarks), 'documents': len(documents),
+        }
+
+    def random_time(self, audit_request):
+        span = (audit_request.last_updated - audit_request.request_date).total_seconds()
+        return audit_request.request_date + timedelta(seconds=self.rng.uniform(0, max(span, 0)))
+
+    def build_history(self, audit_request, users_by_role):
+        """
+        Builds the status events that brought a request to its status, oldest first, each
+        with the time spent in the status it left.
+        """
+        stage = WORKFLOW_STAGE[audit_request.status]
+        path = ['Submitted_by_CSP', 'Forwarded_to_STQC', 'Audit_Completed_by_STQC', audit_request.status]
+        actors = ['MeitY_Reviewer', 'STQC_Auditor', 'Scientist_F']
+        events, entered = [], audit_request.request_date
+        for step, changed_at in enumerate(sorted(self.random_time(audit_request) for _ in range(stage))):
+            events.append(AuditStatusEvent(
+                audit_request=audit_request, from_status=path[step], to_status=path[step + 1],
+                actor_id=self.rng.choice(users_by_role[actors[step]]),
+                created_at=changed_at, dwell=changed_at - entered,
+            ))
+            entered = changed_at
+        return events
+
+    def build_remarks(self, audit_request, history, users_by_role, max_remarks):
+        """
+        Builds the workflow remark for each status change in `history`, plus a few free-form comments.
+        """
+        remarks = [Remark(
+            audit_request=audit_request, author_id=audit_request.csp_id, timestamp=audit_request.request_date,
+            comment="Audit request submitted by CSP.",
+        )]
+        comments = [
+            "MeitY Reviewer forwarded request to STQC.",
+            "STQC Auditor marked audit as completed.",
+            f"Scientist F made final decision: '{audit_request.get_status_display()}'.",
+        ]
+        for event, comment in zip(history, comments):
+            remarks.append(Remark(
+                audit_request=audit_request, author_id=event.actor_id, timestamp=event.created_at, comment=comment,
+            ))
+
+        reviewer_roles = ['MeitY_Reviewer', 'STQC_Auditor', 'Scientist_F']
+        for _ in range(self.rng.randint(0, max_remarks)):
+            role = self.rng.choice(reviewer_roles)
+            remarks.append(Remark(
+                audit_request=audit_request, author_id=self.rng.choice(users_by_role[role]),
+                timestamp=self.random_time(audit_request),
+                comment=f"Reviewed controls for the {audit_request.data_center_location} site; "
+                        f"{self.rng.randint(0, 12)} observations noted.",
+            ))
+        return remarks
+
+    def build_documents(self, audit_request, users_by_role, placeholders, max_documents):
+        """
+        Builds CSP submissions for every request and an STQC audit report once the audit is complete.
+        """
+        documents = []
+        for _ in range(self.rng.randint(0, max_documents)):
+            documents.append(Document(
+                audit_request=audit_request, uploaded_by_id=audit_request.csp_id,
+                document_type=self.rng.choice(['CSP_Submission', 'Other']),
+                file=self.rng.choice(placeholders), upload_date=self.random_time(audit_request),
+                description='Synthetic supporting document.', processing_status='ready',
+            ))
+        if WORKFLOW_STAGE[audit_request.status] >= 2:
+            documents.append(Document(
+                audit_request=audit_request, uploaded_by_id=self.rng.choice(users_by_role['STQC_Auditor']),
+                document_type='Audit_Report', file=self.rng.choice(placeholders),
+                upload_date=self.random_time(audit_request), description='Synthetic STQC audit report.',
+                processing_status='ready', # bulk_create skips the signal that would queue processing
+            ))
+        return documents
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2025-08-04 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0003_remark_certificate_of_empanelment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditrequest',
+            name='certificate_of_empanelment',
+            field=models.FileField(blank=True, null=True, upload_to='certificates/'),
+        ),
+    ]
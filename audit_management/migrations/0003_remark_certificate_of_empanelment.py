@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2025-08-04 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remark',
+            name='certificate_of_empanelment',
+            field=models.FileField(blank=True, null=True, upload_to='certificates/'),
+        ),
+    ]
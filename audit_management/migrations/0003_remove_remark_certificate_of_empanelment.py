@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0003_auditrequest_certificate_of_empanelment'),
+    ]
+
+    operations = [
+        # The certificate belongs on the audit request; the remark column was never used.
+        migrations.RemoveField(
+            model_name='remark',
+            name='certificate_of_empanelment',
+        ),
+    ]
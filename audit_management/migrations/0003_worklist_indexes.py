@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0003_remove_remark_certificate_of_empanelment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditrequest',
+            index=models.Index(fields=['status', '-last_updated'], name='auditreq_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditrequest',
+            index=models.Index(fields=['csp', '-last_updated'], name='auditreq_csp_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditrequest',
+            index=models.Index(fields=['-last_updated'], name='auditreq_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditrequest',
+            index=models.Index(fields=['-request_date'], name='auditreq_requested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['audit_request', '-upload_date'], name='document_request_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remark',
+            index=models.Index(fields=['audit_request', 'timestamp'], name='remark_request_timestamp_idx'),
+        ),
+    ]
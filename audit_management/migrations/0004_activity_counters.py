@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def populate_counters(apps, schema_editor):
+    AuditRequest = apps.get_model('audit_management', 'AuditRequest')
+    Document = apps.get_model('audit_management', 'Document')
+    Remark = apps.get_model('audit_management', 'Remark')
+
+    def child_count(model):
+        rows = (
+            model.objects.filter(audit_request=OuterRef('pk'))
+            .order_by().values('audit_request').annotate(total=Count('pk')).values('total')
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    latest_remark = Subquery(
+        Remark.objects.filter(audit_request=OuterRef('pk')).order_by('-timestamp').values('timestamp')[:1]
+    )
+    latest_document = Subquery(
+        Document.objects.filter(audit_request=OuterRef('pk')).order_by('-upload_date').values('upload_date')[:1]
+    )
+    AuditRequest.objects.update(
+        document_count=child_count(Document),
+        remark_count=child_count(Remark),
+        last_activity_at=Greatest(Coalesce(latest_remark, latest_document), Coalesce(latest_document, latest_remark)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0003_worklist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditrequest',
+            name='document_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='auditrequest',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='auditrequest',
+            name='remark_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
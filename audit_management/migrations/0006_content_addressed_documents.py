@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:59
+
+import audit_management.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0005_upload_sessions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='original_filename',
+            field=models.CharField(blank=True, help_text='File name as uploaded', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file',
+            field=models.FileField(storage=audit_management.storage.document_storage, upload_to='audit_documents/'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['file'], name='document_file_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'audit_management_searchentry_fts'
+ENTRY_TABLE = 'audit_management_searchentry'
+
+# An external-content FTS5 table stores only the index; the text stays in SearchEntry and
+# triggers mirror every insert, update and delete into the index. Note that SQLite drops
+# these triggers if Django ever rebuilds the SearchEntry table in a later AlterField.
+SQLITE_FTS = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        text, content='{ENTRY_TABLE}', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+SQLITE_FTS_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+# Matches the expression SearchVector('text', config='english') generates, so searches use it.
+POSTGRES_FTS = [
+    f"""CREATE INDEX searchentry_text_fts_idx ON {ENTRY_TABLE}
+        USING GIN (to_tsvector('english'::regconfig, COALESCE(text, '')))""",
+]
+POSTGRES_FTS_DROP = ["DROP INDEX IF EXISTS searchentry_text_fts_idx"]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+def populate_search_index(apps, schema_editor):
+    AuditRequest = apps.get_model('audit_management', 'AuditRequest')
+    Document = apps.get_model('audit_management', 'Document')
+    Remark = apps.get_model('audit_management', 'Remark')
+    SearchEntry = apps.get_model('audit_management', 'SearchEntry')
+
+    def entries():
+        for audit_request in AuditRequest.objects.iterator():
+            text = ' '.join(filter(None, (
+                audit_request.service_provider_name, audit_request.data_center_location, audit_request.description,
+            )))
+            yield SearchEntry(kind='request', object_id=audit_request.pk, audit_request_id=audit_request.pk, text=text)
+        for remark in Remark.objects.iterator():
+            yield SearchEntry(
+                kind='remark', object_id=remark.pk, audit_request_id=remark.audit_request_id, text=remark.comment or '',
+            )
+        for document in Document.objects.iterator():
+            yield SearchEntry(
+                kind='document', object_id=document.pk, audit_request_id=document.audit_request_id,
+                text=document.description or '',
+            )
+
+    batch = []
+    for entry in entries():
+        batch.append(entry)
+        if len(batch) >= 2000:
+            SearchEntry.objects.bulk_create(batch)
+            batch = []
+    SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0008_document_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request', 'Audit Request'), ('remark', 'Remark'), ('document', 'Document')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('audit_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='audit_management.auditrequest')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='searchentry_kind_object_uniq')],
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FTS, 'postgresql': POSTGRES_FTS}),
+            run_for_vendor({'sqlite': SQLITE_FTS_DROP, 'postgresql': POSTGRES_FTS_DROP}),
+        ),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_status_changed_at(apps, schema_editor):
+    # Requests never moved entered their status on submission. For the rest the time of the
+    # last change was never recorded; last_updated is the closest bound available. No
+    # history is reconstructed, so stage analytics start from the first change after this.
+    AuditRequest = apps.get_model('audit_management', 'AuditRequest')
+    AuditRequest.objects.filter(status='Submitted_by_CSP').update(status_changed_at=F('request_date'))
+    AuditRequest.objects.exclude(status='Submitted_by_CSP').update(status_changed_at=F('last_updated'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('to_status', models.CharField(choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dwell', models.DurationField()),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='auditrequest',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(populate_status_changed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='auditrequest',
+            index=models.Index(fields=['status', 'status_changed_at'], name='auditreq_status_changed_idx'),
+        ),
+        migrations.AddField(
+            model_name='auditstatusevent',
+            name='actor',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='auditstatusevent',
+            name='audit_request',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='audit_management.auditrequest'),
+        ),
+        migrations.AddIndex(
+            model_name='auditstatusevent',
+            index=models.Index(fields=['audit_request', 'created_at'], name='statusevent_request_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditstatusevent',
+            index=models.Index(fields=['from_status', 'dwell'], name='statusevent_stage_dwell_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_dashboard_counts(apps, schema_editor):
+    # The same keys as dashboard.count_keys(), computed from the existing requests.
+    AuditRequest = apps.get_model('audit_management', 'AuditRequest')
+    DashboardCount = apps.get_model('audit_management', 'DashboardCount')
+    requests = AuditRequest.objects.order_by()
+    rows = [
+        DashboardCount(scope='all', status=row['status'], dimension='data_center',
+                       value=row['data_center_location'], count=row['total'])
+        for row in requests.values('status', 'data_center_location').annotate(total=Count('pk'))
+    ] + [
+        DashboardCount(scope='all', status=row['status'], dimension='csp', value=str(row['csp_id']), count=row['total'])
+        for row in requests.values('status', 'csp_id').annotate(total=Count('pk'))
+    ] + [
+        DashboardCount(scope=f"CSP:{row['csp_id']}", status=row['status'], dimension='data_center',
+                       value=row['data_center_location'], count=row['total'])
+        for row in requests.values('csp_id', 'status', 'data_center_location').annotate(total=Count('pk'))
+    ]
+    DashboardCount.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0010_status_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('dimension', models.CharField(choices=[('data_center', 'Data Center'), ('csp', 'CSP')], max_length=20)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'status', 'dimension', 'value'), name='dashboardcount_key_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_dashboard_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0011_dashboard_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request_created', 'Request Created'), ('status_changed', 'Status Changed'), ('remark_added', 'Remark Added'), ('document_added', 'Document Added')], max_length=20)),
+                ('status', models.CharField(choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('from_status', models.CharField(blank=True, choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('audit_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workflow_events', to='audit_management.auditrequest')),
+                ('csp', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
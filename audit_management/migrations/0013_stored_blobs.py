@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_blob_references(apps, schema_editor):
+    # One reference per document pointing at each stored file.
+    Document = apps.get_model('audit_management', 'Document')
+    StoredBlob = apps.get_model('audit_management', 'StoredBlob')
+    rows = Document.objects.exclude(file='').order_by().values('file').annotate(total=Count('pk'))
+    StoredBlob.objects.bulk_create(
+        [StoredBlob(name=row['file'], refcount=row['total']) for row in rows], batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0012_workflow_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_blob_references, migrations.RunPython.noop),
+    ]
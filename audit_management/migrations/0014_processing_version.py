@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0013_stored_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditrequest',
+            name='processing_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
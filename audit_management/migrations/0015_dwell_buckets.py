@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:32
+
+import math
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def populate_dwell_buckets(apps, schema_editor):
+    # The same buckets as dwell.dwell_bucket(), computed from the existing status history.
+    AuditStatusEvent = apps.get_model('audit_management', 'AuditStatusEvent')
+    DwellBucket = apps.get_model('audit_management', 'DwellBucket')
+    counts = Counter()
+    for stage, dwell in AuditStatusEvent.objects.order_by().values_list('from_status', 'dwell').iterator(chunk_size=2000):
+        seconds = dwell.total_seconds()
+        counts[stage, 0 if seconds < 1 else math.floor(math.log2(seconds) * 8) + 1] += 1
+    DwellBucket.objects.bulk_create(
+        [DwellBucket(stage=stage, bucket=bucket, count=count) for (stage, bucket), count in counts.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit_management', '0014_processing_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DwellBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('Submitted_by_CSP', 'Submitted by CSP'), ('Forwarded_to_STQC', 'Forwarded to STQC for Audit'), ('Audit_Completed_by_STQC', 'Audit Completed by STQC'), ('Approved_by_ScientistF', 'Approved by Scientist F'), ('Rejected_by_ScientistF', 'Rejected by Scientist F')], max_length=50)),
+                ('bucket', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('stage', 'bucket'), name='dwellbucket_key_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_dwell_buckets, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='auditstatusevent',
+            name='statusevent_stage_dwell_idx',
+        ),
+    ]
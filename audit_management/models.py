@@ -16,8 +16,16 @@
 # File: audit_management/models.py
 # Description: Django models for the audit management system.
 
-from django.db import models
+import os
+import uuid
+
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
+from django.utils import timezone
+
+from .storage import blob_sha256, document_storage, release_file
 
 # A list of choices for the status field on an AuditRequest.
 STATUS_CHOICES = (
@@ -28,6 +36,138 @@ STATUS_CHOICES = (
     ('Rejected_by_ScientistF', 'Rejected by Scientist F'), # Final rejection
 )
 
+class AuditRequestQuerySet(models.QuerySet):
+    """
+    Custom queryset for AuditRequest with reusable query shapes for list and detail views.
+    """
+
+    def for_user(self, user):
+        """
+        Restricts the queryset to the requests the user's role may list:
+        CSPs see their own, STQC Auditors see requests forwarded to STQC,
+        MeitY Reviewers and Scientist F see every request.
+        """
+        if user.role == 'CSP':
+            return self.filter(csp_id=user.pk)
+        if user.role == 'STQC_Auditor':
+            return self.filter(status='Forwarded_to_STQC')
+        if user.role in ('MeitY_Reviewer', 'Scientist_F'):
+            return self.all()
+        return self.none()
+
+    def with_summary(self):
+        """
+        Annotates each request with the latest remark timestamp and the CSP's
+        username/organization; document and remark counts are read from the
+        denormalized counter columns. A list page is served by a single query
+        instead of serializing every nested child row.
+        """
+        latest_remark = (
+            Remark.objects.filter(audit_request=OuterRef('pk'))
+            .order_by('-timestamp').values('timestamp')[:1]
+        )
+        return self.annotate(
+            csp_username=models.F('csp__username'),
+            csp_organization=models.F('csp__organization'),
+            latest_remark_at=Subquery(latest_remark),
+        )
+
+    def with_detail(self):
+        """
+        Loads the CSP, documents (with uploaders) and remarks (with authors) up front.
+        Rendering a request through the detail template or AuditRequestSerializer then
+        costs three queries no matter how many documents or remarks it has.
+        """
+        return self.select_related('csp').prefetch_related(
+            Prefetch('documents', queryset=Document.objects.select_related('uploaded_by')),
+            Prefetch('remarks', queryset=Remark.objects.select_related('author')),
+        )
+
+    def record_child_added(self, counter, at):
+        """
+        Increments `counter` ('document_count' or 'remark_count') and moves
+        last_activity_at forward to `at`, in one UPDATE evaluated by the database,
+        so concurrent uploads and remarks never lose an increment.
+        """
+        at = Value(at, output_field=models.DateTimeField())
+        return self.update(**{
+            counter: F(counter) + 1,
+            'last_activity_at': Greatest(Coalesce(F('last_activity_at'), at), at),
+        })
+
+    def record_child_removed(self, counter):
+        """
+        Decrements `counter` and recomputes last_activity_at from the remaining children,
+        since the removed row may have been the newest.
+        """
+        return self.update(**{
+            counter: F(counter) - 1,
+            'last_activity_at': latest_activity(),
+        })
+
+    def with_expected_counters(self):
+        """
+        Annotates the counter values recomputed from the child tables, as
+        expected_document_count, expected_remark_count and expected_last_activity_at.
+        """
+        return self.annotate(
+            expected_document_count=child_count(Document),
+            expected_remark_count=child_count(Remark),
+            expected_last_activity_at=latest_activity(),
+        )
+
+    def with_counter_drift(self):
+        """
+        Restricts the queryset to requests whose counter columns disagree with their child rows.
+        """
+        return self.with_expected_counters().exclude(
+            document_count=F('expected_document_count'),
+            remark_count=F('expected_remark_count'),
+            last_activity_at=F('expected_last_activity_at'),
+        ).exclude(
+            document_count=F('expected_document_count'),
+            remark_count=F('expected_remark_count'),
+            last_activity_at__isnull=True, expected_last_activity_at__isnull=True,
+        )
+
+    def rebuild_counters(self):
+        """
+        Recomputes the counter columns from the child tables in a single UPDATE.
+        Returns the number of requests updated.
+        """
+        return self.update(
+            document_count=child_count(Document),
+            remark_count=child_count(Remark),
+            last_activity_at=latest_activity(),
+        )
+
+
+def child_count(model):
+    """
+    Subquery counting the `model` rows (Document or Remark) of the outer audit request.
+    """
+    rows = (
+        model.objects.filter(audit_request=OuterRef('pk'))
+        .order_by().values('audit_request').annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def latest_activity():
+    """
+    Expression for the newest remark timestamp or document upload date of the outer
+    audit request, or NULL if it has neither.
+    """
+    latest_remark = Subquery(
+        Remark.objects.filter(audit_request=OuterRef('pk')).order_by('-timestamp').values('timestamp')[:1]
+    )
+    latest_document = Subquery(
+        Document.objects.filter(audit_request=OuterRef('pk')).order_by('-upload_date').values('upload_date')[:1]
+    )
+    # GREATEST returns NULL on SQLite if either side is NULL, so each side falls back to the other.
+    return Greatest(Coalesce(latest_remark, latest_document), Coalesce(latest_document, latest_remark))
+
+
 class AuditRequest(models.Model):
     """
     Represents an audit request submitted by a CSP.
@@ -53,6 +193,17 @@ class AuditRequest(models.Model):
     description = models.TextField(blank=True, null=True)
     last_updated = models.DateTimeField(auto_now=True)
 
+    # Denormalized activity counters, kept in step with the child rows by signals.py
+    # and rebuilt or checked by the `rebuild_activity_counters` management command.
+    document_count = models.PositiveIntegerField(default=0, editable=False)
+    remark_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # When the request entered its current status; the start of the next AuditStatusEvent's dwell.
+    status_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Bumped by the background worker when it changes a document's processing status, which the
+    # detail shows; part of the detail ETag, so the worker never touches the user-facing last_updated.
+    processing_version = models.PositiveIntegerField(default=0, editable=False)
+
     # Field to store the Certificate of Empanelment file
     certificate_of_empanelment = models.FileField(
         upload_to='certificates/',
@@ -60,11 +211,51 @@ class AuditRequest(models.Model):
         blank=True
     )
 
+    objects = AuditRequestQuerySet.as_manager()
+
+    # Written only through AuditRequestQuerySet's counter methods.
+    COUNTER_FIELDS = ('document_count', 'remark_count', 'last_activity_at')
+    # Written only by jobs.set_document_status().
+    JOB_FIELDS = ('processing_version',)
+    # Written only by workflow.py, in the same UPDATE that changes the status, so that every
+    # status change is checked, recorded in the history and counted on the dashboard.
+    WORKFLOW_FIELDS = ('status', 'status_changed_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save that moves the request to another data center can move its dashboard counts.
+        instance._loaded_location = dict(zip(field_names, values)).get('data_center_location')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Leaves the counter, job and workflow columns out of ordinary updates, so saving an instance
+        loaded earlier in the request cannot overwrite increments or a status change made
+        since by other requests.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS + self.JOB_FIELDS + self.WORKFLOW_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Audit Request for {self.service_provider_name} - {self.get_status_display()} (ID: {self.id})"
 
     class Meta:
         ordering = ['-request_date'] # Order by most recent requests first
+        indexes = [
+            # Role worklists: STQC/MeitY filter by status, CSPs by owner; the API orders by -last_updated.
+            models.Index(fields=['status', '-last_updated'], name='auditreq_status_updated_idx'),
+            models.Index(fields=['csp', '-last_updated'], name='auditreq_csp_updated_idx'),
+            # Unfiltered worklists (Scientist F, MeitY Reviewer) and the default ordering.
+            models.Index(fields=['-last_updated'], name='auditreq_updated_idx'),
+            models.Index(fields=['-request_date'], name='auditreq_requested_idx'),
+            # Longest-waiting request in each status (stage analytics).
+            models.Index(fields=['status', 'status_changed_at'], name='auditreq_status_changed_idx'),
+        ]
 
 
 class Document(models.Model):
@@ -81,15 +272,74 @@ class Document(models.Model):
     audit_request = models.ForeignKey(AuditRequest, on_delete=models.CASCADE, related_name='documents')
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPE_CHOICES)
-    file = models.FileField(upload_to='audit_documents/') # Files will be stored in MEDIA_ROOT/audit_documents/
+    # Files are stored once per unique content under MEDIA_ROOT/audit_documents/ab/cd/<sha256>.<ext>;
+    # identical uploads share a blob (see storage.py).
+    file = models.FileField(upload_to='audit_documents/', storage=document_storage)
     upload_date = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True, null=True)
+    original_filename = models.CharField(max_length=255, blank=True, help_text="File name as uploaded")
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+
+    # Post-upload processing runs in the background job queue (see jobs.py and tasks.py).
+    PROCESSING_STATUS_CHOICES = (
+        ('pending', 'Pending'), # Queued, or waiting to be retried
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'), # Gave up after the maximum number of attempts
+    )
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS_CHOICES, default='pending', editable=False)
+    content_type = models.CharField(max_length=100, blank=True, editable=False, help_text="MIME type detected from the file content")
+    # Set once a preview thumbnail has been rendered (see previews.py).
+    has_preview = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f"Document for Request {self.audit_request.id} - {self.get_document_type_display()} by {self.uploaded_by.username}"
 
+    def save(self, *args, **kwargs):
+        """
+        Commits a newly assigned file to storage before the row is written, so the
+        original file name and the content hash the blob is stored under are saved with it.
+        If the row then cannot be written, the blob reference the file took is dropped again.
+        """
+        if self.file and not self.file._committed:
+            self.original_filename = os.path.basename(self.file.name)[:255]
+            self.file.save(self.file.name, self.file.file, save=False) # Takes a reference to the blob
+            self.sha256 = blob_sha256(self.file.name)
+            try:
+                # A savepoint, so the reference can still be dropped if the row is not written.
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+            except Exception:
+                release_file(self.file)
+                raise
+            return
+        super().save(*args, **kwargs)
+
+    @property
+    def display_name(self):
+        return self.original_filename or os.path.basename(self.file.name)
+
     class Meta:
         ordering = ['-upload_date']
+        indexes = [
+            models.Index(fields=['audit_request', '-upload_date'], name='document_request_uploaded_idx'),
+            # Blob reference counting: how many documents still point at a stored file.
+            models.Index(fields=['file'], name='document_file_idx'),
+        ]
+
+
+class StoredBlob(models.Model):
+    """
+    Reference count of one content-addressed file: how many documents point at it, plus
+    uploads that have stored it but not yet written their document. Taking and dropping
+    references updates this row, so a re-upload of a blob and the delete of its last
+    document serialize on it instead of racing (see storage.py).
+    """
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.refcount}"
 
 
 class Remark(models.Model):
@@ -106,6 +356,233 @@ class Remark(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['audit_request', 'timestamp'], name='remark_request_timestamp_idx'),
+        ]
+
+
+class AuditStatusEvent(models.Model):
+    """
+    One status change of an audit request: who moved it, from where to where, and how long
+    it had waited in the status it left. Append-only; written by workflow.py in the same
+    transaction as the change itself, which also counts the dwell into DwellBucket (see
+    dwell.py and analytics.py for the time-in-stage figures).
+    """
+    audit_request = models.ForeignKey(AuditRequest, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    to_status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+    # Time spent in from_status: since the previous change, or since submission for the first one.
+    dwell = models.DurationField()
+
+    def __str__(self):
+        return f"Request {self.audit_request_id}: {self.from_status} -> {self.to_status} at {self.created_at}"
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # A request's history, oldest first.
+            models.Index(fields=['audit_request', 'created_at'], name='statusevent_request_idx'),
+        ]
+
+
+class DwellBucket(models.Model):
+    """
+    How many status events left one stage after a dwell time within one bucket of a
+    log-scale histogram (see dwell.py). Adjusted in the same transaction as every status
+    change, so the stage analytics read a few hundred rows however long the history grows.
+    """
+    stage = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    bucket = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.stage} / bucket {self.bucket}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stage', 'bucket'], name='dwellbucket_key_uniq'),
+        ]
+
+class WorkflowEvent(models.Model):
+    """
+    A change pushed to clients over the event stream (see stream.py): a request created or
+    moved to another status, or a remark or document added to it. Append-only; the id is
+    the SSE event id clients resume from with Last-Event-ID. The CSP and statuses are copied
+    onto the row so each connection's role filter needs no join. Rows older than
+    AUDIT_STREAM_RETENTION are removed by `manage.py purge_workflow_events`.
+    """
+    KIND_CHOICES = (
+        ('request_created', 'Request Created'),
+        ('status_changed', 'Status Changed'),
+        ('remark_added', 'Remark Added'),
+        ('document_added', 'Document Added'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    audit_request = models.ForeignKey(AuditRequest, on_delete=models.CASCADE, related_name='workflow_events')
+    csp = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES) # The request's status after the change
+    from_status = models.CharField(max_length=50, choices=STATUS_CHOICES, blank=True) # Set for status changes
+    object_id = models.PositiveIntegerField(null=True, blank=True) # The remark or document added
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} on Request {self.audit_request_id} ({self.pk})"
+
+    class Meta:
+        ordering = ['id']
+
+
+class DashboardCount(models.Model):
+    """
+    How many audit requests in one status share one attribute value, within one scope: 'all'
+    for every request, or 'CSP:<id>' for one CSP's own. The dimension is the data center or
+    the CSP (whose organization is looked up when read). Adjusted incrementally on every
+    create, transition and delete (see dashboard.py), so a dashboard reads a few rows
+    instead of grouping the whole AuditRequest table.
+    """
+    DIMENSION_CHOICES = (
+        ('data_center', 'Data Center'),
+        ('csp', 'CSP'),
+    )
+
+    scope = models.CharField(max_length=50)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.scope} / {self.status} / {self.dimension}={self.value}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'status', 'dimension', 'value'], name='dashboardcount_key_uniq'),
+        ]
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of one document. Chunks are written in place into a
+    partial file under MEDIA_ROOT (see uploads.py); completing the session moves that
+    file into storage and creates the Document.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    audit_request = models.ForeignKey(AuditRequest, on_delete=models.CASCADE, related_name='upload_sessions')
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    document_type = models.CharField(max_length=50, choices=Document.DOCUMENT_TYPE_CHOICES)
+    description = models.TextField(blank=True, null=True)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Optional SHA-256 of the whole file, checked on completion")
+    document = models.OneToOneField(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} for Request {self.audit_request_id} by {self.uploaded_by_id}"
+
+    @property
+    def total_chunks(self):
+        return -(-self.total_size // self.chunk_size)
+
+    def expected_chunk_size(self, index):
+        """
+        Every chunk is `chunk_size` bytes except the last, which holds the remainder.
+        """
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    class Meta:
+        indexes = [
+            # Garbage collection of stale sessions.
+            models.Index(fields=['updated_at'], name='uploadsession_updated_idx'),
+        ]
+
+
+class UploadChunk(models.Model):
+    """
+    Records a chunk of an UploadSession that was received and matched its checksum.
+    """
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Chunk {self.index} of upload {self.session_id}"
+
+    class Meta:
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='uploadchunk_session_index_uniq'),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work, stored in the database so no external broker is needed.
+    Workers started by `manage.py run_workers` claim queued jobs with a conditional UPDATE,
+    run the registered task and retry failures with exponential backoff (see jobs.py).
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.task}) - {self.get_status_display()}"
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Workers poll for the oldest due job in a given status.
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+
+class SearchEntry(models.Model):
+    """
+    The searchable text of one audit request, remark or document, tagged with the audit
+    request it belongs to so role filtering can join on it. Kept up to date by signals;
+    the backend's full-text index over `text` is defined in migration 0009 (see search.py).
+    """
+    KIND_CHOICES = (
+        ('request', 'Audit Request'),
+        ('remark', 'Remark'),
+        ('document', 'Document'),
+    )
+
+    audit_request = models.ForeignKey(AuditRequest, on_delete=models.CASCADE, related_name='search_entries')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    text = models.TextField()
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} on Request {self.audit_request_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchentry_kind_object_uniq'),
+        ]
+
 
 
 
@@ -0,0 +1,193 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/pagination.py
+# Description: Keyset (cursor) pagination for audit request lists.
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(position, reverse=False):
+    """
+    Encodes a (last_updated, id) position into an opaque, URL-safe cursor token.
+    """
+    last_updated, pk = position
+    payload = {'u': last_updated.isoformat(), 'i': pk}
+    if reverse:
+        payload['r'] = 1
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decodes a cursor token into ((last_updated, id), reverse).
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = (datetime.fromisoformat(payload['u']), int(payload['i']))
+        return position, bool(payload.get('r'))
+    except (TypeError, KeyError, ValueError, binascii.Error) as exc:
+        raise ValueError('Invalid cursor.') from exc
+
+
+def keyset_page_query(queryset, position=None, reverse=False, page_size=10):
+    """
+    Returns `queryset` ordered newest-first by last_updated (ties broken by ascending id,
+    which matches the implicit row order of the last_updated indexes), starting after
+    `position` and limited to one row more than a page, so the extra row tells whether
+    more exist in the direction of travel.
+
+    The position filter is written as `last_updated <= X AND (last_updated < X OR id > Y)`
+    so the database can seek straight into the last_updated index; page N costs the same
+    as page 1 and needs no COUNT(*).
+    """
+    if reverse:
+        queryset = queryset.order_by('last_updated', '-id')
+        if position is not None:
+            last_updated, pk = position
+            queryset = queryset.filter(
+                Q(last_updated__gte=last_updated) & (Q(last_updated__gt=last_updated) | Q(id__lt=pk))
+            )
+    else:
+        queryset = queryset.order_by('-last_updated', 'id')
+        if position is not None:
+            last_updated, pk = position
+            queryset = queryset.filter(
+                Q(last_updated__lte=last_updated) & (Q(last_updated__lt=last_updated) | Q(id__gt=pk))
+            )
+    return queryset[:page_size + 1]
+
+
+def keyset_page(rows, reverse, page_size):
+    """
+    Trims the rows read by keyset_page_query() to one page in display order and returns
+    (rows, has_more).
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+    return rows, has_more
+
+
+def paginate_by_keyset(queryset, position=None, reverse=False, page_size=10):
+    """
+    Returns one page of `queryset` starting after `position`, plus whether more rows
+    exist in the direction of travel (see keyset_page_query).
+    """
+    rows = list(keyset_page_query(queryset, position, reverse, page_size))
+    return keyset_page(rows, reverse, page_size)
+
+
+async def apaginate_by_keyset(queryset, position=None, reverse=False, page_size=10):
+    """
+    The async counterpart of paginate_by_keyset(), reading the page with the async ORM.
+    """
+    rows = [row async for row in keyset_page_query(queryset, position, reverse, page_size)]
+    return keyset_page(rows, reverse, page_size)
+
+
+class AuditRequestCursorPagination(BasePagination):
+    """
+    Keyset pagination over (last_updated, id), most recently updated first.
+    Cursors are opaque tokens; results stay stable while new requests arrive because
+    each page is anchored to the last row seen rather than to an offset.
+    """
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def read_position(self, request):
+        """
+        Returns (position, reverse) from the request's cursor, raising NotFound if it is malformed.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            return decode_cursor(token)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def set_page(self, rows, has_more, position, reverse):
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.first_position = (rows[0].last_updated, rows[0].id) if rows else position
+        self.last_position = (rows[-1].last_updated, rows[-1].id) if rows else position
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position, reverse = self.read_position(request)
+        page_size = self.get_page_size(request)
+        rows, has_more = paginate_by_keyset(queryset, position, reverse, page_size)
+        return self.set_page(rows, has_more, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        The async counterpart of paginate_queryset(), for the async list view.
+        """
+        position, reverse = self.read_position(request)
+        page_size = self.get_page_size(request)
+        rows, has_more = await apaginate_by_keyset(queryset, position, reverse, page_size)
+        return self.set_page(rows, has_more, position, reverse)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_cursor(self.last_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_position is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(self.first_position, reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,149 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/previews.py
+# Description: Renders document preview thumbnails into a size-bounded on-disk cache keyed by file hash.
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest edge of a thumbnail, in pixels.
+THUMBNAIL_SIZE = getattr(settings, 'AUDIT_THUMBNAIL_SIZE', 240)
+THUMBNAIL_QUALITY = 80
+# Total bytes the thumbnail cache may hold; the least recently used thumbnails are evicted beyond it.
+THUMBNAIL_CACHE_MAX_BYTES = getattr(settings, 'AUDIT_THUMBNAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+# Serving a thumbnail refreshes its modification time (the eviction order) at most this often (seconds).
+THUMBNAIL_TOUCH_INTERVAL = 60 * 60
+# Seconds allowed for rendering the first page of a PDF.
+PDF_RENDER_TIMEOUT = 30
+
+THUMBNAIL_DIR = 'thumbnails'
+TEMPORARY_SUFFIX = '.rendering'
+IMAGE_CONTENT_TYPES = {'image/jpeg', 'image/png'}
+# PDFs are rasterised with poppler's pdftoppm when it is installed; without it they get no preview.
+PDFTOPPM = shutil.which('pdftoppm')
+
+
+def can_preview(content_type):
+    return content_type in IMAGE_CONTENT_TYPES or (content_type == 'application/pdf' and PDFTOPPM is not None)
+
+
+def thumbnail_root():
+    return os.path.join(settings.MEDIA_ROOT, THUMBNAIL_DIR)
+
+
+def thumbnail_path(sha256):
+    """
+    Returns where the thumbnail for the file with this hash is cached. Identical files
+    share one thumbnail, and changing THUMBNAIL_SIZE starts a fresh set.
+    """
+    return os.path.join(thumbnail_root(), sha256[:2], f"{sha256}-{THUMBNAIL_SIZE}.jpg")
+
+
+def render_image(source, target):
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        # Lets the JPEG decoder downscale while decoding, so large scans are never decoded in full.
+        image.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.convert('RGB').save(target, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+
+
+def render_pdf(source_path, target):
+    prefix = os.path.splitext(target)[0]
+    subprocess.run(
+        [PDFTOPPM, '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(THUMBNAIL_SIZE),
+         '-jpeg', '-jpegopt', f'quality={THUMBNAIL_QUALITY}', source_path, prefix],
+        check=True, capture_output=True, timeout=PDF_RENDER_TIMEOUT,
+    )
+    os.replace(prefix + '.jpg', target)
+
+
+def render_thumbnail(document):
+    """
+    Renders `document`'s thumbnail into the cache unless it is already there. Returns True
+    if a thumbnail is available afterwards, False if the file cannot be previewed (an
+    unsupported type, or a damaged file). Runs in a background worker, never in a request.
+    """
+    if not document.sha256 or not can_preview(document.content_type):
+        return False
+    target = thumbnail_path(document.sha256)
+    if os.path.exists(target):
+        return True
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Render beside the target and rename it into place, so readers never see a partial file.
+    fd, temporary = tempfile.mkstemp(suffix=TEMPORARY_SUFFIX, dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        if document.content_type == 'application/pdf':
+            render_pdf(document.file.path, temporary)
+        else:
+            with document.file.open('rb') as source:
+                render_image(source, temporary)
+        os.replace(temporary, target)
+    except Exception as error:
+        # PIL and pdftoppm reject damaged or hostile files in many different ways; none is worth retrying.
+        logger.warning("Could not render a thumbnail for document %s: %s", document.pk, error)
+        return False
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    prune_thumbnails()
+    return True
+
+
+def touch_thumbnail(path):
+    """
+    Marks a cached thumbnail as recently used, so eviction takes the ones nobody looks at.
+    """
+    now = time.time()
+    if now - os.stat(path).st_mtime > THUMBNAIL_TOUCH_INTERVAL:
+        os.utime(path, (now, now))
+
+
+def prune_thumbnails(max_bytes=None):
+    """
+    Deletes the least recently used thumbnails until the cache fits in `max_bytes`
+    (THUMBNAIL_CACHE_MAX_BYTES by default). Returns the number of files removed.
+    """
+    max_bytes = THUMBNAIL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries, total = [], 0
+    for directory, _, filenames in os.walk(thumbnail_root()):
+        for filename in filenames:
+            if filename.endswith(TEMPORARY_SUFFIX):
+                continue # Still being rendered.
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,144 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/search.py
+# Description: Full-text search over audit requests, remarks and document descriptions.
+
+import re
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Q, Value
+
+from .models import AuditRequest, Document, Remark, SearchEntry
+
+# SQLite: an external-content FTS5 index over SearchEntry.text, kept in sync by triggers
+# (created in migration 0009). PostgreSQL: a GIN index over to_tsvector('english', text).
+FTS_TABLE = 'audit_management_searchentry_fts'
+SEARCH_CONFIG = 'english'
+
+# Most results a search returns, and the most query terms considered.
+MAX_RESULTS = 100
+MAX_TERMS = 16
+EXCERPT_LENGTH = 200
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def audit_request_text(audit_request):
+    return ' '.join(
+        part for part in (
+            audit_request.service_provider_name, audit_request.data_center_location, audit_request.description,
+        ) if part
+    )
+
+
+# kind -> (model, function returning the indexed text of an instance).
+INDEXED_MODELS = {
+    'request': (AuditRequest, audit_request_text),
+    'remark': (Remark, lambda remark: remark.comment or ''),
+    'document': (Document, lambda document: document.description or ''),
+}
+# AuditRequest fields whose saving changes its entry; saves limited to other fields skip the index.
+AUDIT_REQUEST_INDEXED_FIELDS = {'service_provider_name', 'data_center_location', 'description'}
+
+
+def build_entry(kind, instance):
+    """
+    Returns an unsaved SearchEntry for a request, remark or document.
+    """
+    _, text_for = INDEXED_MODELS[kind]
+    audit_request_id = instance.pk if kind == 'request' else instance.audit_request_id
+    return SearchEntry(kind=kind, object_id=instance.pk, audit_request_id=audit_request_id, text=text_for(instance))
+
+
+def index_instance(kind, instance, created):
+    """
+    Creates or refreshes the search entry for a saved instance. An unchanged text issues
+    an UPDATE that matches no row, so the full-text index is only touched on real edits.
+    """
+    entry = build_entry(kind, instance)
+    if created:
+        entry.save()
+    else:
+        SearchEntry.objects.filter(kind=kind, object_id=instance.pk).exclude(text=entry.text).update(text=entry.text)
+
+
+def unindex_instance(kind, pk):
+    SearchEntry.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def index_bulk(kind, instances, batch_size=2000):
+    """
+    Indexes objects created with bulk_create, which bypasses the signals that maintain the index.
+    """
+    instances, total = iter(instances), 0
+    while batch := [build_entry(kind, instance) for instance in islice(instances, batch_size)]:
+        total += len(SearchEntry.objects.bulk_create(batch))
+    return total
+
+
+def rebuild_search_index(batch_size=2000):
+    """
+    Rebuilds every search entry from the indexed models, to repair drift. Returns the
+    number of entries written.
+    """
+    total = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for kind, (model, _) in INDEXED_MODELS.items():
+            total += index_bulk(kind, model.objects.order_by('pk').iterator(chunk_size=batch_size), batch_size)
+    return total
+
+
+def query_terms(query):
+    return TERM_RE.findall(query)[:MAX_TERMS]
+
+
+def search(user, query, limit=20):
+    """
+    Returns up to `limit` SearchEntry rows matching every term of `query`, best match
+    first, restricted to the audit requests `user` may list. Matching, ranking and the
+    role filter run as one query against the backend's full-text index; the last term
+    also matches as a prefix on SQLite, so partial words find results while typing.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return SearchEntry.objects.none()
+    entries = (
+        SearchEntry.objects.filter(audit_request__in=AuditRequest.objects.for_user(user).values('pk'))
+        .select_related('audit_request')
+    )
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    if connection.vendor == 'sqlite':
+        # Each term is quoted, so FTS5 operators typed by the user are matched as plain words.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        entries = entries.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = audit_management_searchentry.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'rank': f'-{FTS_TABLE}.rank'}, # FTS5's bm25 rank is lower-is-better
+            order_by=['-rank', '-audit_management_searchentry.id'],
+        )
+    elif connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector('text', config=SEARCH_CONFIG)
+        tsquery = SearchQuery(' '.join(terms), config=SEARCH_CONFIG, search_type='plain')
+        entries = (
+            entries.annotate(search_vector=vector, rank=SearchRank(vector, tsquery))
+            .filter(search_vector=tsquery).order_by('-rank', '-pk')
+        )
+    else:
+        # No full-text index on this backend: match every term as a substring, newest first.
+        condition = Q()
+        for term in terms:
+            condition &= Q(text__icontains=term)
+        entries = entries.filter(condition).annotate(rank=Value(0.0)).order_by('-pk')
+    return entries[:limit]
+
+
+def excerpt(text):
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    return text[:EXCERPT_LENGTH].rsplit(' ', 1)[0] + '…'
@@ -7,8 +7,12 @@
 # audit_management/serializers.py
 
 
+from django.urls import reverse
 from rest_framework import serializers
-from .models import AuditRequest, Document, Remark
+from .models import AuditRequest, Document, Remark, SearchEntry, UploadSession
+from .search import excerpt
+from .workflow import MAX_BULK_TRANSITIONS
+from .uploads import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, MAX_CHUNKS, MAX_UPLOAD_SIZE
 from users.serializers import CustomUserSerializer # Import CustomUserSerializer
 
 class RemarkSerializer(serializers.ModelSerializer):
@@ -30,23 +34,39 @@ class DocumentSerializer(serializers.ModelSerializer):
     """
     uploaded_by = CustomUserSerializer(read_only=True) # Nested serializer for uploader details
     file_url = serializers.SerializerMethodField() # Custom field to get full URL
+    thumbnail_url = serializers.SerializerMethodField() # Preview image, once one has been rendered
 
     class Meta:
         model = Document
-        fields = ['id', 'audit_request', 'uploaded_by', 'document_type', 'file', 'file_url', 'upload_date', 'description']
-        read_only_fields = ['id', 'audit_request', 'uploaded_by', 'upload_date', 'file_url'] # These are set by the view
+        fields = [
+            'id', 'audit_request', 'uploaded_by', 'document_type', 'file', 'file_url', 'original_filename',
+            'sha256', 'content_type', 'processing_status', 'thumbnail_url', 'upload_date', 'description'
+        ]
+        read_only_fields = [
+            'id', 'audit_request', 'uploaded_by', 'upload_date', 'file_url', 'original_filename', 'sha256',
+            'content_type', 'processing_status', 'thumbnail_url'
+        ] # These are set by the view
 
     def get_file_url(self, obj):
         """
-        Returns the absolute URL for the uploaded file.
+        Returns the absolute URL of the permission-checked download endpoint for the file.
         """
         if obj.file:
-            request = self.context.get('request')
-            if request is not None:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
+            return self.absolute_url('api_document_download', obj.pk)
         return None
 
+    def get_thumbnail_url(self, obj):
+        if obj.has_preview:
+            return self.absolute_url('api_document_thumbnail', obj.pk)
+        return None
+
+    def absolute_url(self, name, pk):
+        url = reverse(name, kwargs={'pk': pk})
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
 class AuditRequestSerializer(serializers.ModelSerializer):
     """
     Serializer for the AuditRequest model.
@@ -69,6 +89,86 @@ class AuditRequestSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'csp', 'request_date', 'status', 'status_display', 'last_updated', 'documents', 'remarks']
 
+class AuditRequestSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact serializer for listing audit requests.
+    Reads the denormalized counters and the CSP details annotated by
+    `AuditRequest.objects.with_summary()` instead of nesting every document and remark,
+    so a page costs a single query.
+    """
+    csp_username = serializers.CharField(read_only=True)
+    csp_organization = serializers.CharField(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    latest_remark_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = AuditRequest
+        fields = [
+            'id', 'csp', 'csp_username', 'csp_organization', 'service_provider_name',
+            'data_center_location', 'request_date', 'status', 'status_display', 'last_updated',
+            'document_count', 'remark_count', 'last_activity_at', 'latest_remark_at'
+        ]
+        read_only_fields = fields
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """
+    Serializer for one full-text search hit: the matching request, remark or document,
+    the audit request it belongs to and an excerpt of the matched text.
+    """
+    service_provider_name = serializers.CharField(source='audit_request.service_provider_name', read_only=True)
+    status = serializers.CharField(source='audit_request.status', read_only=True)
+    status_display = serializers.CharField(source='audit_request.get_status_display', read_only=True)
+    excerpt = serializers.SerializerMethodField()
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SearchEntry
+        fields = ['audit_request', 'service_provider_name', 'status', 'status_display', 'kind', 'object_id', 'excerpt', 'rank']
+        read_only_fields = fields
+
+    def get_excerpt(self, obj):
+        return excerpt(obj.text)
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for resumable upload sessions.
+    On create the client declares the file; on read it gets back which chunks
+    have been received, so an interrupted upload resumes with only the missing ones.
+    """
+    chunk_size = serializers.IntegerField(min_value=1, max_value=MAX_CHUNK_SIZE, default=DEFAULT_CHUNK_SIZE)
+    total_size = serializers.IntegerField(min_value=1, max_value=MAX_UPLOAD_SIZE)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'audit_request', 'document_type', 'description', 'filename', 'total_size', 'chunk_size',
+            'sha256', 'total_chunks', 'received_chunks', 'document', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'audit_request', 'document', 'created_at', 'updated_at'] # These are set by the view
+
+    def get_received_chunks(self, obj):
+        return list(obj.chunks.order_by('index').values_list('index', flat=True))
+
+    def validate_filename(self, value):
+        # Keep only the final path component of whatever the client sent.
+        name = value.replace('\\', '/').rsplit('/', 1)[-1].strip()
+        if not name or name in ('.', '..'):
+            raise serializers.ValidationError("A file name is required.")
+        return name
+
+    def validate_sha256(self, value):
+        return value.lower()
+
+    def validate(self, attrs):
+        if -(-attrs['total_size'] // attrs['chunk_size']) > MAX_CHUNKS:
+            raise serializers.ValidationError(
+                {'chunk_size': f"Use a chunk size that splits the file into at most {MAX_CHUNKS} chunks."}
+            )
+        return attrs
+
 class AuditRequestStatusUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer specifically for updating the status of an AuditRequest.
@@ -77,6 +177,18 @@ class AuditRequestStatusUpdateSerializer(serializers.ModelSerializer):
         model = AuditRequest
         fields = ['status']
 
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for a bulk status transition: the target status and the requests to move.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_BULK_TRANSITIONS,
+    )
+    status = serializers.ChoiceField(choices=AuditRequest.STATUS_CHOICES)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value)) # Drop repeats, keep the caller's order
+
 class AuditRequestStatusUpdateWithCertificateSerializer(AuditRequestStatusUpdateSerializer):
     # We extend the base serializer to add the certificate field,
     # which is required specifically for the Scientist F approval.
@@ -0,0 +1,192 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/signals.py
+# Description: Signal handlers that keep derived data (worklist caches, activity counters, dashboard counts,
+#              dwell histograms, the search index, the event stream log) and stored files in sync with the audit
+#              models, and queue background processing for new documents.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .dashboard import apply_deltas, request_deltas
+from .dwell import apply_dwell_deltas, dwell_deltas
+from .jobs import enqueue
+from .models import AuditRequest, Document, Remark, UploadSession
+from .search import AUDIT_REQUEST_INDEXED_FIELDS, index_instance, unindex_instance
+from .storage import release_file
+from .stream import record
+from .uploads import remove_partial_file
+
+# The counter column on AuditRequest maintained for each child model, and the child's timestamp field.
+ACTIVITY_COUNTERS = {
+    Document: ('document_count', 'upload_date'),
+    Remark: ('remark_count', 'timestamp'),
+}
+
+
+@receiver(post_save, sender=AuditRequest)
+@receiver(post_delete, sender=AuditRequest)
+@receiver(post_save, sender=Remark)
+@receiver(post_delete, sender=Remark)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def invalidate_worklists(sender, **kwargs):
+    """
+    Bumps the worklist cache version on any change to a request or its children.
+    Bumped again on commit so a reader that cached the pre-commit state in between
+    cannot keep serving it.
+    """
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=Remark)
+@receiver(post_save, sender=Document)
+def count_child_added(sender, instance, created, raw=False, **kwargs):
+    """
+    Increments the parent request's counter when a remark or document is created.
+    """
+    if not created or raw:
+        return
+    counter, timestamp_field = ACTIVITY_COUNTERS[sender]
+    AuditRequest.objects.filter(pk=instance.audit_request_id).record_child_added(
+        counter, getattr(instance, timestamp_field),
+    )
+
+
+@receiver(post_delete, sender=Remark)
+@receiver(post_delete, sender=Document)
+def count_child_removed(sender, instance, origin=None, **kwargs):
+    """
+    Decrements the parent request's counter when a remark or document is deleted.
+    Skipped when the delete cascades from the request itself.
+    """
+    if isinstance(origin, AuditRequest) or getattr(origin, 'model', None) is AuditRequest:
+        return
+    counter, _ = ACTIVITY_COUNTERS[sender]
+    AuditRequest.objects.filter(pk=instance.audit_request_id).record_child_removed(counter)
+
+
+@receiver(post_save, sender=AuditRequest)
+def count_request_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Adds a new request to the dashboard counts, or moves its counts when a save changes its
+    data center. Status changes are counted by workflow.py, which makes them.
+    """
+    if raw:
+        return
+    previous_location = getattr(instance, '_loaded_location', None)
+    instance._loaded_location = instance.data_center_location
+    if created:
+        apply_deltas(request_deltas([(instance.status, instance.data_center_location, instance.csp_id)], 1))
+    elif previous_location not in (None, instance.data_center_location) and (
+        update_fields is None or 'data_center_location' in update_fields
+    ):
+        # The status is read back because ordinary saves never write it (see AuditRequest.save).
+        status = AuditRequest.objects.filter(pk=instance.pk).values_list('status', flat=True).get()
+        deltas = request_deltas([(status, previous_location, instance.csp_id)], -1)
+        deltas.update(request_deltas([(status, instance.data_center_location, instance.csp_id)], 1))
+        apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=AuditRequest)
+def count_request_deleted(sender, instance, **kwargs):
+    """
+    Removes a deleted request from the dashboard counts.
+    """
+    apply_deltas(request_deltas([(instance.status, instance.data_center_location, instance.csp_id)], -1))
+
+
+
+@receiver(pre_delete, sender=AuditRequest)
+def uncount_request_dwell(sender, instance, **kwargs):
+    """
+    Takes a deleted request's status history out of the dwell histograms. Read before the
+    delete cascades to its AuditStatusEvent rows, in the same transaction.
+    """
+    deltas = dwell_deltas(instance.status_events.values_list('from_status', 'dwell'))
+    apply_dwell_deltas({key: -count for key, count in deltas.items()})
+
+# The search entry kind stored for each indexed model.
+SEARCH_KINDS = {AuditRequest: 'request', Remark: 'remark', Document: 'document'}
+
+
+@receiver(post_save, sender=AuditRequest)
+@receiver(post_save, sender=Remark)
+@receiver(post_save, sender=Document)
+def update_search_index(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Creates or refreshes the saved object's search entry. Saves limited to fields that are
+    not indexed (e.g. a status change) leave the index alone.
+    """
+    if raw:
+        return
+    if sender is AuditRequest and update_fields and not AUDIT_REQUEST_INDEXED_FIELDS & set(update_fields):
+        return
+    index_instance(SEARCH_KINDS[sender], instance, created)
+
+
+@receiver(post_delete, sender=Remark)
+@receiver(post_delete, sender=Document)
+def remove_from_search_index(sender, instance, origin=None, **kwargs):
+    """
+    Deletes a removed remark's or document's search entry. A request's own entries are
+    deleted with it by the foreign key cascade, so cascaded child deletes are skipped.
+    """
+    if isinstance(origin, AuditRequest) or getattr(origin, 'model', None) is AuditRequest:
+        return
+    unindex_instance(SEARCH_KINDS[sender], instance.pk)
+
+
+# The event streamed to clients when each model is created.
+STREAM_KINDS = {AuditRequest: 'request_created', Remark: 'remark_added', Document: 'document_added'}
+
+
+@receiver(post_save, sender=AuditRequest)
+@receiver(post_save, sender=Remark)
+@receiver(post_save, sender=Document)
+def stream_created(sender, instance, created, raw=False, **kwargs):
+    """
+    Logs a new request, remark or document for the event stream, in the same transaction.
+    Status changes are logged by workflow.py, which makes them.
+    """
+    if not created or raw:
+        return
+    if sender is AuditRequest:
+        record(STREAM_KINDS[sender], instance).save()
+    else:
+        record(STREAM_KINDS[sender], instance.audit_request, object_id=instance.pk).save()
+
+
+@receiver(post_delete, sender=UploadSession)
+def discard_partial_upload(sender, instance, **kwargs):
+    """
+    Removes a session's partial file once its deletion commits, whether the session was
+    abandoned, purged as stale or deleted along with its audit request.
+    """
+    transaction.on_commit(lambda: remove_partial_file(instance))
+
+
+@receiver(post_delete, sender=Document)
+def release_document_file(sender, instance, **kwargs):
+    """
+    Drops the document's reference to its stored file, and deletes the file once no
+    reference remains. Identical uploads share one content-addressed blob (see storage.py),
+    so the file may outlive the row. The reference is dropped in this transaction and the
+    file deleted after commit, so a rolled-back delete never loses a file.
+    """
+    if instance.file.name:
+        release_file(instance.file)
+
+
+@receiver(post_save, sender=Document)
+def queue_document_processing(sender, instance, created, raw=False, **kwargs):
+    """
+    Queues post-upload processing for a new document, so the upload request only has to
+    receive and store the bytes. The job row is written in the same transaction as the
+    document, so workers never see a job for an upload that rolled back.
+    """
+    if created and not raw:
+        enqueue('process_document', document=instance)
@@ -0,0 +1,149 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/storage.py
+# Description: Content-addressed file storage that keeps one copy of each unique document.
+
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def content_sha256(content):
+    """
+    Returns the SHA-256 hex digest of a File, reading it in chunks so large uploads
+    are never held in memory. Uses a digest already computed upstream if the File carries one.
+    """
+    if getattr(content, 'sha256', None):
+        return content.sha256
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(directory, digest, original_name):
+    """
+    Builds the fan-out path for a blob: <directory>/ab/cd/<sha256><.ext>.
+    The (lower-cased) extension is kept so media servers still send the right content type.
+    """
+    extension = os.path.splitext(original_name)[1].lower()[:10]
+    return posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+
+
+def blob_sha256(name):
+    """
+    Returns the content hash encoded in a blob name, or '' for files stored before
+    content addressing was introduced.
+    """
+    digest = os.path.splitext(posixpath.basename(name))[0]
+    if len(digest) == 64 and all(char in '0123456789abcdef' for char in digest):
+        return digest
+    return ''
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names each file by the SHA-256 of its content, so uploading a
+    file that is already stored writes nothing and returns the existing name.
+    Blobs are shared between Document rows and reference-counted in StoredBlob: saving
+    takes a reference, deleting a document (or failing to write it, see Document.save)
+    drops one, and the file is removed when none remain.
+    """
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        target = blob_name(directory, content_sha256(content), name)
+        # The reference is taken before the existence check (and, inside a transaction, holds
+        # the row's lock until commit), so delete_unreferenced() of the same blob cannot remove
+        # the file after the check: it either ran first or sees the reference.
+        acquire_blob(target)
+        try:
+            if self.exists(target):
+                # Nothing to write. Storing a temporary upload file moves it into place, so one
+                # that is not needed is removed here rather than left behind.
+                discard_temporary_file(content)
+                return target
+            saved = super()._save(target, content)
+        except Exception:
+            release_blob(target)
+            raise
+        if saved != target:
+            # An identical file was stored concurrently; keep that one.
+            self.delete(saved)
+        return target
+
+    def delete_unreferenced(self, name):
+        """
+        Deletes blob `name` if no reference to it remains. Called once a document's delete
+        commits; the row is deleted first and the file removed before that commits, so an
+        upload taking a new reference either comes first (and the row survives) or waits,
+        creates a fresh row and writes the file again.
+        """
+        from .models import Document, StoredBlob # models imports this module
+
+        with transaction.atomic():
+            if StoredBlob.objects.filter(name=name, refcount__lte=0).delete()[0]:
+                self.delete(name)
+            elif not StoredBlob.objects.filter(name=name).exists() and not Document.objects.filter(file=name).exists():
+                # A file assigned to a document by name, never saved through this storage.
+                self.delete(name)
+
+
+def discard_temporary_file(content):
+    """
+    Removes the file behind a temporary upload (Django's TemporaryUploadedFile, or an
+    assembled chunked upload) whose content turned out to be stored already.
+    """
+    if hasattr(content, 'temporary_file_path'):
+        try:
+            os.remove(content.temporary_file_path())
+        except FileNotFoundError:
+            pass
+
+
+def acquire_blob(name):
+    """
+    Counts one more reference to the blob `name`, creating its StoredBlob row if needed.
+    """
+    from .models import StoredBlob # models imports this module
+
+    # If the row is deleted between the insert and the update, the update finds nothing and
+    # the row is inserted again; a row inserted concurrently by an identical upload is kept.
+    while not StoredBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+        StoredBlob.objects.bulk_create([StoredBlob(name=name, refcount=0)], ignore_conflicts=True)
+
+
+def release_blob(name):
+    """
+    Counts one less reference to the blob `name`. Its file is deleted afterwards, by
+    delete_unreferenced(), once the caller's transaction commits.
+    """
+    from .models import StoredBlob # models imports this module
+
+    StoredBlob.objects.filter(name=name).update(refcount=F('refcount') - 1)
+
+
+def release_file(field_file):
+    """
+    Drops one reference to a document's stored file, and deletes the file once the caller's
+    transaction commits if that was the last one. Deleting the file only after commit means
+    a rolled-back release never loses it.
+    """
+    name, storage = field_file.name, field_file.storage
+    release_blob(name)
+    transaction.on_commit(lambda: storage.delete_unreferenced(name))
+
+
+def document_storage():
+    """
+    Storage used by Document.file (a callable so migrations do not capture MEDIA_ROOT).
+    """
+    return ContentAddressedStorage()
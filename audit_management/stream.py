@@ -0,0 +1,242 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/stream.py
+# Description: Server-Sent Events for workflow changes: the WorkflowEvent log, role filtering and a per-process
+#              hub that polls the log once for every open connection.
+
+import asyncio
+import json
+import logging
+import time
+import weakref
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from .models import WorkflowEvent
+
+logger = logging.getLogger(__name__)
+
+# Seconds between the hub's reads of new events (one query per process, however many clients).
+POLL_INTERVAL = getattr(settings, 'AUDIT_STREAM_POLL_INTERVAL', 1.0)
+# Seconds of silence after which a comment line is sent, so proxies keep idle connections open.
+HEARTBEAT_INTERVAL = getattr(settings, 'AUDIT_STREAM_HEARTBEAT', 20)
+# Seconds events are kept for clients to resume from (deleted by `manage.py purge_workflow_events`).
+RETENTION = getattr(settings, 'AUDIT_STREAM_RETENTION', 7 * 24 * 60 * 60)
+# Most missed events replayed to a client resuming with Last-Event-ID; one further behind is sent a
+# 'resync' event instead.
+BACKLOG_LIMIT = getattr(settings, 'AUDIT_STREAM_BACKLOG_LIMIT', 1000)
+# Milliseconds a disconnected EventSource waits before reconnecting.
+RETRY_MS = 3000
+# Batches a slow client may fall behind by before it is disconnected (it resumes from its last id).
+QUEUE_SIZE = 100
+# Seconds an id gap (an insert not yet committed, or rolled back) holds back later events.
+GAP_TIMEOUT = 10
+POLL_BATCH = 500
+
+
+def record(kind, audit_request, **fields):
+    """
+    Returns an unsaved WorkflowEvent for a change to `audit_request`.
+    """
+    return WorkflowEvent(
+        kind=kind, audit_request_id=audit_request.pk, csp_id=audit_request.csp_id,
+        status=audit_request.status, **fields,
+    )
+
+
+def visible_events(user):
+    """
+    Restricts WorkflowEvent rows to the changes `user`'s role may see, mirroring
+    AuditRequest.objects.for_user: STQC Auditors see requests arriving in and leaving
+    'Forwarded_to_STQC', CSPs their own requests, MeitY Reviewers and Scientist F everything.
+    """
+    events = WorkflowEvent.objects.all()
+    if user.role == 'CSP':
+        return events.filter(csp_id=user.pk)
+    if user.role == 'STQC_Auditor':
+        return events.filter(Q(status='Forwarded_to_STQC') | Q(from_status='Forwarded_to_STQC'))
+    if user.role in ('MeitY_Reviewer', 'Scientist_F'):
+        return events
+    return events.none()
+
+
+def is_visible(user, event):
+    """
+    The in-memory equivalent of visible_events(), for events the hub has already read.
+    """
+    if user.role == 'CSP':
+        return event.csp_id == user.pk
+    if user.role == 'STQC_Auditor':
+        return 'Forwarded_to_STQC' in (event.status, event.from_status)
+    return user.role in ('MeitY_Reviewer', 'Scientist_F')
+
+
+def format_event(event):
+    data = {
+        'id': event.pk,
+        'type': event.kind,
+        'audit_request': event.audit_request_id,
+        'status': event.status,
+        'from_status': event.from_status or None,
+        'object_id': event.object_id,
+        'at': event.created_at.isoformat(),
+    }
+    return f"id: {event.pk}\nevent: {event.kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_resync(latest):
+    """
+    Tells a client that missed more than BACKLOG_LIMIT events to reload its lists instead:
+    they are not replayed, and its Last-Event-ID moves to `latest` so it resumes from there.
+    """
+    return f"id: {latest}\nevent: resync\ndata: {json.dumps({'id': latest, 'type': 'resync'})}\n\n"
+
+
+class EventHub:
+    """
+    Reads new WorkflowEvent rows once per POLL_INTERVAL and hands each batch to every
+    subscribed connection's queue. It runs as a task on the server's event loop while at
+    least one connection is open, so idle clients cost a queue each, not a thread or a query.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+        self.cursor = None # Every event up to here has been delivered.
+        self.high = None # The highest id read so far.
+        self.delivered = {} # id -> time, for events delivered past a gap in the ids
+        self.gap_since = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def run(self):
+        if self.cursor is None:
+            self.cursor = self.high = (await WorkflowEvent.objects.aaggregate(latest=Max('pk')))['latest'] or 0
+        while self.subscribers:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Reading workflow events failed; retrying.")
+            await asyncio.sleep(POLL_INTERVAL)
+        # Restarted by the next connection from the then-latest event, not from here.
+        self.cursor, self.high, self.delivered, self.gap_since = None, None, {}, None
+
+    async def poll(self):
+        """
+        Reads the next batch of events after the highest id read so far, plus any that have
+        appeared in the gaps below it since, so a burst behind an uncommitted id keeps
+        flowing while the gap stays open.
+        """
+        events = [event async for event in WorkflowEvent.objects.filter(pk__gt=self.high).order_by('pk')[:POLL_BATCH]]
+        missing = self.missing_ids()
+        if missing:
+            events = [event async for event in WorkflowEvent.objects.filter(pk__in=missing).order_by('pk')] + events
+        if events:
+            self.high = max(self.high, events[-1].pk)
+            self.publish(events)
+        self.advance([event.pk for event in events])
+
+    def missing_ids(self):
+        """
+        Returns (up to POLL_BATCH of) the ids between the cursor and the highest id read that
+        have not been delivered: inserts not committed yet, or rolled back.
+        """
+        missing = []
+        for pk in range(self.cursor + 1, self.high):
+            if pk not in self.delivered:
+                missing.append(pk)
+                if len(missing) == POLL_BATCH:
+                    break
+        return missing
+
+    def publish(self, events):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                # Too far behind: disconnect it, and it will resume from its Last-Event-ID.
+                self.subscribers.discard(queue)
+
+    def advance(self, ids):
+        """
+        Moves the cursor past every contiguously delivered id, and no further. Ids are
+        assigned before commit, so a gap may be an insert still in flight; later events are
+        delivered meanwhile and remembered, and a gap open for GAP_TIMEOUT is treated as a
+        rollback.
+        """
+        now = time.monotonic()
+        for pk in ids:
+            self.delivered[pk] = now
+        while self.cursor + 1 in self.delivered:
+            self.cursor += 1
+            del self.delivered[self.cursor]
+        if not self.delivered:
+            self.gap_since = None
+        elif self.gap_since is None:
+            self.gap_since = now
+        elif now - self.gap_since > GAP_TIMEOUT:
+            self.cursor = min(self.delivered) - 1
+            self.gap_since = None
+            self.advance([])
+
+
+# One hub per event loop: servers run one loop per process, tests may start several.
+hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    loop = asyncio.get_running_loop()
+    if loop not in hubs:
+        hubs[loop] = EventHub()
+    return hubs[loop]
+
+
+async def event_stream(user, last_event_id=None):
+    """
+    Yields the Server-Sent Events for `user`: the visible events after `last_event_id`
+    (when resuming; a 'resync' event if there are more than BACKLOG_LIMIT of them), then each new visible event as the hub reads it, with a heartbeat
+    comment whenever the stream has been quiet for HEARTBEAT_INTERVAL.
+    """
+    hub = get_hub()
+    # Subscribed before reading the backlog, so nothing committed in between is missed;
+    # events in both are sent once.
+    queue = hub.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        replayed = set()
+        if last_event_id is not None:
+            backlog = visible_events(user).filter(pk__gt=last_event_id).order_by('pk')[:BACKLOG_LIMIT + 1]
+            backlog = [event async for event in backlog]
+            if len(backlog) > BACKLOG_LIMIT:
+                # Too far behind to replay without skipping some: the client reloads instead,
+                # and only events after the latest one now are sent to it.
+                last_event_id = (await WorkflowEvent.objects.aaggregate(latest=Max('pk')))['latest']
+                yield format_resync(last_event_id)
+                backlog = []
+            for event in backlog:
+                replayed.add(event.pk)
+                yield format_event(event)
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                if queue not in hub.subscribers:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                if event.pk not in replayed and event.pk > (last_event_id or 0) and is_visible(user, event):
+                    yield format_event(event)
+            if queue not in hub.subscribers:
+                return
+    finally:
+        hub.unsubscribe(queue)
@@ -0,0 +1,64 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/tasks.py
+# Description: Background tasks run by the job queue after a document is uploaded.
+
+import mimetypes
+
+from .jobs import task
+from .models import Document
+from .previews import render_thumbnail
+
+# Leading bytes of the formats audit documents usually arrive in.
+MAGIC_NUMBERS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'), # Legacy .doc/.xls
+)
+
+
+def sniff_content_type(head, filename):
+    """
+    Returns the MIME type indicated by a file's first bytes, falling back to its name.
+    Office documents are ZIP containers, so the name decides between them.
+    """
+    guessed = mimetypes.guess_type(filename)[0]
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            if content_type in ('application/zip', 'application/x-ole-storage') and guessed:
+                return guessed
+            return content_type
+    return guessed or 'application/octet-stream'
+
+
+@task('process_document')
+def process_document(job):
+    """
+    Post-upload processing for one document. Runs in a worker, off the upload request.
+    """
+    document = Document.objects.filter(pk=job.document_id).first()
+    if document is None:
+        return # Deleted before the job ran; nothing to do.
+    with document.file.open('rb') as fh:
+        head = fh.read(2048)
+    document.content_type = sniff_content_type(head, document.display_name)
+    document.has_preview = render_thumbnail(document)
+    Document.objects.filter(pk=document.pk).update(content_type=document.content_type, has_preview=document.has_preview)
+
+
+@task('render_thumbnail')
+def rerender_thumbnail(job):
+    """
+    Puts a thumbnail evicted from the preview cache back. Queued by the thumbnail
+    endpoint on a cache miss, without a document link so the document's processing
+    status is left alone.
+    """
+    document = Document.objects.filter(pk=job.payload['document_id']).first()
+    if document is not None:
+        render_thumbnail(document)
@@ -1,3 +1,2009 @@
-from django.test import TestCase
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/tests.py
+# Description: Tests for the audit_management app.
 
-# Create your tests here.
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, models, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from meity_audit_portal import routers
+from users.authentication import RoleRefreshToken, forget_user
+from users.models import CustomUser
+from .api_views import AuditRequestStatusUpdateAPIView, StreamRequiresASGI
+from .forms import AuditRequestStatusUpdateForm
+from .jobs import JOB_TIMEOUT, TASKS, Heartbeat, claim_next, enqueue, requeue_stale_jobs, run_pending_jobs
+from .analytics import stage_dwell_times
+from .cache import bump_version, cache_stats, cached_worklist, get_version
+from .dashboard import expected_counts, stored_counts
+from .dwell import expected_buckets, stored_buckets
+from . import stream, workflow
+from .models import (
+    AuditRequest, AuditStatusEvent, Document, Job, Remark, StoredBlob, UploadChunk, UploadSession, WorkflowEvent,
+)
+from .pagination import AuditRequestCursorPagination
+from .previews import prune_thumbnails, thumbnail_path
+from .search import rebuild_search_index, search
+from .uploads import create_partial_file, partial_path
+from .workflow import TransitionConflict, TransitionNotAllowed, apply_transition, bulk_transition
+
+
+# Matches the table-access lines of SQLite's EXPLAIN QUERY PLAN output for our tables.
+PLAN_TABLE_ACCESS = re.compile(r'\b(SCAN|SEARCH) (audit_management_(?:auditrequest|remark|document))\b(.*)')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite-specific.')
+class WorklistIndexTests(TestCase):
+    """
+    Runs every role's worklist and detail queries through EXPLAIN QUERY PLAN and checks
+    that each access to the audit tables is served from an index rather than a full scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: CustomUser.objects.create_user(username=role.lower(), password='pass', role=role)
+            for role, _ in CustomUser.ROLE_CHOICES
+        }
+        csp = cls.users['CSP']
+        for status, _ in AuditRequest.STATUS_CHOICES:
+            audit_request = AuditRequest.objects.create(
+                csp=csp, service_provider_name='Provider', data_center_location='Chennai', status=status,
+            )
+            Remark.objects.create(audit_request=audit_request, author=csp, comment='Submitted.')
+            Document.objects.create(
+                audit_request=audit_request, uploaded_by=csp, document_type='Other', file='audit_documents/a.pdf',
+            )
+        cls.audit_request = audit_request
+
+    def assertQueriesUseIndexes(self, queries):
+        checked = 0
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'audit_management_' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            for line in plan:
+                match = PLAN_TABLE_ACCESS.search(line)
+                if match:
+                    checked += 1
+                    self.assertIn('USING', match.group(3), f'Full table scan in plan {plan} for query: {sql}')
+        self.assertGreater(checked, 0, 'No audit table access found in the captured queries.')
+
+    def test_api_list_queries_use_indexes(self):
+        client = APIClient()
+        for role, user in self.users.items():
+            with self.subTest(role=role):
+                client.force_authenticate(user)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(reverse('api_audit_request_list_create'))
+                self.assertEqual(response.status_code, 200)
+                self.assertQueriesUseIndexes(ctx.captured_queries)
+
+    def test_html_list_queries_use_indexes(self):
+        for role, user in self.users.items():
+            with self.subTest(role=role):
+                self.client.force_login(user)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse('audit_request_list'))
+                self.assertEqual(response.status_code, 200)
+                self.assertQueriesUseIndexes(ctx.captured_queries)
+
+    def test_detail_queries_use_indexes(self):
+        client = APIClient()
+        client.force_authenticate(self.users['Scientist_F'])
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertQueriesUseIndexes(ctx.captured_queries)
+
+
+def encode_cursor_payload(payload):
+    """
+    Encodes an arbitrary cursor payload the way the paginator does, to forge tampered cursors.
+    """
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Checks the (last_updated, id) cursor pagination of the list API: every row exactly once
+    in both directions, including across ties and rows updated between page fetches, and
+    the handling of bad cursors and page sizes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        requests = [
+            AuditRequest.objects.create(csp=cls.csp, service_provider_name=f'Provider {index}', data_center_location='Pune')
+            for index in range(8)
+        ]
+        # Six requests share one last_updated, so pages must split ties by id.
+        tied = timezone.now() - timedelta(days=1)
+        AuditRequest.objects.filter(pk__in=[request.pk for request in requests[:6]]).update(last_updated=tied)
+        AuditRequest.objects.filter(pk=requests[6].pk).update(last_updated=tied + timedelta(hours=1))
+        AuditRequest.objects.filter(pk=requests[7].pk).update(last_updated=tied - timedelta(hours=1))
+        cls.url = reverse('api_audit_request_list_create')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewer)
+
+    def expected_order(self):
+        return list(AuditRequest.objects.order_by('-last_updated', 'id').values_list('pk', flat=True))
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_pages_forward_and_back_across_ties(self):
+        forward, response = [], self.client.get(self.url, {'page_size': 3})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            forward.append(self.ids(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual([len(page) for page in forward], [3, 3, 2])
+        self.assertEqual(sum(forward, []), self.expected_order())
+
+        backward = [forward[-1]]
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            backward.append(self.ids(response))
+        # Backward pages end at the first row, so they need not align with the forward ones.
+        self.assertEqual(sum(reversed(backward), []), self.expected_order())
+        self.assertEqual(backward[-1], forward[0][:len(backward[-1])])
+
+    def test_row_updated_between_page_fetches(self):
+        first = self.client.get(self.url, {'page_size': 3})
+        order = self.expected_order()
+        # A request from a later page is edited, moving it to the top of the list.
+        edited = AuditRequest.objects.get(pk=order[4])
+        edited.description = 'Edited.'
+        edited.save()
+
+        seen = self.ids(first)
+        response = self.client.get(first.data['next'])
+        while True:
+            seen.extend(self.ids(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        # Each page starts after the last row seen, so nothing repeats or shifts; the
+        # edited request is on the first page now, which this walk has already passed.
+        self.assertEqual(seen, [pk for pk in order if pk != edited.pk])
+        self.assertEqual(self.ids(self.client.get(self.url, {'page_size': 3}))[0], edited.pk)
+
+    def test_invalid_cursors_are_rejected(self):
+        malformed = [
+            'not-a-cursor',
+            encode_cursor_payload({'i': 1}),
+            encode_cursor_payload({'u': 'yesterday', 'i': 1}),
+            encode_cursor_payload({'u': timezone.now().isoformat(), 'i': 'one'}),
+        ]
+        for cursor in malformed:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+    def test_page_size_is_clamped(self):
+        paginator = AuditRequestCursorPagination()
+        for value, expected in (('5', 5), ('1000', paginator.max_page_size), ('0', paginator.page_size),
+                                ('-3', paginator.page_size), ('ten', paginator.page_size)):
+            with self.subTest(page_size=value):
+                request = Request(APIRequestFactory().get('/', {'page_size': value}))
+                self.assertEqual(paginator.get_page_size(request), expected)
+        self.assertEqual(len(self.ids(self.client.get(self.url, {'page_size': 1000}))), 8)
+
+
+# Query budgets, one row per route and method: (route name, method, client, status, max queries).
+# "web" routes use a logged-in session, "api" routes a JWT access token and "anon" no credentials.
+# Every route is exercised as each role and must answer with the row's status, unless
+# QUERY_BUDGET_REFUSALS lists the role as refused; the budget is the most any role may spend,
+# and the count must not change between the small and large datasets.
+QUERY_BUDGETS = [
+    # audit_management/urls.py
+    ('create_audit_request', 'get', 'web', 200, 1),
+    ('create_audit_request', 'post', 'web', 302, 10),
+    ('audit_request_list', 'get', 'web', 200, 5),
+    ('audit_request_detail', 'get', 'web', 200, 4),
+    ('audit_request_detail', 'post', 'web', 302, 15),
+    ('delete_document', 'post', 'web', 302, 10),
+    # audit_management/api_urls.py
+    ('api_audit_request_list_create', 'get', 'api', 200, 2),
+    ('api_audit_request_list_create', 'post', 'api', 201, 13),
+    ('api_audit_request_detail', 'get', 'api', 200, 3),
+    ('api_audit_request_detail', 'put', 'api', 200, 13),
+    ('api_audit_request_detail', 'patch', 'api', 200, 13),
+    ('api_document_upload', 'post', 'api', 201, 16),
+    ('api_document_delete', 'delete', 'api', 204, 14),
+    ('api_remark_add', 'post', 'api', 201, 6),
+    ('api_audit_request_status_update', 'patch', 'api', 200, 15),
+    ('api_audit_request_bulk_status_update', 'post', 'api', 200, 15),
+    ('api_dashboard_stats', 'get', 'api', 200, 2),
+    ('api_audit_request_list_async', 'get', 'api', 200, 2),
+    ('api_audit_request_detail_async', 'get', 'api', 200, 3),
+    ('api_dashboard_stats_async', 'get', 'api', 200, 2),
+    ('api_stage_dwell_times', 'get', 'api', 200, 4),
+    ('api_worklist_cache_stats', 'get', 'api', 200, 1),
+    ('audit_search', 'get', 'web', 200, 2),
+    ('api_search', 'get', 'api', 200, 1),
+    ('api_upload_session_create', 'post', 'api', 201, 4),
+    ('api_upload_session_detail', 'get', 'api', 200, 2),
+    ('api_upload_session_detail', 'delete', 'api', 204, 4),
+    ('api_upload_chunk', 'put', 'api', 200, 7),
+    ('api_upload_session_complete', 'post', 'api', 201, 20),
+    ('api_document_download', 'get', 'api', 200, 1),
+    ('api_document_thumbnail', 'get', 'api', 200, 1),
+    ('api_certificate_download', 'get', 'api', 200, 1),
+    ('api_document_bundle', 'get', 'api', 200, 2),
+    # users/api_urls.py
+    ('api_register', 'post', 'anon', 201, 2),
+    ('api_user_detail', 'get', 'api', 200, 1),
+]
+
+# Roles each route refuses in the dataset, and the status they get: {(route, method): (roles, status)}.
+# The web views redirect whether or not they acted, so for those the status alone cannot tell.
+REVIEWERS = ('MeitY_Reviewer', 'STQC_Auditor', 'Scientist_F')
+QUERY_BUDGET_REFUSALS = {
+    ('create_audit_request', 'get'): (REVIEWERS, 302),
+    ('create_audit_request', 'post'): (REVIEWERS, 302),
+    ('audit_request_detail', 'post'): (('CSP',), 302),
+    ('api_audit_request_list_create', 'post'): (REVIEWERS, 403),
+    ('api_audit_request_detail', 'put'): (REVIEWERS, 403),
+    ('api_audit_request_detail', 'patch'): (REVIEWERS, 403),
+    ('api_document_upload', 'post'): (('MeitY_Reviewer', 'Scientist_F'), 403),
+    ('api_remark_add', 'post'): (('CSP',), 403),
+    ('api_audit_request_status_update', 'patch'): (('CSP',), 403),
+    ('api_audit_request_bulk_status_update', 'post'): (('CSP',), 403),
+    ('api_stage_dwell_times', 'get'): (('CSP',), 403),
+    ('api_upload_session_create', 'post'): (('MeitY_Reviewer', 'Scientist_F'), 403),
+    ('api_upload_session_complete', 'post'): (('MeitY_Reviewer', 'Scientist_F'), 403),
+}
+
+# Routes and methods of the URL modules above deliberately left out of QUERY_BUDGETS, with the reason.
+QUERY_BUDGET_EXCLUSIONS = {
+    # An endless Server-Sent Events response that is only served under ASGI; the test client
+    # gets a 501 before any query. Its hub reads one batch per poll for all connections.
+    ('api_event_stream', 'get'): 'streaming, ASGI only',
+}
+
+# The status a request must be in for each role to be able to act on it.
+ACTIONABLE_STATUS = {
+    'CSP': 'Submitted_by_CSP',
+    'MeitY_Reviewer': 'Submitted_by_CSP',
+    'STQC_Auditor': 'Forwarded_to_STQC',
+    'Scientist_F': 'Audit_Completed_by_STQC',
+}
+
+UPLOAD_CHUNK = b'%PDF-1.4 chunk'
+
+NEXT_STATUS = {
+    'Submitted_by_CSP': 'Forwarded_to_STQC',
+    'Forwarded_to_STQC': 'Audit_Completed_by_STQC',
+    'Audit_Completed_by_STQC': 'Approved_by_ScientistF',
+}
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class QueryBudgetTests(TestCase):
+    """
+    Hits every web and API route as each role against a small and a large dataset and
+    fails if a route answers with another status than expected, exceeds its budget in
+    QUERY_BUDGETS or issues more queries as the requests, documents or remarks grow.
+    """
+    SMALL, LARGE = 1, 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            # Staff, so the staff-only cache stats route is measured; nothing else reads is_staff.
+            role: CustomUser.objects.create_user(
+                username=role.lower(), password='pass', role=role, organization='Org', is_staff=True,
+            )
+            for role, _ in CustomUser.ROLE_CHOICES
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def build_dataset(self, size):
+        """
+        Creates `size` requests per status, each with `size` remarks and documents, and
+        returns the request each role can act on plus a document that role uploaded.
+        The targets have a certificate, and the documents a stored file and thumbnail,
+        so the downloads are measured serving them.
+        """
+        csp = self.users['CSP']
+        requests = {}
+        for status, _ in AuditRequest.STATUS_CHOICES:
+            for _ in range(size):
+                audit_request = AuditRequest.objects.create(
+                    csp=csp, service_provider_name='Provider', data_center_location='Chennai', status=status,
+                )
+                for index in range(size):
+                    author = self.users['STQC_Auditor'] if index % 2 else self.users['MeitY_Reviewer']
+                    Remark.objects.create(audit_request=audit_request, author=author, comment='Checked.')
+                    Document.objects.create(
+                        audit_request=audit_request, uploaded_by=csp, document_type='Other',
+                        file='audit_documents/existing.pdf',
+                    )
+                requests[status] = audit_request
+
+        targets = {}
+        for role, user in self.users.items():
+            audit_request = requests[ACTIONABLE_STATUS[role]]
+            if not audit_request.certificate_of_empanelment:
+                audit_request.certificate_of_empanelment.save('certificate.pdf', ContentFile(b'%PDF-1.4 certificate'))
+            document = Document.objects.create(
+                audit_request=audit_request, uploaded_by=user, document_type='Other',
+                file=SimpleUploadedFile('own.pdf', b'%PDF-1.4 own'), has_preview=True,
+            )
+            os.makedirs(os.path.dirname(thumbnail_path(document.sha256)), exist_ok=True)
+            with open(thumbnail_path(document.sha256), 'wb') as fh:
+                fh.write(b'thumbnail')
+            targets[role] = (audit_request, document, self.build_upload_session(audit_request, user))
+        return targets
+
+    def build_upload_session(self, audit_request, user):
+        """
+        Creates an upload session whose single chunk has been received, ready to complete.
+        """
+        session = UploadSession.objects.create(
+            audit_request=audit_request, uploaded_by=user, document_type='Audit_Report',
+            filename='large.pdf', total_size=len(UPLOAD_CHUNK), chunk_size=len(UPLOAD_CHUNK),
+        )
+        create_partial_file(session)
+        with open(partial_path(session), 'r+b') as fh:
+            fh.write(UPLOAD_CHUNK)
+        UploadChunk.objects.create(
+            session=session, index=0, size=len(UPLOAD_CHUNK), sha256=hashlib.sha256(UPLOAD_CHUNK).hexdigest(),
+        )
+        return session
+
+    def build_call(self, name, method, role, audit_request, document, session):
+        """
+        Returns (url, data, extra request kwargs) for one route as the given role.
+        """
+        extra = {}
+        next_status = NEXT_STATUS[audit_request.status]
+        upload = SimpleUploadedFile('report.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        if name in ('create_audit_request', 'api_audit_request_list_create'):
+            url = reverse(name)
+            data = {'service_provider_name': 'New', 'data_center_location': 'Pune', 'description': 'x'}
+        elif name == 'audit_request_list':
+            url, data = reverse(name), None
+        elif name in ('audit_search', 'api_search'):
+            url, data = reverse(name), {'q': 'Chennai check'}
+        elif name == 'audit_request_detail':
+            url = reverse(name, kwargs={'pk': audit_request.pk})
+            data = {'update_status': '1', 'status': next_status}
+        elif name in ('api_certificate_download', 'api_document_bundle', 'api_audit_request_detail_async'):
+            url, data = reverse(name, kwargs={'pk': audit_request.pk}), None
+        elif name == 'api_audit_request_detail':
+            url = reverse(name, kwargs={'pk': audit_request.pk})
+            data = {'description': 'Updated scope.'}
+            if method == 'put':
+                data.update(service_provider_name='Provider', data_center_location='Chennai')
+        elif name in ('delete_document', 'api_document_delete', 'api_document_download', 'api_document_thumbnail'):
+            url, data = reverse(name, kwargs={'pk': document.pk}), None
+        elif name == 'api_document_upload':
+            url = reverse(name, kwargs={'audit_request_pk': audit_request.pk})
+            data = {'document_type': 'Audit_Report', 'file': upload, 'description': 'Report'}
+        elif name == 'api_remark_add':
+            url = reverse(name, kwargs={'audit_request_pk': audit_request.pk})
+            data = {'comment': 'Looks fine.'}
+        elif name == 'api_audit_request_status_update':
+            url = reverse(name, kwargs={'pk': audit_request.pk})
+            data = {'status': next_status}
+        elif name == 'api_audit_request_bulk_status_update':
+            url = reverse(name)
+            # Every request in the actionable status, so the batch grows with the dataset.
+            ids = list(AuditRequest.objects.filter(status=audit_request.status).values_list('pk', flat=True))
+            data, extra = {'ids': ids, 'status': next_status}, {'format': 'json'}
+        elif name == 'api_register':
+            url = reverse(name)
+            data = {'username': f'new_{role.lower()}', 'password': 'pass12345', 'role': 'CSP'}
+        elif name == 'api_upload_session_create':
+            url = reverse(name, kwargs={'audit_request_pk': audit_request.pk})
+            data = {'document_type': 'Audit_Report', 'filename': 'large.pdf', 'total_size': 1024, 'chunk_size': 256}
+        elif name in ('api_upload_session_detail', 'api_upload_session_complete'):
+            url, data = reverse(name, kwargs={'pk': session.pk}), None
+        elif name == 'api_upload_chunk':
+            url, data = reverse(name, kwargs={'pk': session.pk, 'index': 0}), UPLOAD_CHUNK
+            extra = {
+                'content_type': 'application/octet-stream',
+                'HTTP_X_CHUNK_SHA256': hashlib.sha256(UPLOAD_CHUNK).hexdigest(),
+            }
+        else:
+            # Routes without URL arguments or a request body.
+            url, data = reverse(name), None
+        return url, data, extra
+
+    def client_for(self, kind, user):
+        if kind == 'web':
+            client = self.client_class()
+            client.force_login(user)
+            return client
+        client = APIClient()
+        if kind == 'api':
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        return client
+
+    def count_queries(self, size):
+        """
+        Runs every route as every role against a fresh dataset of the given size, rolling
+        back each call, and returns {(route, method, role): query count}.
+        """
+        counts = {}
+        for name, method, kind, expected, _ in QUERY_BUDGETS:
+            refused, refused_status = QUERY_BUDGET_REFUSALS.get((name, method), ((), None))
+            for role, user in self.users.items():
+                with transaction.atomic():
+                    audit_request, document, session = self.build_dataset(size)[role]
+                    client = self.client_for(kind, user)
+                    url, data, extra = self.build_call(name, method, role, audit_request, document, session)
+                    # API writes are counted with the user row not yet cached (logins elsewhere evict it).
+                    forget_user(user.pk)
+                    kwargs = {'format': 'multipart' if method == 'post' else 'json'} if kind != 'web' else {}
+                    kwargs = extra or kwargs
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = getattr(client, method)(url, data, **kwargs)
+                    response.close()
+                    self.assertEqual(
+                        response.status_code, refused_status if role in refused else expected,
+                        f'{method.upper()} {name} as {role}',
+                    )
+                    # Session bookkeeping is per-login, not per-row; leave it out of the budget.
+                    counts[(name, method, role)] = len([
+                        query for query in ctx.captured_queries if 'django_session' not in query['sql']
+                    ])
+                    transaction.set_rollback(True)
+        return counts
+
+    def test_every_route_method_has_a_budget_or_an_exclusion(self):
+        covered = {(name, method) for name, method, *_ in QUERY_BUDGETS} | set(QUERY_BUDGET_EXCLUSIONS)
+        client = self.client_class()
+        for module in ('audit_management.urls', 'audit_management.api_urls', 'users.api_urls'):
+            for pattern in import_module(module).urlpatterns:
+                view_class = getattr(pattern.callback, 'view_class', None)
+                if view_class is not None:
+                    allowed = {
+                        method for method in view_class.http_method_names
+                        if method not in ('head', 'options') and hasattr(view_class, method)
+                    }
+                else:
+                    # Function views declare their methods with the require_* decorators, which
+                    # answer anything else with a 405 before any login check or query.
+                    url = reverse(pattern.name, kwargs={key: 1 for key in pattern.pattern.converters})
+                    allowed = {
+                        method for method in ('get', 'post', 'put', 'patch', 'delete')
+                        if getattr(client, method)(url).status_code != 405
+                    }
+                self.assertTrue(allowed, pattern.name)
+                for method in allowed:
+                    with self.subTest(route=pattern.name, method=method):
+                        self.assertIn((pattern.name, method), covered)
+
+    def test_query_counts_within_budget_and_independent_of_data_size(self):
+        small = self.count_queries(self.SMALL)
+        large = self.count_queries(self.LARGE)
+        budgets = {(name, method): budget for name, method, *_, budget in QUERY_BUDGETS}
+        for (name, method, role), count in large.items():
+            with self.subTest(route=name, method=method, role=role):
+                self.assertEqual(
+                    count, small[(name, method, role)],
+                    f'{method.upper()} {name} as {role} issues more queries as the data grows.',
+                )
+                self.assertLessEqual(
+                    count, budgets[(name, method)],
+                    f'{method.upper()} {name} as {role} exceeds its query budget.',
+                )
+
+
+@patch('audit_management.cache.WORKLIST_CACHE_ENABLED', True)
+class WorklistCacheTests(TestCase):
+    """
+    Checks that worklists are served from the cache on repeat, that every kind of change
+    bumps the version so the next read rebuilds them, and that hits and misses are counted.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.staff = CustomUser.objects.create_user(username='ops', password='pass', role='MeitY_Reviewer', is_staff=True)
+        cls.audit_request, cls.bulk_request = (
+            AuditRequest.objects.create(csp=cls.csp, service_provider_name='Provider', data_center_location='Pune')
+            for _ in range(2)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return ['row']
+
+    def read(self):
+        return cached_worklist(self.reviewer, 'test', self.build)
+
+    def test_repeat_reads_are_served_from_the_cache(self):
+        self.assertEqual(self.read(), ['row'])
+        self.assertEqual(self.read(), ['row'])
+        self.assertEqual(self.builds, 1)
+        self.assertEqual((cache_stats()['hits'], cache_stats()['misses']), (1, 1))
+
+        client = APIClient()
+        client.force_authenticate(self.reviewer)
+        url = reverse('api_audit_request_list_create')
+        first = client.get(url)
+        with self.assertNumQueries(0):
+            second = client.get(url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual((cache_stats()['hits'], cache_stats()['misses']), (2, 2))
+
+        client.force_authenticate(self.staff)
+        self.assertEqual(client.get(reverse('api_worklist_cache_stats')).data['hit_ratio'], 0.5)
+
+    def test_every_change_invalidates(self):
+        changes = {
+            'request saved': lambda: AuditRequest.objects.get(pk=self.audit_request.pk).save(),
+            'document added': lambda: Document.objects.create(
+                audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other', file='audit_documents/a.pdf',
+            ),
+            'remark added': lambda: Remark.objects.create(
+                audit_request=self.audit_request, author=self.reviewer, comment='Noted.',
+            ),
+            'transition': lambda: apply_transition(
+                self.reviewer, AuditRequest.objects.get(pk=self.audit_request.pk), 'Submitted_by_CSP', 'Forwarded_to_STQC',
+            ),
+            'bulk transition': lambda: bulk_transition(self.reviewer, [self.bulk_request.pk], 'Forwarded_to_STQC'),
+        }
+        for label, change in changes.items():
+            with self.subTest(change=label):
+                self.read()
+                builds, version, misses = self.builds, get_version(), cache_stats()['misses']
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                self.assertGreater(get_version(), version)
+                self.read()
+                self.assertEqual(self.builds, builds + 1)
+                self.assertEqual(cache_stats()['misses'], misses + 1)
+
+    def test_worklists_are_not_cached_unless_the_cache_is_shared(self):
+        with patch('audit_management.cache.WORKLIST_CACHE_ENABLED', False):
+            self.assertEqual((self.read(), self.read()), (['row'], ['row']))
+        self.assertEqual(self.builds, 2)
+        self.assertEqual((cache_stats()['hits'], cache_stats()['misses']), (0, 0))
+
+    def test_html_worklist_pages_reach_every_request(self):
+        self.client.force_login(self.reviewer)
+        url = reverse('audit_request_list')
+        with patch('audit_management.cache.WORKLIST_LIMIT', 1):
+            first = self.client.get(url)
+            self.assertIsNone(first.context['pending_pager']['previous'])
+            second = self.client.get(first.context['pending_pager']['next'])
+            self.assertIsNone(second.context['pending_pager']['next'])
+            self.assertEqual(
+                {row.pk for row in first.context['pending_requests'] + second.context['pending_requests']},
+                {self.audit_request.pk, self.bulk_request.pk},
+            )
+            back = self.client.get(second.context['pending_pager']['previous'])
+            self.assertEqual(back.context['pending_requests'], first.context['pending_requests'])
+
+            # The cached id is still served, but its row has left the worklist.
+            AuditRequest.objects.filter(pk=second.context['pending_requests'][0].pk).update(status='Forwarded_to_STQC')
+            self.assertEqual(self.client.get(first.context['pending_pager']['next']).context['pending_requests'], [])
+        self.assertEqual(self.client.get(url, {'pending_cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Checks that the detail and list APIs return ETags, answer a matching If-None-Match
+    with 304 and change their ETag when a child remark is added.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.other_csp = CustomUser.objects.create_user(username='other', password='pass', role='CSP')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewer)
+
+    def test_detail_not_modified_until_a_remark_is_added(self):
+        url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        Remark.objects.create(audit_request=self.audit_request, author=self.reviewer, comment='Checked.')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_etag_does_not_bypass_permissions(self):
+        url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(self.other_csp)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+
+    def test_list_not_modified_until_a_remark_is_added(self):
+        url = reverse('api_audit_request_list_create')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Remark.objects.create(audit_request=self.audit_request, author=self.reviewer, comment='Checked.')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class ActivityCounterTests(TestCase):
+    """
+    Checks that the denormalized counters follow documents and remarks added and
+    removed through the API, and that rebuild_activity_counters detects and repairs drift.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def test_counters_follow_api_changes(self):
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        response = client.post(reverse('api_audit_request_list_create'), {
+            'service_provider_name': 'Provider', 'data_center_location': 'Chennai',
+        })
+        audit_request = AuditRequest.objects.get(pk=response.data['id'])
+        self.assertEqual((audit_request.document_count, audit_request.remark_count), (0, 1))
+
+        response = client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': audit_request.pk}),
+            {'document_type': 'CSP_Submission', 'file': SimpleUploadedFile('a.pdf', b'%PDF-1.4')},
+            format='multipart',
+        )
+        audit_request.refresh_from_db()
+        self.assertEqual((audit_request.document_count, audit_request.remark_count), (1, 2))
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual(audit_request.last_activity_at, max(document.upload_date, audit_request.remarks.last().timestamp))
+
+        client.delete(reverse('api_document_delete', kwargs={'pk': document.pk}))
+        audit_request.refresh_from_db()
+        self.assertEqual((audit_request.document_count, audit_request.remark_count), (0, 3))
+        self.assertFalse(AuditRequest.objects.with_counter_drift().exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        audit_request = AuditRequest.objects.create(
+            csp=self.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+        Remark.objects.create(audit_request=audit_request, author=self.auditor, comment='Checked.')
+        AuditRequest.objects.filter(pk=audit_request.pk).update(remark_count=7, last_activity_at=None)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_activity_counters', '--check', stdout=StringIO())
+        call_command('rebuild_activity_counters', stdout=StringIO())
+        call_command('rebuild_activity_counters', '--check', stdout=StringIO())
+
+        audit_request.refresh_from_db()
+        self.assertEqual(audit_request.remark_count, 1)
+        self.assertIsNotNone(audit_request.last_activity_at)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class SeedAuditDataTests(TestCase):
+    """
+    Seeds a small reproducible dataset and checks that the bulk-created counters, dashboard
+    counts and dwell histograms agree with the rows they summarize.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def test_seeded_summaries_match_the_tables(self):
+        call_command(
+            'seed_audit_data', '--users', '8', '--requests', '12', '--batch-size', '5', '--seed', '7',
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(AuditRequest.objects.count(), 12)
+        self.assertTrue(Remark.objects.exists())
+        self.assertTrue(AuditStatusEvent.objects.exists())
+        self.assertFalse(AuditRequest.objects.with_counter_drift().exists())
+        self.assertEqual(stored_counts(), expected_counts())
+        self.assertEqual(stored_buckets(), expected_buckets())
+        call_command('rebuild_activity_counters', '--check', stdout=StringIO())
+        call_command('rebuild_dashboard_counts', '--check', stdout=StringIO())
+        call_command('rebuild_dwell_buckets', '--check', stdout=StringIO())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class ResumableUploadTests(TestCase):
+    """
+    Drives the chunked upload API: chunks arrive out of order, a corrupted chunk is
+    rejected and resent, and completing the session yields a byte-identical Document.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.csp)
+
+    def put_chunk(self, session_id, index, body, checksum=None):
+        return self.client.put(
+            reverse('api_upload_chunk', kwargs={'pk': session_id, 'index': index}), body,
+            content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(body).hexdigest(),
+        )
+
+    def test_upload_resumes_and_completes_into_document(self):
+        content = bytes(range(256)) * 4 + b'tail'
+        response = self.client.post(
+            reverse('api_upload_session_create', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'CSP_Submission', 'filename': 'report.pdf', 'total_size': len(content),
+             'chunk_size': 256, 'sha256': hashlib.sha256(content).hexdigest()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        session_id, total = response.data['id'], response.data['total_chunks']
+        chunks = [content[offset:offset + 256] for offset in range(0, len(content), 256)]
+
+        for index in reversed(range(1, total)):
+            self.assertEqual(self.put_chunk(session_id, index, chunks[index]).status_code, 200)
+        self.assertEqual(self.put_chunk(session_id, 0, chunks[0], checksum='0' * 64).status_code, 400)
+
+        complete_url = reverse('api_upload_session_complete', kwargs={'pk': session_id})
+        response = self.client.post(complete_url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['missing_chunks'], [0])
+
+        self.assertEqual(self.put_chunk(session_id, 0, chunks[0]).status_code, 200)
+        response = self.client.post(complete_url)
+        self.assertEqual(response.status_code, 201)
+        document = Document.objects.get(pk=response.data['id'])
+        with document.file.open('rb') as fh:
+            self.assertEqual(fh.read(), content)
+        # Completing again is idempotent.
+        self.assertEqual(self.client.post(complete_url).data['id'], document.pk)
+
+    def test_oversized_chunk_is_rejected(self):
+        session = UploadSession.objects.create(
+            audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other',
+            filename='a.pdf', total_size=8, chunk_size=4,
+        )
+        create_partial_file(session)
+        self.assertEqual(self.put_chunk(session.pk, 0, b'12345').status_code, 400)
+        self.assertFalse(session.chunks.exists())
+
+    def test_purge_removes_stale_sessions(self):
+        session = UploadSession.objects.create(
+            audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other',
+            filename='a.pdf', total_size=8, chunk_size=4,
+        )
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        call_command('purge_upload_sessions', stdout=StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class DocumentStorageTests(TestCase):
+    """
+    Checks that identical uploads share one content-addressed blob and that the blob is
+    removed only when the last document referencing it is deleted.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def upload(self, client, name):
+        response = client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'CSP_Submission', 'file': SimpleUploadedFile(name, b'%PDF-1.4 policy')},
+            format='multipart',
+        )
+        return Document.objects.get(pk=response.data['id'])
+
+    def test_identical_uploads_share_a_blob_until_the_last_delete(self):
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        first, second = self.upload(client, 'Policy.PDF'), self.upload(client, 'policy-copy.pdf')
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.sha256, hashlib.sha256(b'%PDF-1.4 policy').hexdigest())
+        self.assertEqual((first.original_filename, second.original_filename), ('Policy.PDF', 'policy-copy.pdf'))
+        path = first.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(reverse('api_document_delete', kwargs={'pk': first.pk}))
+        self.assertTrue(os.path.exists(path))
+
+        self.client.force_login(self.csp)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_document', kwargs={'pk': second.pk}))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(StoredBlob.objects.filter(name=first.file.name).exists())
+
+    def test_reupload_during_the_last_delete_keeps_the_blob(self):
+        content = b'%PDF-1.4 shared'
+        first = Document.objects.create(
+            audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other',
+            file=SimpleUploadedFile('a.pdf', content),
+        )
+        storage, name = first.file.storage, first.file.name
+
+        # A re-upload stores its blob after the last document's delete, before that delete's
+        # cleanup runs and before its own document row is written.
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+        self.assertEqual(storage.save('audit_documents/b.pdf', ContentFile(content)), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(storage.exists(name))
+        second = Document.objects.create(
+            audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other', file=name,
+        )
+
+        # The other order: the cleanup runs first and removes the file, and the re-upload writes it again.
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertEqual(storage.save('audit_documents/c.pdf', ContentFile(content)), name)
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+
+    def test_failed_document_write_drops_its_blob_reference(self):
+        with patch.object(models.Model, 'save', side_effect=RuntimeError('insert failed')):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+                document = Document(
+                    audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other',
+                    file=SimpleUploadedFile('a.pdf', b'%PDF-1.4 orphan'),
+                )
+                document.save()
+        self.assertFalse(StoredBlob.objects.filter(name=document.file.name).exists())
+        self.assertFalse(document.file.storage.exists(document.file.name))
+
+    def test_duplicate_temporary_upload_is_removed(self):
+        content = b'%PDF-1.4 twice'
+        stored = Document.objects.create(
+            audit_request=self.audit_request, uploaded_by=self.csp, document_type='Other',
+            file=SimpleUploadedFile('a.pdf', content),
+        )
+        upload = TemporaryUploadedFile('b.pdf', 'application/pdf', len(content), None)
+        upload.write(content)
+        upload.seek(0)
+        self.assertEqual(stored.file.storage.save('audit_documents/b.pdf', upload), stored.file.name)
+        self.assertFalse(os.path.exists(upload.temporary_file_path()))
+        upload.close()
+        self.assertEqual(StoredBlob.objects.get(name=stored.file.name).refcount, 2)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class DocumentDownloadTests(TestCase):
+    """
+    Checks the download endpoint's access rules and its Range and conditional handling.
+    """
+    CONTENT = bytes(range(256)) * 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.other_csp = CustomUser.objects.create_user(username='other', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+        cls.document = Document.objects.create(
+            audit_request=audit_request, uploaded_by=cls.csp, document_type='Other',
+            file=SimpleUploadedFile('report.pdf', cls.CONTENT),
+        )
+        cls.url = reverse('api_document_download', kwargs={'pk': cls.document.pk})
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewer)
+
+    def test_full_download_streams_the_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range validator gets the whole file.
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304,
+        )
+
+    def test_other_csp_is_denied(self):
+        self.client.force_authenticate(self.other_csp)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_bundle_streams_a_zip_of_every_document(self):
+        audit_request = self.document.audit_request
+        Document.objects.create(
+            audit_request=audit_request, uploaded_by=self.csp, document_type='Other',
+            file=SimpleUploadedFile('notes.txt', b'plain text ' * 20000),
+        )
+        response = self.client.get(reverse('api_document_bundle', kwargs={'pk': audit_request.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        # Produced incrementally rather than as one buffered body.
+        self.assertGreater(len(chunks), 2)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(archive.read('Other/report.pdf'), self.CONTENT)
+            self.assertEqual(archive.getinfo('Other/report.pdf').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo('Other/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.read('Other/notes.txt'), b'plain text ' * 20000)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class BackgroundJobTests(TestCase):
+    """
+    Checks that uploads queue their processing as a job and that workers run, retry and fail jobs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def test_upload_is_processed_by_a_worker(self):
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        response = client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'CSP_Submission', 'file': SimpleUploadedFile('scan.bin', b'%PDF-1.4 scanned')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['processing_status'], 'pending')
+        job = Job.objects.get(document_id=response.data['id'])
+        self.assertEqual((job.task, job.status), ('process_document', 'queued'))
+
+        detail_url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        etag = client.get(detail_url)['ETag']
+        last_updated = AuditRequest.objects.get(pk=self.audit_request.pk).last_updated
+
+        self.assertEqual(run_pending_jobs(), 1)
+        document = Document.objects.get(pk=response.data['id'])
+        self.assertEqual((document.processing_status, document.content_type), ('ready', 'application/pdf'))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'succeeded')
+        # The detail shows the new status under a new ETag, but the request was not edited.
+        self.assertEqual(client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(AuditRequest.objects.get(pk=self.audit_request.pk).last_updated, last_updated)
+
+    def test_failing_job_is_retried_with_backoff_then_failed(self):
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            raise RuntimeError('converter unavailable')
+
+        TASKS['flaky'] = flaky
+        self.addCleanup(TASKS.pop, 'flaky')
+        job = enqueue('flaky')
+        job.max_attempts = 2
+        job.save()
+
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('converter unavailable', job.last_error)
+        # Not due yet, so a worker leaves it alone.
+        self.assertEqual(run_pending_jobs(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(calls, [1, 2])
+
+    def test_stale_job_is_failed_once_its_attempts_are_used_up(self):
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        response = client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'CSP_Submission', 'file': SimpleUploadedFile('scan.bin', b'%PDF-1.4 poison')},
+            format='multipart',
+        )
+        # The worker claimed the job on its last attempt and died without recording an outcome.
+        poison = Job.objects.get(document_id=response.data['id'])
+        abandoned = timezone.now() - timedelta(seconds=JOB_TIMEOUT + 1)
+        Job.objects.filter(pk=poison.pk).update(
+            status='running', attempts=poison.max_attempts, locked_by='worker-1', locked_at=abandoned,
+        )
+        lost = enqueue('flaky')
+        Job.objects.filter(pk=lost.pk).update(status='running', attempts=1, locked_by='worker-2', locked_at=abandoned)
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        poison.refresh_from_db()
+        self.assertEqual((poison.status, poison.locked_at), ('failed', None))
+        self.assertIn('no heartbeat', poison.last_error)
+        self.assertEqual(Document.objects.get(pk=response.data['id']).processing_status, 'failed')
+        self.assertEqual(Job.objects.get(pk=lost.pk).status, 'queued')
+        # Nothing is left for a worker to claim again.
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertFalse(Job.objects.filter(pk=poison.pk, status='queued').exists())
+
+    def test_heartbeat_keeps_a_long_job_from_being_requeued(self):
+        enqueue('flaky')
+        job = claim_next('worker-1')
+        # The job has run longer than JOB_TIMEOUT, but its worker is alive and beating.
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=JOB_TIMEOUT + 1))
+        heartbeat = Heartbeat(job)
+        self.assertEqual(heartbeat.beat(), 1)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
+
+        # Once requeued (its worker presumed dead), a late beat does not reclaim it.
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=JOB_TIMEOUT + 1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(heartbeat.beat(), 0)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix='audit-tests-'))
+class DocumentPreviewTests(TestCase):
+    """
+    Checks that workers render thumbnails for image uploads and that the thumbnail
+    endpoint serves, revalidates and re-queues them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.other_csp = CustomUser.objects.create_user(username='other', password='pass', role='CSP')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Chennai',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls._overridden_settings['MEDIA_ROOT'], ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.csp)
+
+    def upload_image(self, name, size=(1200, 800), color='navy'):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'PNG')
+        response = self.client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'Other', 'file': SimpleUploadedFile(name, buffer.getvalue())},
+            format='multipart',
+        )
+        run_pending_jobs()
+        return Document.objects.get(pk=response.data['id'])
+
+    def test_image_upload_gets_a_cached_thumbnail(self):
+        from PIL import Image
+
+        document = self.upload_image('rack-photo.png')
+        self.assertTrue(document.has_preview)
+        url = reverse('api_document_thumbnail', kwargs={'pk': document.pk})
+        detail = self.client.get(reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk}))
+        self.assertTrue(detail.data['documents'][0]['thumbnail_url'].endswith(url))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (240, 160))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.client.force_authenticate(self.other_csp)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_unpreviewable_document_has_no_thumbnail(self):
+        response = self.client.post(
+            reverse('api_document_upload', kwargs={'audit_request_pk': self.audit_request.pk}),
+            {'document_type': 'Other', 'file': SimpleUploadedFile('notes.txt', b'plain text')},
+            format='multipart',
+        )
+        run_pending_jobs()
+        self.assertFalse(Document.objects.get(pk=response.data['id']).has_preview)
+        self.assertEqual(
+            self.client.get(reverse('api_document_thumbnail', kwargs={'pk': response.data['id']})).status_code, 404,
+        )
+
+    def test_evicted_thumbnail_is_rendered_again(self):
+        first = self.upload_image('first.png', color='red')
+        second = self.upload_image('second.png', color='green')
+        # Make the first thumbnail the least recently used, then shrink the cache to one file.
+        os.utime(thumbnail_path(first.sha256), (0, 0))
+        self.assertEqual(prune_thumbnails(max_bytes=os.path.getsize(thumbnail_path(second.sha256))), 1)
+        self.assertFalse(os.path.exists(thumbnail_path(first.sha256)))
+        self.assertTrue(os.path.exists(thumbnail_path(second.sha256)))
+
+        url = reverse('api_document_thumbnail', kwargs={'pk': first.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.client.get(url)
+        self.assertEqual(Job.objects.filter(task='render_thumbnail').count(), 1)
+
+        run_pending_jobs()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class SearchTests(TestCase):
+    """
+    Checks that the full-text index follows edits and deletes, ranks results and applies
+    each role's visibility in the search query itself.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.other_csp = CustomUser.objects.create_user(username='other', password='pass', role='CSP')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.chennai = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Alpha Cloud', data_center_location='Chennai',
+            description='Primary site with a DR site in Mumbai.', status='Forwarded_to_STQC',
+        )
+        cls.pune = AuditRequest.objects.create(
+            csp=cls.other_csp, service_provider_name='Beta Hosting', data_center_location='Pune',
+        )
+        cls.remark = Remark.objects.create(
+            audit_request=cls.chennai, author=cls.auditor, comment='Visited the Chennai DR site; cooling logs missing.',
+        )
+
+    def results(self, user, query):
+        return [(entry.kind, entry.object_id) for entry in search(user, query)]
+
+    def test_ranked_matches_with_stemming_and_prefix(self):
+        Remark.objects.create(audit_request=self.pune, author=self.reviewer, comment='DR drill pending.')
+        self.assertEqual(self.results(self.reviewer, 'chennai dr sites')[0], ('remark', self.remark.pk))
+        self.assertIn(('request', self.pune.pk), self.results(self.reviewer, 'bet'))
+        self.assertEqual(self.results(self.reviewer, '"quoted" OR NEAR('), [])
+
+    def test_role_filtering_happens_in_the_search_query(self):
+        self.assertEqual(self.results(self.other_csp, 'chennai'), [])
+        self.assertTrue(self.results(self.csp, 'chennai'))
+        self.assertEqual(self.results(self.auditor, 'pune'), [])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(self.results(self.auditor, 'cooling'))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.remark.comment = 'Generator capacity verified.'
+        self.remark.save()
+        self.assertEqual(self.results(self.reviewer, 'cooling'), [])
+        self.assertEqual(self.results(self.reviewer, 'generator'), [('remark', self.remark.pk)])
+
+        document = Document.objects.create(
+            audit_request=self.pune, uploaded_by=self.other_csp, document_type='Other',
+            file='audit_documents/firewall.pdf', description='Firewall rule review',
+        )
+        self.assertEqual(self.results(self.reviewer, 'firewall'), [('document', document.pk)])
+        document.delete()
+        self.assertEqual(self.results(self.reviewer, 'firewall'), [])
+
+        self.chennai.delete()
+        self.assertEqual(self.results(self.reviewer, 'chennai'), [])
+        self.assertEqual(rebuild_search_index(), 1)
+        self.assertEqual(self.results(self.reviewer, 'beta'), [('request', self.pune.pk)])
+
+    def test_search_api_and_page(self):
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        response = client.get(reverse('api_search'), {'q': 'cooling logs'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['audit_request'], self.chennai.pk)
+        self.assertEqual(response.data['results'][0]['kind'], 'remark')
+        self.assertEqual(client.get(reverse('api_search'), {'q': 'x', 'limit': 'many'}).status_code, 400)
+
+        self.client.force_login(self.csp)
+        response = self.client.get(reverse('audit_search'), {'q': 'cooling'})
+        self.assertContains(response, 'cooling logs missing')
+        self.assertContains(response, reverse('audit_request_detail', kwargs={'pk': self.chennai.pk}))
+
+
+class BulkStatusUpdateTests(TestCase):
+    """
+    Checks that a bulk transition applies the single-request rules to every id, reports a
+    result per id and keeps remarks, counters and the search index in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.submitted = [
+            AuditRequest.objects.create(csp=cls.csp, service_provider_name=f'Provider {index}', data_center_location='Pune')
+            for index in range(3)
+        ]
+        cls.completed = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Done', data_center_location='Pune', status='Audit_Completed_by_STQC',
+        )
+        cls.url = reverse('api_audit_request_bulk_status_update')
+
+    def test_forwards_eligible_requests_and_reports_the_rest(self):
+        client = APIClient()
+        client.force_authenticate(self.reviewer)
+        ids = [request.pk for request in self.submitted] + [self.completed.pk, 999999]
+        response = client.post(self.url, {'ids': ids, 'status': 'Forwarded_to_STQC'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 3)
+        outcomes = {result['id']: (result['result'], result['status']) for result in response.data['results']}
+        self.assertEqual(outcomes[self.completed.pk], ('invalid_transition', 'Audit_Completed_by_STQC'))
+        self.assertEqual(outcomes[999999], ('not_found', None))
+
+        forwarded = AuditRequest.objects.filter(status='Forwarded_to_STQC')
+        self.assertEqual(set(forwarded.values_list('pk', flat=True)), {request.pk for request in self.submitted})
+        self.assertEqual(Remark.objects.filter(author=self.reviewer).count(), 3)
+        self.assertFalse(AuditRequest.objects.with_counter_drift().exists())
+        self.assertEqual(len(search(self.reviewer, 'forwarded')), 3)
+
+        # Already forwarded now, so repeating the batch changes nothing.
+        response = client.post(self.url, {'ids': ids, 'status': 'Forwarded_to_STQC'}, format='json')
+        self.assertEqual(response.data['updated'], 0)
+
+    def test_rows_moved_concurrently_are_reported_as_conflicts(self):
+        raced, kept = self.submitted[0], self.submitted[1]
+        lock_requests = workflow.lock_requests
+
+        def read_then_lose_the_race(ids):
+            rows = lock_requests(ids)
+            # Without row locks (SQLite), another reviewer's transition lands after the read.
+            apply_transition(self.reviewer, AuditRequest.objects.get(pk=raced.pk), 'Submitted_by_CSP', 'Forwarded_to_STQC')
+            return rows
+
+        with patch.object(workflow, 'lock_requests', read_then_lose_the_race):
+            outcomes = bulk_transition(self.reviewer, [raced.pk, kept.pk], 'Forwarded_to_STQC')
+
+        self.assertEqual(outcomes, {
+            raced.pk: ('conflict', 'Forwarded_to_STQC'), kept.pk: ('updated', 'Forwarded_to_STQC'),
+        })
+        # The history, remarks, counters and stream record the raced request's move once, not twice.
+        for audit_request in (raced, kept):
+            self.assertEqual(audit_request.status_events.count(), 1)
+            self.assertEqual(audit_request.remarks.count(), 1)
+            self.assertEqual(audit_request.workflow_events.filter(kind='status_changed').count(), 1)
+            self.assertEqual(audit_request.workflow_events.filter(kind='remark_added').count(), 1)
+        self.assertFalse(AuditRequest.objects.with_counter_drift().exists())
+        self.assertEqual(expected_counts(), stored_counts())
+        self.assertEqual(expected_buckets(), stored_buckets())
+
+    def test_role_without_a_rule_for_the_status_is_refused(self):
+        client = APIClient()
+        client.force_authenticate(self.reviewer)
+        response = client.post(
+            self.url, {'ids': [self.completed.pk], 'status': 'Approved_by_ScientistF'}, format='json',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(AuditRequest.objects.get(pk=self.completed.pk).status, 'Audit_Completed_by_STQC')
+
+
+class WorkflowTransitionTests(TestCase):
+    """
+    Checks that every status path follows the one transition table and that a transition
+    applied from a stale status is refused rather than applied twice.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+        cls.scientist = CustomUser.objects.create_user(username='scientist', password='pass', role='Scientist_F')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Pune',
+        )
+
+    def test_stale_transition_conflicts_instead_of_repeating(self):
+        first = AuditRequest.objects.get(pk=self.audit_request.pk)
+        second = AuditRequest.objects.get(pk=self.audit_request.pk)
+        apply_transition(self.reviewer, first, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+
+        with self.assertRaises(TransitionConflict) as raised:
+            apply_transition(self.reviewer, second, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        self.assertEqual(raised.exception.current_status, 'Forwarded_to_STQC')
+        self.assertEqual(Remark.objects.filter(audit_request=self.audit_request).count(), 1)
+        self.assertFalse(AuditRequest.objects.with_counter_drift().exists())
+
+    def test_transition_outside_the_table_is_not_allowed(self):
+        with self.assertRaises(TransitionNotAllowed):
+            apply_transition(self.auditor, self.audit_request, 'Submitted_by_CSP', 'Audit_Completed_by_STQC')
+        self.assertEqual(AuditRequest.objects.get(pk=self.audit_request.pk).status, 'Submitted_by_CSP')
+
+    def test_api_returns_conflict_when_the_status_moved_underneath(self):
+        stale = AuditRequest.objects.get(pk=self.audit_request.pk)
+        apply_transition(self.reviewer, self.audit_request, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        client = APIClient()
+        client.force_authenticate(self.reviewer)
+        with patch.object(AuditRequestStatusUpdateAPIView, 'get_object', return_value=stale):
+            response = client.patch(
+                reverse('api_audit_request_status_update', kwargs={'pk': stale.pk}),
+                {'status': 'Forwarded_to_STQC'}, format='json',
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'Forwarded_to_STQC')
+        self.assertEqual(Remark.objects.filter(audit_request=self.audit_request).count(), 1)
+
+    def test_web_form_and_post_follow_the_table(self):
+        form = AuditRequestStatusUpdateForm(
+            instance=self.audit_request, user=self.scientist, current_status='Audit_Completed_by_STQC',
+        )
+        self.assertEqual(
+            form.fields['status'].choices,
+            [('Approved_by_ScientistF', 'Approve Audit'), ('Rejected_by_ScientistF', 'Reject Audit')],
+        )
+
+        self.client.force_login(self.auditor)
+        url = reverse('audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        # Not the auditor's move yet: the request is still with the MeitY reviewer.
+        self.client.post(url, {'update_status': '1', 'status': 'Audit_Completed_by_STQC'})
+        self.assertEqual(AuditRequest.objects.get(pk=self.audit_request.pk).status, 'Submitted_by_CSP')
+
+        self.client.force_login(self.reviewer)
+        response = self.client.post(url, {'update_status': '1', 'status': 'Forwarded_to_STQC'})
+        self.assertRedirects(response, reverse('audit_request_list'), fetch_redirect_response=False)
+        self.assertEqual(AuditRequest.objects.get(pk=self.audit_request.pk).status, 'Forwarded_to_STQC')
+        self.assertEqual(Remark.objects.filter(audit_request=self.audit_request).count(), 1)
+
+
+class StatusHistoryTests(TestCase):
+    """
+    Checks that every transition appends a status event with its dwell time, and that the
+    stage analytics report percentiles from those events.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='csp', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+
+    def create_request(self, submitted_ago):
+        audit_request = AuditRequest.objects.create(
+            csp=self.csp, service_provider_name='Provider', data_center_location='Pune',
+        )
+        AuditRequest.objects.filter(pk=audit_request.pk).update(
+            status_changed_at=timezone.now() - submitted_ago,
+        )
+        return AuditRequest.objects.get(pk=audit_request.pk)
+
+    def test_transitions_record_events_with_dwell(self):
+        audit_request = self.create_request(timedelta(hours=5))
+        apply_transition(self.reviewer, audit_request, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        apply_transition(self.auditor, audit_request, 'Forwarded_to_STQC', 'Audit_Completed_by_STQC')
+
+        first, second = audit_request.status_events.all()
+        self.assertEqual((first.from_status, first.to_status, first.actor), ('Submitted_by_CSP', 'Forwarded_to_STQC', self.reviewer))
+        self.assertAlmostEqual(first.dwell.total_seconds(), 5 * 3600, delta=60)
+        self.assertEqual(second.from_status, 'Forwarded_to_STQC')
+        self.assertLess(second.dwell, timedelta(minutes=1))
+        self.assertEqual(AuditRequest.objects.get(pk=audit_request.pk).status_changed_at, second.created_at)
+
+    def test_bulk_transition_records_an_event_per_request(self):
+        requests = [self.create_request(timedelta(hours=hours)) for hours in (1, 2)]
+        bulk_transition(self.reviewer, [audit_request.pk for audit_request in requests], 'Forwarded_to_STQC')
+        events = AuditStatusEvent.objects.order_by('dwell')
+        self.assertEqual([event.audit_request_id for event in events], [audit_request.pk for audit_request in requests])
+        self.assertAlmostEqual(events[1].dwell.total_seconds(), 2 * 3600, delta=60)
+        self.assertEqual(expected_buckets(), stored_buckets())
+
+    def test_deleting_a_request_removes_its_dwell_counts(self):
+        kept, deleted = self.create_request(timedelta(hours=1)), self.create_request(timedelta(hours=3))
+        for audit_request in (kept, deleted):
+            apply_transition(self.reviewer, audit_request, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        deleted.delete()
+        self.assertEqual(AuditStatusEvent.objects.get().audit_request_id, kept.pk)
+        self.assertEqual(expected_buckets(), stored_buckets())
+
+    def test_stage_percentiles_and_access(self):
+        for hours in range(1, 11):
+            apply_transition(
+                self.reviewer, self.create_request(timedelta(hours=hours)), 'Submitted_by_CSP', 'Forwarded_to_STQC',
+            )
+        audit_request = self.create_request(timedelta(0))
+        with CaptureQueriesContext(connection) as ctx:
+            stages = {stage['status']: stage for stage in stage_dwell_times(percentiles=(50, 90))}
+        # One histogram read plus one index lookup per stage, however long the history.
+        self.assertEqual(len(ctx.captured_queries), 1 + len(stages))
+        submitted = stages['Submitted_by_CSP']
+        self.assertEqual(submitted['transitions'], 10)
+        # Read from the histogram, so within a bucket's width of the exact nearest-rank values.
+        self.assertAlmostEqual(submitted['dwell_seconds']['p50'], 5 * 3600, delta=5 * 3600 * 0.045)
+        self.assertAlmostEqual(submitted['dwell_seconds']['p90'], 9 * 3600, delta=9 * 3600 * 0.045)
+        self.assertEqual(expected_buckets(), stored_buckets())
+        self.assertEqual(submitted['oldest_waiting_since'], audit_request.status_changed_at)
+        self.assertEqual(stages['Forwarded_to_STQC']['dwell_seconds'], {'p50': None, 'p90': None})
+
+        client = APIClient()
+        client.force_authenticate(self.csp)
+        self.assertEqual(client.get(reverse('api_stage_dwell_times')).status_code, 403)
+        client.force_authenticate(self.reviewer)
+        response = client.get(reverse('api_stage_dwell_times'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [stage['status'] for stage in response.data['stages']],
+            ['Submitted_by_CSP', 'Forwarded_to_STQC', 'Audit_Completed_by_STQC'],
+        )
+
+
+class DashboardStatsTests(TestCase):
+    """
+    Checks that the dashboard summary table follows creates, transitions, edits and deletes
+    exactly, and that each role's stats cover the requests its worklist shows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.aws = CustomUser.objects.create_user(username='aws', password='pass', role='CSP', organization='AWS')
+        cls.yotta = CustomUser.objects.create_user(username='yotta', password='pass', role='CSP', organization='Yotta')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+
+    def create_request(self, csp, location):
+        return AuditRequest.objects.create(csp=csp, service_provider_name='Provider', data_center_location=location)
+
+    def stats_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(reverse('api_dashboard_stats'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_follow_every_change(self):
+        pune, chennai, mumbai = (
+            self.create_request(self.aws, 'Pune'), self.create_request(self.aws, 'Chennai'),
+            self.create_request(self.yotta, 'Mumbai'),
+        )
+        apply_transition(self.reviewer, pune, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        bulk_transition(self.reviewer, [chennai.pk, mumbai.pk], 'Forwarded_to_STQC')
+        apply_transition(self.auditor, AuditRequest.objects.get(pk=mumbai.pk), 'Forwarded_to_STQC', 'Audit_Completed_by_STQC')
+        chennai = AuditRequest.objects.get(pk=chennai.pk)
+        chennai.data_center_location = 'Hyderabad'
+        chennai.save()
+        self.create_request(self.yotta, 'Pune').delete()
+
+        self.assertEqual(stored_counts(), expected_counts())
+
+    def test_stats_are_scoped_to_the_role(self):
+        for location in ('Pune', 'Pune', 'Chennai'):
+            self.create_request(self.aws, location)
+        forwarded = self.create_request(self.yotta, 'Mumbai')
+        apply_transition(self.reviewer, forwarded, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+
+        everything = self.stats_for(self.reviewer)
+        self.assertEqual(everything['total'], 4)
+        self.assertEqual(
+            {row['status']: row['count'] for row in everything['by_status']},
+            {'Submitted_by_CSP': 3, 'Forwarded_to_STQC': 1, 'Audit_Completed_by_STQC': 0,
+             'Approved_by_ScientistF': 0, 'Rejected_by_ScientistF': 0},
+        )
+        self.assertEqual(
+            everything['by_data_center'],
+            [{'data_center': 'Chennai', 'count': 1}, {'data_center': 'Mumbai', 'count': 1},
+             {'data_center': 'Pune', 'count': 2}],
+        )
+        self.assertEqual(
+            everything['by_organization'], [{'organization': 'AWS', 'count': 3}, {'organization': 'Yotta', 'count': 1}],
+        )
+
+        own = self.stats_for(self.aws)
+        self.assertEqual(own['total'], 3)
+        self.assertEqual(own['by_organization'], [{'organization': 'AWS', 'count': 3}])
+
+        stqc = self.stats_for(self.auditor)
+        self.assertEqual(stqc['total'], 1)
+        self.assertEqual(stqc['by_status'], [
+            {'status': 'Forwarded_to_STQC', 'status_display': 'Forwarded to STQC for Audit', 'count': 1},
+        ])
+        self.assertEqual(stqc['by_data_center'], [{'data_center': 'Mumbai', 'count': 1}])
+
+        call_command('rebuild_dashboard_counts', '--check', stdout=StringIO())
+
+
+class WorkflowEventStreamTests(TestCase):
+    """
+    Checks that workflow changes are logged for the event stream, that each role sees only
+    its own share of them, and that the stream replays missed events and delivers new ones.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.aws = CustomUser.objects.create_user(username='aws', password='pass', role='CSP')
+        cls.yotta = CustomUser.objects.create_user(username='yotta', password='pass', role='CSP')
+        cls.reviewer = CustomUser.objects.create_user(username='meity', password='pass', role='MeitY_Reviewer')
+        cls.auditor = CustomUser.objects.create_user(username='stqc', password='pass', role='STQC_Auditor')
+
+    def create_request(self, csp):
+        return AuditRequest.objects.create(csp=csp, service_provider_name='Provider', data_center_location='Pune')
+
+    def test_changes_are_logged(self):
+        single, bulk = self.create_request(self.aws), self.create_request(self.yotta)
+        apply_transition(self.reviewer, single, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        bulk_transition(self.reviewer, [bulk.pk], 'Forwarded_to_STQC')
+        remark = Remark.objects.create(audit_request=single, author=self.auditor, comment='Site visit booked.')
+
+        self.assertEqual(
+            list(WorkflowEvent.objects.values_list('kind', 'audit_request', 'status', 'from_status', 'object_id')),
+            [
+                ('request_created', single.pk, 'Submitted_by_CSP', '', None),
+                ('request_created', bulk.pk, 'Submitted_by_CSP', '', None),
+                ('status_changed', single.pk, 'Forwarded_to_STQC', 'Submitted_by_CSP', None),
+                ('remark_added', single.pk, 'Forwarded_to_STQC', '', single.remarks.earliest('timestamp').pk),
+                ('status_changed', bulk.pk, 'Forwarded_to_STQC', 'Submitted_by_CSP', None),
+                ('remark_added', bulk.pk, 'Forwarded_to_STQC', '', bulk.remarks.get().pk),
+                ('remark_added', single.pk, 'Forwarded_to_STQC', '', remark.pk),
+            ],
+        )
+
+    def test_events_are_scoped_to_the_role(self):
+        own, other = self.create_request(self.aws), self.create_request(self.yotta)
+        apply_transition(self.reviewer, other, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+
+        for user, expected in (
+            (self.aws, {own.pk}), (self.reviewer, {own.pk, other.pk}), (self.auditor, {other.pk}),
+        ):
+            visible = list(stream.visible_events(user))
+            self.assertEqual({event.audit_request_id for event in visible}, expected)
+            self.assertTrue(all(stream.is_visible(user, event) for event in visible))
+        self.assertFalse(any(stream.is_visible(self.auditor, event) for event in own.workflow_events.all()))
+
+    def test_format_event(self):
+        audit_request = self.create_request(self.aws)
+        event = audit_request.workflow_events.get()
+        self.assertEqual(
+            stream.format_event(event),
+            f'id: {event.pk}\nevent: request_created\ndata: {{"id": {event.pk}, "type": "request_created", '
+            f'"audit_request": {audit_request.pk}, "status": "Submitted_by_CSP", "from_status": null, '
+            f'"object_id": null, "at": "{event.created_at.isoformat()}"}}\n\n',
+        )
+
+    async def test_stream_requires_authentication_and_a_numeric_event_id(self):
+        self.assertEqual((await self.async_client.get(reverse('api_event_stream'))).status_code, 401)
+        await self.async_client.aforce_login(self.aws)
+        response = await self.async_client.get(reverse('api_event_stream'), headers={'Last-Event-ID': 'latest'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_refuses_wsgi(self):
+        self.client.force_login(self.aws)
+        response = self.client.get(reverse('api_event_stream'))
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response.json()['detail'], str(StreamRequiresASGI.default_detail))
+
+    @patch.object(stream, 'POLL_BATCH', 5)
+    async def test_hub_reads_past_a_gap_larger_than_a_batch(self):
+        for _ in range(12):
+            await sync_to_async(self.create_request)(self.aws)
+        ids = [pk async for pk in WorkflowEvent.objects.order_by('pk').values_list('pk', flat=True)]
+        # The second event stands in for an insert not committed yet.
+        pending = await WorkflowEvent.objects.aget(pk=ids[1])
+        await pending.adelete()
+        pending.pk = ids[1]
+
+        hub, queue = stream.EventHub(), asyncio.Queue()
+        hub.subscribers.add(queue)
+        hub.cursor = hub.high = ids[0] - 1
+        for _ in range(3):
+            await hub.poll()
+        delivered = [event.pk for _ in range(queue.qsize()) for event in queue.get_nowait()]
+        self.assertEqual(delivered, ids[:1] + ids[2:])
+        self.assertEqual(hub.cursor, ids[0]) # Held before the gap
+
+        await pending.asave(force_insert=True) # The insert commits.
+        await hub.poll()
+        self.assertEqual([event.pk for event in queue.get_nowait()], [ids[1]])
+        self.assertEqual((hub.cursor, hub.delivered), (ids[-1], {}))
+
+    @patch.object(stream, 'POLL_INTERVAL', 0.01)
+    async def test_stream_replays_missed_events_then_delivers_new_ones(self):
+        seen = await sync_to_async(self.create_request)(self.aws)
+        missed = await sync_to_async(self.create_request)(self.aws)
+        await sync_to_async(self.create_request)(self.yotta) # Not the CSP's own
+        last_event_id = (await seen.workflow_events.aget()).pk
+
+        events = stream.event_stream(self.aws, last_event_id)
+        try:
+            self.assertEqual(await anext(events), f"retry: {stream.RETRY_MS}\n\n")
+            self.assertIn(f'"audit_request": {missed.pk}', await anext(events))
+            # The hub starts from the latest event, so the new one arrives once, live.
+            await asyncio.sleep(0.05)
+            new = await sync_to_async(self.create_request)(self.aws)
+            self.assertIn(f'"audit_request": {new.pk}', await asyncio.wait_for(anext(events), 5))
+        finally:
+            await events.aclose()
+            await stream.get_hub().task
+
+
+    @patch.object(stream, 'BACKLOG_LIMIT', 2)
+    @patch.object(stream, 'POLL_INTERVAL', 0.01)
+    async def test_client_too_far_behind_is_told_to_resync(self):
+        seen = await sync_to_async(self.create_request)(self.aws)
+        for _ in range(3):
+            await sync_to_async(self.create_request)(self.aws)
+        latest = (await WorkflowEvent.objects.alatest('pk')).pk
+
+        events = stream.event_stream(self.aws, (await seen.workflow_events.aget()).pk)
+        try:
+            await anext(events)
+            self.assertEqual(await anext(events), stream.format_resync(latest))
+            # Nothing from the skipped backlog follows; the next event is a new one.
+            await asyncio.sleep(0.05)
+            new = await sync_to_async(self.create_request)(self.aws)
+            self.assertIn(f'"audit_request": {new.pk}', await asyncio.wait_for(anext(events), 5))
+        finally:
+            await events.aclose()
+            await stream.get_hub().task
+
+class AsyncReadViewTests(TestCase):
+    """
+    Checks that the async list, detail and stats views answer exactly as their DRF
+    counterparts do, for every role, including the error and conditional responses.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: CustomUser.objects.create_user(username=role.lower(), password='pass', role=role, organization='Org')
+            for role, _ in CustomUser.ROLE_CHOICES
+        }
+        cls.other_csp = CustomUser.objects.create_user(username='other', password='pass', role='CSP')
+        reviewer = cls.users['MeitY_Reviewer']
+        for index in range(12):
+            csp = cls.users['CSP'] if index % 3 else cls.other_csp
+            audit_request = AuditRequest.objects.create(
+                csp=csp, service_provider_name=f'Provider {index}', data_center_location='Pune',
+            )
+            Remark.objects.create(audit_request=audit_request, author=reviewer, comment='Received.')
+            Document.objects.create(
+                audit_request=audit_request, uploaded_by=csp, document_type='Other', file='audit_documents/a.pdf',
+            )
+            if index % 2:
+                apply_transition(reviewer, audit_request, 'Submitted_by_CSP', 'Forwarded_to_STQC')
+        cls.own = AuditRequest.objects.filter(csp=cls.users['CSP']).first()
+        cls.foreign = AuditRequest.objects.filter(csp=cls.other_csp).first()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_list_and_stats_match_the_sync_views(self):
+        for role, user in self.users.items():
+            client = self.client_for(user)
+            with self.subTest(role=role):
+                sync_page, async_page = (
+                    client.get(reverse(name), {'page_size': 5}).json()
+                    for name in ('api_audit_request_list_create', 'api_audit_request_list_async')
+                )
+                self.assertEqual(async_page['results'], sync_page['results'])
+                self.assertEqual(async_page['next'] is None, sync_page['next'] is None)
+                if async_page['next']:
+                    following = client.get(async_page['next']).json()
+                    self.assertEqual(following['results'], client.get(sync_page['next']).json()['results'])
+                self.assertEqual(
+                    client.get(reverse('api_dashboard_stats_async')).content,
+                    client.get(reverse('api_dashboard_stats')).content,
+                )
+
+    def test_detail_matches_the_sync_view(self):
+        client = self.client_for(self.users['CSP'])
+        sync_response = client.get(reverse('api_audit_request_detail', kwargs={'pk': self.own.pk}))
+        async_url = reverse('api_audit_request_detail_async', kwargs={'pk': self.own.pk})
+        async_response = client.get(async_url)
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        self.assertEqual(client.get(async_url, HTTP_IF_NONE_MATCH=async_response['ETag']).status_code, 304)
+
+        foreign_url = reverse('api_audit_request_detail_async', kwargs={'pk': self.foreign.pk})
+        self.assertEqual(client.get(foreign_url).status_code, 403)
+        self.assertEqual(
+            client.get(reverse('api_audit_request_detail_async', kwargs={'pk': 0})).json(),
+            {'detail': 'No AuditRequest matches the given query.'},
+        )
+
+    def test_requires_authentication_and_get(self):
+        anonymous = APIClient().get(reverse('api_audit_request_list_async'))
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous.json(), {'detail': 'Authentication credentials were not provided.'})
+        self.assertIn('Bearer', anonymous['WWW-Authenticate'])
+        bad_token = APIClient(HTTP_AUTHORIZATION='Bearer nonsense').get(reverse('api_dashboard_stats_async'))
+        self.assertEqual(bad_token.status_code, 401)
+        self.assertEqual(self.client_for(self.users['CSP']).post(reverse('api_audit_request_list_async')).status_code, 405)
+
+
+class RoleClaimsAuthenticationTests(TestCase):
+    """
+    Checks that tokens carry the role claims, that API reads authorize from them without
+    loading the user, and that writes use a cached user row (when the cache is shared)
+    that follows changes to the user.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(
+            username='aws', password='pass', role='CSP', organization='AWS', email='ops@aws.example',
+        )
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Pune',
+        )
+
+    def setUp(self):
+        forget_user(self.csp.pk)
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'aws', 'password': 'pass'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def api_client(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def user_queries(self, ctx):
+        return [query for query in ctx.captured_queries if query['sql'].startswith('SELECT "users_customuser"')]
+
+    def test_tokens_carry_the_role_claims(self):
+        access = AccessToken(self.login()['access'])
+        self.assertEqual(
+            (access['username'], access['role'], access['organization']), ('aws', 'CSP', 'AWS'),
+        )
+
+    def test_reads_do_not_load_the_user(self):
+        client = self.api_client(self.login()['access'])
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user_queries(ctx), [])
+
+        # Tokens issued without the claims still work, from the user row.
+        legacy = self.api_client(RefreshToken.for_user(self.csp).access_token)
+        self.assertEqual(legacy.get(reverse('api_dashboard_stats')).data['total'], 1)
+        # The profile endpoint needs the whole row.
+        self.assertEqual(client.get(reverse('api_user_detail')).data['email'], 'ops@aws.example')
+
+    @patch('users.authentication.USER_CACHE_TTL', 60)
+    def test_writes_use_the_cached_user_until_it_changes(self):
+        client = self.api_client(self.login()['access'])
+        url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        with CaptureQueriesContext(connection) as first:
+            client.patch(url, {'description': 'First.'}, format='json')
+        with CaptureQueriesContext(connection) as second:
+            client.patch(url, {'description': 'Second.'}, format='json')
+        self.assertEqual(len(self.user_queries(first)), 1)
+        self.assertEqual(len(second.captured_queries), len(first.captured_queries) - 1)
+
+        self.csp.is_active = False
+        self.csp.save()
+        self.assertEqual(client.patch(url, {'description': 'Third.'}, format='json').status_code, 401)
+
+    def test_refresh_reissues_current_claims(self):
+        refresh = self.login()['refresh']
+        self.csp.organization = 'Amazon Web Services'
+        self.csp.save()
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(AccessToken(response.json()['access'])['organization'], 'Amazon Web Services')
+
+
+class ReplicaRoutingTests(TestCase):
+    """
+    Checks the read-replica router: list, detail and reporting reads go to a replica,
+    while writes, reads after a write and user lookups stay on the primary. The test
+    database has no replica, so the replica chosen is stood in for by 'default' and
+    routing is observed through the choice being made.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.csp = CustomUser.objects.create_user(username='aws', password='pass', role='CSP', organization='AWS')
+        cls.audit_request = AuditRequest.objects.create(
+            csp=cls.csp, service_provider_name='Provider', data_center_location='Pune',
+        )
+
+    def setUp(self):
+        cache.delete(routers.pin_key(self.csp.pk))
+        bump_version() # So list pages are built, not served from an earlier test's cache
+        self.client_api = APIClient()
+        self.client_api.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(self.csp).access_token}')
+        patcher = patch.object(routers, 'REPLICAS', ['replica1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        chooser = patch.object(routers.random, 'choice', return_value='default')
+        self.choice = chooser.start()
+        self.addCleanup(chooser.stop)
+
+    def read_from_replica(self, response_for):
+        self.choice.reset_mock()
+        self.assertEqual(response_for().status_code, 200)
+        return self.choice.called
+
+    def test_router_decisions(self):
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(AuditRequest), 'default') # Outside a request
+        state = routers.RoutingState()
+        token = routers.routing.set(state)
+        try:
+            self.assertEqual(router.db_for_read(AuditRequest), 'default') # View did not allow replicas
+            state.replica = True
+            self.assertEqual(router.db_for_read(AuditRequest), 'default') # Stand-in for the replica
+            self.assertTrue(self.choice.called)
+            self.choice.reset_mock()
+            self.assertEqual(router.db_for_read(CustomUser), 'default')
+            self.assertFalse(self.choice.called)
+            self.assertEqual(router.db_for_write(AuditRequest), 'default')
+            router.db_for_read(AuditRequest)
+            self.assertFalse(self.choice.called) # The request has written
+        finally:
+            routers.routing.reset(token)
+        self.assertTrue(router.allow_migrate('default', 'audit_management'))
+        self.assertFalse(router.allow_migrate('replica1', 'audit_management'))
+
+    def test_list_detail_and_reporting_reads_use_a_replica(self):
+        detail = {'pk': self.audit_request.pk}
+        for name, kwargs in [
+            ('api_audit_request_detail', detail), ('api_dashboard_stats', {}),
+            ('api_audit_request_detail_async', detail), ('api_dashboard_stats_async', {}),
+        ]:
+            with self.subTest(name=name):
+                self.assertTrue(self.read_from_replica(lambda: self.client_api.get(reverse(name, kwargs=kwargs))))
+        # The HTML list caches only ids (built on the primary) and reads the rows from a replica.
+        self.client.force_login(self.csp)
+        self.assertTrue(self.read_from_replica(lambda: self.client.get(reverse('audit_request_list'))))
+        # Views not opted in read from the primary.
+        self.assertFalse(self.read_from_replica(lambda: self.client_api.get(reverse('api_user_detail'))))
+
+    def test_writer_reads_from_the_primary_until_the_pin_expires(self):
+        url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+        self.choice.reset_mock()
+        self.assertEqual(self.client_api.patch(url, {'description': 'Updated.'}, format='json').status_code, 200)
+        self.assertFalse(self.choice.called)
+        self.assertTrue(routers.is_pinned(self.csp))
+        self.assertFalse(self.read_from_replica(lambda: self.client_api.get(url)))
+
+        cache.delete(routers.pin_key(self.csp.pk))
+        self.assertTrue(self.read_from_replica(lambda: self.client_api.get(url)))
+
+    @patch('audit_management.cache.WORKLIST_CACHE_ENABLED', True)
+    def test_cached_pages_are_built_on_the_primary(self):
+        for name in ('api_audit_request_list_create', 'api_audit_request_list_async'):
+            with self.subTest(name=name):
+                bump_version()
+                self.assertFalse(self.read_from_replica(lambda: self.client_api.get(reverse(name))))
+
+    @patch('audit_management.cache.WORKLIST_CACHE_ENABLED', True)
+    def test_pinned_writer_never_gets_a_replica_built_page(self):
+        writer, reader = (
+            CustomUser.objects.create_user(username=name, password='pass', role='Scientist_F')
+            for name in ('scientist', 'colleague')
+        )
+        clients = {}
+        for user in (writer, reader):
+            clients[user] = APIClient()
+            clients[user].credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        url = reverse('api_audit_request_list_create')
+        # The writer's change: committed on the primary, version bumped, writer pinned.
+        AuditRequest.objects.filter(pk=self.audit_request.pk).update(data_center_location='Chennai')
+        bump_version()
+        cache.set(routers.pin_key(writer.pk), 1)
+
+        # The reader may read replicas, and misses the cache under the bumped version, but
+        # builds the shared page on the primary; the pinned writer is then served that page.
+        self.assertFalse(self.read_from_replica(lambda: clients[reader].get(url)))
+        with self.assertNumQueries(0):
+            response = clients[writer].get(url)
+        self.assertEqual(response.data['results'][0]['data_center_location'], 'Chennai')
+
+    def test_without_replicas_nothing_is_pinned(self):
+        with patch.object(routers, 'REPLICAS', []):
+            url = reverse('api_audit_request_detail', kwargs={'pk': self.audit_request.pk})
+            self.client_api.patch(url, {'description': 'Updated.'}, format='json')
+            self.assertFalse(routers.is_pinned(self.csp))
+            self.client_api.get(reverse('api_audit_request_list_create'))
+        self.assertFalse(self.choice.called)
@@ -0,0 +1,100 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/uploads.py
+# Description: File handling for resumable chunked uploads: in-place chunk writes, checksums and assembly.
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+
+# Bytes read from the request or disk per iteration; bounds memory use regardless of chunk or file size.
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Chunk size offered to clients that do not ask for one, and the largest accepted.
+DEFAULT_CHUNK_SIZE = getattr(settings, 'AUDIT_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+MAX_CHUNK_SIZE = getattr(settings, 'AUDIT_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024)
+# Most chunks a session may be split into.
+MAX_CHUNKS = 10000
+# Largest file accepted through an upload session.
+MAX_UPLOAD_SIZE = getattr(settings, 'AUDIT_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+# Sessions untouched for this long are removed by `purge_upload_sessions` (seconds).
+UPLOAD_SESSION_TTL = getattr(settings, 'AUDIT_UPLOAD_SESSION_TTL', 24 * 60 * 60)
+
+PARTIAL_UPLOAD_DIR = 'upload_sessions'
+
+
+class ChunkError(Exception):
+    """
+    Raised when a received chunk does not match its expected size or checksum.
+    """
+
+
+class AssembledUpload(File):
+    """
+    A completed partial file. Exposing `temporary_file_path` lets FileSystemStorage
+    move it into place instead of copying it, as it does for Django's own
+    TemporaryUploadedFile.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def partial_path(session):
+    """
+    Returns the absolute path of the partial file a session's chunks are written into.
+    """
+    return os.path.join(settings.MEDIA_ROOT, PARTIAL_UPLOAD_DIR, f"{session.pk}.part")
+
+
+def create_partial_file(session):
+    """
+    Creates the partial file, sized to the final length so chunks can arrive in any order.
+    """
+    path = partial_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.truncate(session.total_size)
+
+
+def remove_partial_file(session):
+    try:
+        os.remove(partial_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def write_chunk(session, index, stream, expected_sha256):
+    """
+    Streams one chunk from `stream` into its offset in the partial file, hashing as it
+    goes. Returns (size, sha256) or raises ChunkError if either does not match.
+    A rejected chunk may leave bytes at its offset; they are overwritten when it is resent.
+    """
+    expected_size = session.expected_chunk_size(index)
+    digest = hashlib.sha256()
+    size = 0
+    with open(partial_path(session), 'r+b') as fh:
+        fh.seek(index * session.chunk_size)
+        for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+            size += len(block)
+            if size > expected_size:
+                # Never spill into the next chunk's bytes.
+                raise ChunkError(f"Chunk {index} must be {expected_size} bytes; received more.")
+            digest.update(block)
+            fh.write(block)
+
+    if size != expected_size:
+        raise ChunkError(f"Chunk {index} must be {expected_size} bytes; received {size}.")
+    if digest.hexdigest() != expected_sha256.lower():
+        raise ChunkError(f"Chunk {index} does not match its SHA-256 checksum.")
+    return size, digest.hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
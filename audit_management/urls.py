@@ -11,6 +11,7 @@ urlpatterns = [
     #path('audit-requests/', views.audit_request_list, name='audit_request_list'),
     path('requests/', views.audit_request_list, name='audit_request_list'),
     path('audit-requests/<int:pk>/', views.audit_request_detail, name='audit_request_detail'),
+    path('search/', views.search_audit_requests, name='audit_search'),
     
     path('documents/<int:pk>/delete/', views.delete_document, name='delete_document'), # New URL for document deletion
 ]
@@ -4,16 +4,34 @@
 # Description: Handles audit request creation, listing, detail views, document uploads, remarks, and status updates, including document deletion.
 
 
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.db.models import Q # For complex queries
+from django.http import Http404
+from django.views.decorators.http import require_http_methods, require_POST, require_safe
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 # Removed JsonResponse and render_to_string for non-AJAX approach
 
+from .cache import cached_worklist_page
 from .forms import AuditRequestForm, DocumentUploadForm, RemarkForm, AuditRequestStatusUpdateForm
 from .models import AuditRequest, Document, Remark
+from .search import excerpt, search
+from .workflow import TransitionConflict, TransitionNotAllowed, apply_transition, available_transitions
+from meity_audit_portal.routers import replica_reads
 from users.models import CustomUser # Import CustomUser to check roles
 
+logger = logging.getLogger(__name__)
+
+# Title and button text of the status form on the detail page, per role.
+STATUS_FORM_TEXT = {
+    'MeitY_Reviewer': ("Action: Forward to STQC for Audit", "Forward to STQC"),
+    'STQC_Auditor': ("Action: Mark Audit as Completed", "Mark Audit Completed"),
+    'Scientist_F': ("Action: Finalize Audit Decision", "Finalize Decision"),
+}
+
 # Helper functions for role-based access checks
 def is_csp(user):
     """Checks if the user is a Cloud Service Provider."""
@@ -35,6 +53,7 @@ def is_meity_or_stqc_or_scientist_f(user):
     """Checks if the user is any of the reviewing/auditing roles."""
     return user.is_meity_reviewer or user.is_stqc_auditor or user.is_scientist_f
 
+@require_http_methods(['GET', 'HEAD', 'POST'])
 @login_required
 @user_passes_test(is_csp, login_url='dashboard') # Only CSPs can create requests
 def create_audit_request(request):
@@ -67,43 +86,78 @@ def create_audit_request(request):
         form = AuditRequestForm() # Empty form for GET request
     return render(request, 'audit_management/create_audit_request.html', {'form': form})
 
+def worklist_page(request, name, queryset, cursor_param='cursor'):
+    """
+    Returns (rows, pager) for the page of a cached role worklist named by the request's
+    `cursor_param`; pager holds the URLs of the next and previous pages (None at either end).
+    Other query parameters, such as another list's cursor, are kept in those URLs.
+    """
+    try:
+        rows, next_token, previous_token = cached_worklist_page(
+            request.user, name, queryset, request.GET.get(cursor_param),
+        )
+    except ValueError:
+        raise Http404("Invalid cursor")
+    url = request.get_full_path()
+    pager = {
+        'next': replace_query_param(url, cursor_param, next_token) if next_token else None,
+        'previous': None,
+    }
+    if previous_token is not None:
+        pager['previous'] = (
+            replace_query_param(url, cursor_param, previous_token) if previous_token
+            else remove_query_param(url, cursor_param)
+        )
+    return rows, pager
+
+
+@require_safe
 @login_required
+@replica_reads # GET reads from a replica unless the user has just written
 def audit_request_list(request):
     """
     Displays a list of audit requests relevant to the logged-in user's role.
     Filters requests based on role-specific access permissions.
     """
-    # Initialize querysets as empty
-    pending_requests = AuditRequest.objects.none()
-    reviewed_requests = AuditRequest.objects.none()
+    # Initialize lists as empty
+    pending_requests = []
+    reviewed_requests = []
+    audit_requests_pager = pending_pager = reviewed_pager = None
     
     # Start with all audit requests for generic filtering, then apply role-specific logic
     audit_requests_all = AuditRequest.objects.all()
 
-    # Apply role-based filtering
+    # Apply role-based filtering. Each worklist is shown a page of WORKLIST_LIMIT requests at a time,
+    # most recently updated first; the ids on each page are cached per role scope, and any change to
+    # a request, remark or document invalidates the cache (see signals.py).
     if request.user.is_csp:
         # CSPs see only their own submitted requests
-        audit_requests = audit_requests_all.filter(csp=request.user)
+        audit_requests, audit_requests_pager = worklist_page(
+            request, 'html_list', audit_requests_all.filter(csp=request.user)
+        )
     elif request.user.is_meity_reviewer:
         # MeitY Reviewers see requests ready for their review (Submitted by CSP)
-        pending_requests = audit_requests_all.filter(status='Submitted_by_CSP')
+        pending_requests, pending_pager = worklist_page(
+            request, 'html_pending', audit_requests_all.filter(status='Submitted_by_CSP'), 'pending_cursor'
+        )
         # MeitY Reviewers also see requests they've already "reviewed" (i.e., forwarded or moved past their stage)
-        reviewed_requests = audit_requests_all.filter(
-            Q(status='Forwarded_to_STQC') | 
-            Q(status='Audit_Completed_by_STQC') |
-            Q(status='Approved_by_ScientistF') |
-            Q(status='Rejected_by_ScientistF')
+        reviewed_requests, reviewed_pager = worklist_page(
+            request, 'html_reviewed', audit_requests_all.filter(
+                Q(status='Forwarded_to_STQC') | 
+                Q(status='Audit_Completed_by_STQC') |
+                Q(status='Approved_by_ScientistF') |
+                Q(status='Rejected_by_ScientistF')
+            ), 'reviewed_cursor'
         )
         audit_requests = pending_requests # Default list for display if not explicitly handled
     elif request.user.is_stqc_auditor:
         # STQC Auditors see requests forwarded to them for audit
-        audit_requests = audit_requests_all.filter(status='Forwarded_to_STQC')
-        print(f"STQC Auditor: Filtering for status 'Forwarded_to_STQC'. Found {audit_requests.count()} requests.") # DEBUG
-        for req in audit_requests: # DEBUG
-            print(f"  - Request ID: {req.id}, Current Status: {req.status}") # DEBUG
+        audit_requests, audit_requests_pager = worklist_page(
+            request, 'html_list', audit_requests_all.filter(status='Forwarded_to_STQC')
+        )
     elif request.user.is_scientist_f:
         # Scientist F sees all requests, no additional filtering applied
-        audit_requests = audit_requests_all # Scientist F views all requests
+        audit_requests, audit_requests_pager = worklist_page(request, 'html_list', audit_requests_all)
     else:
         # Should ideally not be reached due to @login_required and role checks,
         # but provides a safe fallback for unrecognized roles.
@@ -114,10 +168,14 @@ def audit_request_list(request):
         'audit_requests': audit_requests, # This remains the main list for non-MeitY roles
         'pending_requests': pending_requests, # Specific for MeitY reviewer
         'reviewed_requests': reviewed_requests, # Specific for MeitY reviewer
+        'audit_requests_pager': audit_requests_pager, # Next/previous page links of each list
+        'pending_pager': pending_pager,
+        'reviewed_pager': reviewed_pager,
     }
     return render(request, 'audit_management/audit_request_list.html', context)
 
 
+@require_http_methods(['GET', 'HEAD', 'POST'])
 @login_required
 def audit_request_detail(request, pk):
     """
@@ -126,8 +184,6 @@ def audit_request_detail(request, pk):
     with forms displayed conditionally based on user role and request status.
     Uses traditional form submissions (full page reload).
     """
-    audit_request = get_object_or_404(AuditRequest, pk=pk)
-
     # Initialize forms
     remark_form = RemarkForm()
     document_form = DocumentUploadForm()
@@ -137,6 +193,8 @@ def audit_request_detail(request, pk):
 
     # Handle POST requests
     if request.method == 'POST':
+        # Fetch the request once for the POST handlers; every branch below redirects.
+        audit_request = get_object_or_404(AuditRequest, pk=pk)
         print(f"POST request received for Audit Request {pk}. Action: {list(request.POST.keys())}") # DEBUG
         # Determine which form was submitted based on the button's 'name' attribute
         if 'add_remark' in request.POST:
@@ -190,94 +248,46 @@ def audit_request_detail(request, pk):
 
 
         elif 'update_status' in request.POST:
-            print(f"Update Status initiated by {request.user.username} ({request.user.role}) for request {pk}.") # DEBUG
-            # Re-fetch the audit_request instance from the database
-            # to ensure we are working with the most current status.
-            audit_request = get_object_or_404(AuditRequest, pk=pk)
-            print(f"Current Audit Request Status from DB: {audit_request.status}") # DEBUG
-            status_form = AuditRequestStatusUpdateForm(request.POST, instance=audit_request, user=request.user, current_status=audit_request.status)
-            
-            print(f"Status Form is valid: {status_form.is_valid()}") # DEBUG
+            logger.debug("Status update by %s (%s) for audit request %s.", request.user.username, request.user.role, pk)
+            # Read before validating: the model form writes the submitted status onto the instance.
+            current_status = audit_request.status
+            status_form = AuditRequestStatusUpdateForm(request.POST, instance=audit_request, user=request.user, current_status=current_status)
+
             if status_form.is_valid():
                 new_status = status_form.cleaned_data['status']
-                print(f"New Status selected in form: {new_status}") # DEBUG
-                
-                can_update = False
-                success_message = ""
-                remark_text = ""
-
-                # Server-side validation for status transitions based on role and current status
-                if request.user.is_meity_reviewer:
-                    if audit_request.status == 'Submitted_by_CSP' or audit_request.status == 'Forwarded_to_STQC' and new_status == 'Forwarded_to_STQC': # RECTIFIED THE BUG OF STATUS CHANGE WITH KEEPING OR
-                        can_update = True
-                        success_message = 'Audit request successfully forwarded to STQC for auditing!'
-                        remark_text = f"MeitY Reviewer forwarded request to STQC. Status changed to '{AuditRequest.STATUS_CHOICES[1][1]}'."
-                        print(f"MeitY Reviewer: Conditions met for forwarding. Can update = {can_update}") # DEBUG
-                    else:
-                        messages.error(request, f'MeitY Reviewers can only forward requests in "Submitted by CSP" status. This request is currently in "{audit_request.get_status_display()}" status. Cannot forward.')
-                        print(f"MeitY Reviewer: Conditions NOT met. Current status: {audit_request.status}, New status requested: {new_status}") # DEBUG
-                        
-                elif request.user.is_stqc_auditor:
-                    if audit_request.status == 'Forwarded_to_STQC' or audit_request.status == 'Audit_Completed_by_STQC' and new_status == 'Audit_Completed_by_STQC':
-                        can_update = True
-                        success_message = 'Audit completed by STQC Auditor. Now awaiting Scientist F review.'
-                        remark_text = f"STQC Auditor marked audit as completed. Status changed to '{AuditRequest.STATUS_CHOICES[2][1]}'."
-                        print(f"STQC Auditor: Conditions met for completing audit. Can update = {can_update}") # DEBUG
-                    else:
-                        messages.error(request, f'STQC Auditors can only mark requests that are "Forwarded to STQC" as "Audit Completed". This request is currently in "{audit_request.get_status_display()}" status.')
-                        print(f"STQC Auditor: Conditions NOT met. Current status: {audit_request.status}, New status requested: {new_status}") # DEBUG
-
-                elif request.user.is_scientist_f:
-                    if (audit_request.status == 'Audit_Completed_by_STQC' or audit_request.status == 'Approved_by_ScientistF' and new_status == 'Approved_by_ScientistF') or \
-                       (audit_request.status == 'Audit_Completed_by_STQC' or audit_request.status == 'Rejected_by_ScientistF' and new_status == 'Rejected_by_ScientistF'):
-                        can_update = True
-                        success_message = f'Audit request {audit_request.get_status_display().lower()} successfully!'
-                        remark_text = f"Scientist F made final decision: '{audit_request.get_status_display()}'."
-                        print(f"Scientist F: Conditions met for final decision. Can update = {can_update}") # DEBUG
-                    else:
-                        messages.error(request, f'Scientist F can only approve/reject requests that are "Audit Completed by STQC". This request is currently in "{audit_request.get_status_display()}" status.')
-                        print(f"Scientist F: Conditions NOT met. Current status: {audit_request.status}, New status requested: {new_status}") # DEBUG
-                
+                try:
+                    # Checked against the workflow table and applied as a compare-and-set on current_status.
+                    transition = apply_transition(request.user, audit_request, current_status, new_status)
+                except TransitionNotAllowed as error:
+                    messages.error(request, str(error))
+                except TransitionConflict as conflict:
+                    messages.error(request, f'This audit request was updated by someone else in the meantime. {conflict}')
                 else:
-                    messages.error(request, 'You do not have permission to change the status of this audit request.')
-                    print(f"Unauthorized attempt to change status by {request.user.username}.") # DEBUG
-
-                if can_update:
-                    status_form.save() # This saves the new status to the database
-                    Remark.objects.create(audit_request=audit_request, author=request.user, comment=remark_text)
-                    messages.success(request, success_message)
-                    print(f"Audit Request {audit_request.pk} status saved to: {audit_request.status}. Redirecting to list.") # DEBUG
+                    messages.success(request, transition.message)
+                    logger.info("Audit request %s moved from %s to %s by %s.", pk, current_status, new_status, request.user.username)
                     # After successful status update, redirect to the list page to clearly show the change
-                    return redirect('audit_request_list') 
-                else:
-                    # If update was not allowed or form invalid, stay on the detail page and show error
-                    print(f"Update NOT allowed for request {pk}. Redirecting to detail.") # DEBUG
-                    return redirect('audit_request_detail', pk=pk)
+                    return redirect('audit_request_list')
+                logger.info("Status update of audit request %s to %s by %s refused.", pk, new_status, request.user.username)
+                return redirect('audit_request_detail', pk=pk)
             else:
                 messages.error(request, 'Error updating status. Please check the form.')
-                print(f"Status form invalid. Errors: {status_form.errors}") # DEBUG
+                logger.debug("Invalid status form for audit request %s: %s", pk, status_form.errors.as_json())
                 return redirect('audit_request_detail', pk=pk)
 
 
-    # For GET requests or after a failed POST, prepare forms and context
-    # Re-fetch audit_request to ensure it's fresh if a POST occurred
-    audit_request = get_object_or_404(AuditRequest, pk=pk)
+    # For GET requests, load the request with its CSP, documents and remarks prefetched
+    # so the template does not issue a query per document uploader or remark author.
+    audit_request = get_object_or_404(AuditRequest.objects.with_detail(), pk=pk)
     documents = audit_request.documents.all()
     remarks = audit_request.remarks.all()
 
-    # Conditionally prepare the status update form for GET requests (or re-rendering after failed POST)
-    if request.user.is_meity_reviewer and audit_request.status == 'Submitted_by_CSP':
-        status_form = AuditRequestStatusUpdateForm(instance=audit_request, user=request.user, current_status=audit_request.status)
-        status_form_title = "Action: Forward to STQC for Audit"
-        status_submit_button_text = "Forward to STQC"
-    elif request.user.is_stqc_auditor and audit_request.status == 'Forwarded_to_STQC':
+    # Conditionally prepare the status update form for GET requests (or re-rendering after failed POST):
+    # shown whenever the workflow table has a transition for this role out of the current status.
+    if available_transitions(request.user.role, audit_request.status):
         status_form = AuditRequestStatusUpdateForm(instance=audit_request, user=request.user, current_status=audit_request.status)
-        status_form_title = "Action: Mark Audit as Completed"
-        status_submit_button_text = "Mark Audit Completed"
-    elif request.user.is_scientist_f and audit_request.status == 'Audit_Completed_by_STQC':
-        status_form = AuditRequestStatusUpdateForm(instance=audit_request, user=request.user, current_status=audit_request.status)
-        status_form_title = "Action: Finalize Audit Decision"
-        status_submit_button_text = "Finalize Decision"
+        status_form_title, status_submit_button_text = STATUS_FORM_TEXT.get(
+            request.user.role, ("Action: Update Status", "Update Status"),
+        )
     
     context = {
         'audit_request': audit_request,
@@ -291,6 +301,7 @@ def audit_request_detail(request, pk):
     }
     return render(request, 'audit_management/audit_request_detail.html', context)
 
+@require_POST # Deletes, so never on a GET a link or prefetch could trigger
 @login_required
 def delete_document(request, pk):
     """
@@ -307,3 +318,21 @@ def delete_document(request, pk):
         messages.error(request, 'You are not authorized to delete this document.')
     
     return redirect('audit_request_detail', pk=audit_request_pk)
+
+
+@require_safe
+@login_required
+@replica_reads # GET reads from a replica unless the user has just written
+def search_audit_requests(request):
+    """
+    Full-text search page across audit requests, remarks and document descriptions.
+    Results are ranked and limited to the requests the user's role may list.
+    """
+    query = request.GET.get('q', '').strip()
+    results = []
+    if query:
+        results = [
+            {'entry': entry, 'excerpt': excerpt(entry.text)}
+            for entry in search(request.user, query, limit=50)
+        ]
+    return render(request, 'audit_management/search.html', {'query': query, 'results': results})
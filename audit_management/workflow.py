@@ -0,0 +1,267 @@
+# Project: meity_audit_portal
+# App: audit_management
+# File: audit_management/workflow.py
+# Description: Audit request status transitions: the transition table, compare-and-set and bulk application,
+#              each recorded in the AuditStatusEvent history, the dwell histograms, the dashboard counts and the
+#              event stream.
+
+from typing import NamedTuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .dashboard import apply_deltas, move_deltas
+from .dwell import apply_dwell_deltas, dwell_deltas
+from .models import AuditRequest, AuditStatusEvent, Remark, WorkflowEvent, latest_activity
+from .search import index_bulk
+from .stream import record
+
+# Most requests a single bulk transition may name.
+MAX_BULK_TRANSITIONS = 500
+
+
+class Transition(NamedTuple):
+    label: str # Choice label in the status form
+    remark: str # Remark recorded on the request; may use {from_display} and {to_display}
+    message: str # Confirmation shown on the web page
+
+
+# The workflow, in one place: (role, from_status, to_status) -> Transition. The status API,
+# the bulk API, the detail page and its status form all consult this table.
+TRANSITIONS = {
+    ('MeitY_Reviewer', 'Submitted_by_CSP', 'Forwarded_to_STQC'): Transition(
+        'Forward to STQC for Audit',
+        "MeitY Reviewer forwarded request to STQC. Status changed to '{to_display}'.",
+        'Audit request successfully forwarded to STQC for auditing!',
+    ),
+    ('STQC_Auditor', 'Forwarded_to_STQC', 'Audit_Completed_by_STQC'): Transition(
+        'Audit Completed',
+        "STQC Auditor marked audit as completed. Status changed to '{to_display}'.",
+        'Audit completed by STQC Auditor. Now awaiting Scientist F review.',
+    ),
+    ('Scientist_F', 'Audit_Completed_by_STQC', 'Approved_by_ScientistF'): Transition(
+        'Approve Audit',
+        "Scientist F made final decision: '{to_display}'.",
+        'Audit request approved successfully!',
+    ),
+    ('Scientist_F', 'Audit_Completed_by_STQC', 'Rejected_by_ScientistF'): Transition(
+        'Reject Audit',
+        "Scientist F made final decision: '{to_display}'.",
+        'Audit request rejected successfully!',
+    ),
+}
+
+STATUS_DISPLAY = dict(AuditRequest.STATUS_CHOICES)
+
+
+class TransitionNotAllowed(Exception):
+    """
+    Raised when the workflow has no transition for the role between the two statuses.
+    """
+
+
+class TransitionConflict(Exception):
+    """
+    Raised when the request left the expected status before the transition was applied,
+    i.e. someone else moved it first. `current_status` is its status now (None if deleted).
+    """
+
+    def __init__(self, current_status):
+        super().__init__(f"The audit request is now '{STATUS_DISPLAY.get(current_status, current_status)}'.")
+        self.current_status = current_status
+
+
+def remark_for(role, from_status, to_status):
+    """
+    Returns the remark text for an allowed transition, or None if the role may not make it.
+    """
+    transition = TRANSITIONS.get((role, from_status, to_status))
+    if transition is None:
+        return None
+    return transition.remark.format(from_display=STATUS_DISPLAY[from_status], to_display=STATUS_DISPLAY[to_status])
+
+
+def available_transitions(role, from_status):
+    """
+    Returns [(to_status, Transition)] the role may make from `from_status`, in table order.
+    """
+    return [
+        (target, transition) for (rule_role, source, target), transition in TRANSITIONS.items()
+        if rule_role == role and source == from_status
+    ]
+
+
+def source_statuses(role, to_status):
+    """
+    Returns the statuses from which `role` may move a request to `to_status`.
+    """
+    return {source for (rule_role, source, target) in TRANSITIONS if rule_role == role and target == to_status}
+
+
+def apply_transition(user, audit_request, from_status, to_status):
+    """
+    Moves `audit_request` from `from_status` (the status the caller saw) to `to_status`
+    and records the remark, the status event and its dwell, the dashboard counts and the
+    streamed event.
+    The change is a compare-and-set, UPDATE ... WHERE id = ? AND status = ?, so of two
+    concurrent requests for the same move exactly one succeeds; the other raises
+    TransitionConflict instead of silently applying twice. Raises TransitionNotAllowed if
+    the user's role may not make the move. Returns the Transition.
+    """
+    transition = TRANSITIONS.get((user.role, from_status, to_status))
+    if transition is None:
+        raise TransitionNotAllowed(
+            f"Your role cannot move an audit request from '{STATUS_DISPLAY.get(from_status, from_status)}' "
+            f"to '{STATUS_DISPLAY.get(to_status, to_status)}'."
+        )
+    now = timezone.now()
+    with transaction.atomic():
+        updated = AuditRequest.objects.filter(pk=audit_request.pk, status=from_status).update(
+            status=to_status, last_updated=now, status_changed_at=now,
+        )
+        if not updated:
+            raise TransitionConflict(
+                AuditRequest.objects.filter(pk=audit_request.pk).values_list('status', flat=True).first()
+            )
+        # The workflow never returns to a status, so the compare-and-set succeeding also means
+        # the status_changed_at read with `from_status` is still when the request entered it.
+        event = AuditStatusEvent.objects.create(
+            audit_request_id=audit_request.pk, from_status=from_status, to_status=to_status, actor=user,
+            created_at=now, dwell=now - audit_request.status_changed_at,
+        )
+        apply_dwell_deltas(dwell_deltas([(from_status, event.dwell)]))
+        audit_request.status, audit_request.last_updated, audit_request.status_changed_at = to_status, now, now
+        apply_deltas(move_deltas([(from_status, audit_request.data_center_location, audit_request.csp_id)], to_status))
+        record('status_changed', audit_request, from_status=from_status, created_at=now).save()
+        # A regular create, so the signals update the counters, worklist cache, search index and stream.
+        Remark.objects.create(
+            audit_request=audit_request, author=user, comment=remark_for(user.role, from_status, to_status),
+        )
+    return transition
+
+
+def lock_requests(ids):
+    """
+    Locks the audit requests in `ids` until the transaction ends (where the database supports
+    row locks; SQLite does not) and returns their
+    (pk, status, status_changed_at, data_center_location, csp_id).
+    """
+    return list(AuditRequest.objects.select_for_update().filter(pk__in=ids).values_list(
+        'pk', 'status', 'status_changed_at', 'data_center_location', 'csp_id',
+    ))
+
+
+def update_returns_rows():
+    """Whether this database reports the rows an UPDATE changed (UPDATE ... RETURNING)."""
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return connection.vendor == 'postgresql'
+
+
+def move_requests(ids, sources, to_status, now):
+    """
+    Moves the requests in `ids` whose status is still one of `sources` to `to_status`, in one
+    UPDATE, and returns the ids it moved. Where the database supports UPDATE ... RETURNING it
+    names them; elsewhere lock_requests() holds the rows (older SQLite, with no row locks,
+    lets one writer in at a time), so any that now have `to_status` were moved by this UPDATE.
+    """
+    if not update_returns_rows():
+        AuditRequest.objects.filter(pk__in=ids, status__in=sources).update(
+            status=to_status, last_updated=now, status_changed_at=now,
+        )
+        return set(AuditRequest.objects.filter(pk__in=ids, status=to_status).values_list('pk', flat=True))
+
+    meta, quote = AuditRequest._meta, connection.ops.quote_name
+    pk, status, last_updated, changed_at = (
+        quote(meta.get_field(name).column) for name in (meta.pk.name, 'status', 'last_updated', 'status_changed_at')
+    )
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(meta.db_table)} SET {status} = %s, {last_updated} = %s, {changed_at} = %s '
+            f'WHERE {pk} IN ({", ".join(["%s"] * len(ids))}) '
+            f'AND {status} IN ({", ".join(["%s"] * len(sources))}) RETURNING {pk}',
+            [to_status, stamp, stamp, *ids, *sources],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def bulk_transition(user, ids, to_status):
+    """
+    Moves every request in `ids` that `user`'s role may move to `to_status`, and returns
+    {id: (outcome, current status)} with outcome 'updated', 'conflict' (another change
+    moved it first), 'invalid_transition' or 'not_found'.
+
+    All of it is one transaction with a fixed number of queries whatever the batch size:
+    the rows are locked and read and one conditional UPDATE moves the eligible ones,
+    reporting which it moved (without row locks a concurrent transition can win the race,
+    as apply_transition's compare-and-set would report; only then are the losers' statuses
+    read again). Only the moved rows get their remarks and status events (two bulk inserts),
+    their remark counter and activity time (one UPDATE), their dashboard counts and dwell
+    histograms (two queries each) and their streamed status change and remark events (one
+    insert).
+    update() and bulk_create() bypass the model signals, so the worklist cache and the
+    search index are maintained here.
+    """
+    sources = source_statuses(user.role, to_status)
+    with transaction.atomic():
+        rows = lock_requests(ids)
+        current = {pk: status for pk, status, *_ in rows}
+        eligible = [pk for pk in ids if current.get(pk) in sources]
+        moved = set()
+        if eligible:
+            now = timezone.now()
+            moved = move_requests(eligible, sources, to_status, now)
+            lost = [pk for pk in eligible if pk not in moved]
+            if lost:
+                after = dict(AuditRequest.objects.filter(pk__in=lost).values_list('pk', 'status'))
+                for pk in lost:
+                    current[pk] = after.get(pk)
+        if moved:
+            moved_rows = [row for row in rows if row[0] in moved]
+            remarks = Remark.objects.bulk_create([
+                Remark(audit_request_id=pk, author=user, comment=remark_for(user.role, status, to_status))
+                for pk, status, *_ in moved_rows
+            ])
+            events = AuditStatusEvent.objects.bulk_create([
+                AuditStatusEvent(
+                    audit_request_id=pk, from_status=status, to_status=to_status, actor=user,
+                    created_at=now, dwell=now - entered,
+                )
+                for pk, status, entered, *_ in moved_rows
+            ])
+            AuditRequest.objects.filter(pk__in=moved).update(
+                remark_count=F('remark_count') + 1, last_activity_at=latest_activity(),
+            )
+            apply_deltas(move_deltas(
+                [(status, location, csp_id) for _, status, _, location, csp_id in moved_rows], to_status,
+            ))
+            apply_dwell_deltas(dwell_deltas((event.from_status, event.dwell) for event in events))
+            streamed = []
+            for (pk, status, _, _, csp_id), remark in zip(moved_rows, remarks):
+                streamed.append(WorkflowEvent(
+                    kind='status_changed', audit_request_id=pk, csp_id=csp_id, status=to_status,
+                    from_status=status, created_at=now,
+                ))
+                streamed.append(WorkflowEvent(
+                    kind='remark_added', audit_request_id=pk, csp_id=csp_id, status=to_status,
+                    object_id=remark.pk, created_at=now,
+                ))
+            WorkflowEvent.objects.bulk_create(streamed)
+            index_bulk('remark', remarks)
+            bump_version()
+            transaction.on_commit(bump_version)
+
+    results = {}
+    for pk in ids:
+        if current.get(pk) is None:
+            results[pk] = ('not_found', None)
+        elif pk in moved:
+            results[pk] = ('updated', to_status)
+        elif pk in eligible:
+            results[pk] = ('conflict', current[pk])
+        else:
+            results[pk] = ('invalid_transition', current[pk])
+    return results
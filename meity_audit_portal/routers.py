@@ -0,0 +1,181 @@
+# Project: meity_audit_portal
+# File: meity_audit_portal/routers.py
+# Description: Read-replica routing: list and reporting reads go to a replica, everything else (and every read
+#              by a user who has just written) to the primary.
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+# Database aliases serving replica reads (DATABASE_REPLICA_URLS in settings.py); empty means no replicas.
+REPLICAS = getattr(settings, 'AUDIT_READ_REPLICAS', ())
+# Seconds after a write during which the writer's reads stay on the primary, covering replication lag.
+PIN_SECONDS = getattr(settings, 'AUDIT_REPLICA_PIN_SECONDS', 10)
+# Only these apps' tables are read from replicas; sessions and users always come from the primary,
+# so a login is never lost to replication lag.
+REPLICA_APPS = {'audit_management'}
+
+
+class RoutingState:
+    """
+    Per-request routing flags: whether the view allows replica reads, and whether the
+    request has written (after which it reads from the primary, to see its own writes).
+    """
+
+    def __init__(self):
+        self.replica = False
+        self.wrote = False
+
+
+routing = ContextVar('routing', default=None)
+
+
+def pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def is_pinned(user):
+    """
+    Returns True if `user` wrote within the last PIN_SECONDS, so their reads must see the primary.
+    Pins are kept in the default cache, which settings.py requires to be shared (CACHE_URL)
+    whenever replicas are configured, so every worker sees them. JWT clients have no session
+    to keep them in.
+    """
+    return bool(user.is_authenticated and cache.get(pin_key(user.pk)))
+
+
+def allow_replica_reads(request, user):
+    """
+    Lets the rest of this request read from a replica, unless it is not a read or `user`
+    has written recently. Returns whether replica reads were allowed.
+    """
+    state = routing.get()
+    if not REPLICAS or state is None or request.method not in SAFE_METHODS or is_pinned(user):
+        return False
+    state.replica = True
+    return True
+
+
+@contextmanager
+def primary_reads():
+    """
+    Sends the reads inside the block to the primary, even in a request that allows replica
+    reads. Values that outlive the request, such as cached worklists, are built this way:
+    built from a lagging replica, they would be served to every user of the cache scope,
+    including a writer pinned to the primary.
+    """
+    state = routing.get()
+    replica = state is not None and state.replica
+    if replica:
+        state.replica = False
+    try:
+        yield
+    finally:
+        if replica:
+            state.replica = True
+
+
+class ReplicaRouter:
+    """
+    Sends reads of audit_management models to a random replica while the current request
+    allows it (see ReplicaReadMixin and replica_reads) and has not written yet; every
+    other read, every write and every migration goes to the primary ('default').
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if REPLICAS and state is not None and state.replica and not state.wrote and \
+                model._meta.app_label in REPLICA_APPS:
+            return random.choice(REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Gives each request fresh routing flags, and once a request has written, pins its
+    user's reads to the primary for PIN_SECONDS (read-your-own-writes across requests).
+    Works under WSGI and ASGI alike.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        self.pin_writer(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing.reset(token)
+        await sync_to_async(self.pin_writer)(request, state)
+        return response
+
+    def pin_writer(self, request, state):
+        # DRF and the async API views set request.user to the user they authenticated.
+        user = getattr(request, 'user', None)
+        if REPLICAS and state.wrote and user is not None and user.is_authenticated:
+            cache.set(pin_key(user.pk), 1, PIN_SECONDS)
+
+
+class ReplicaReadMixin:
+    """
+    For DRF views: safe-method requests read from a replica once the user is authenticated.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        allow_replica_reads(request, request.user)
+
+
+def replica_reads(view):
+    """
+    For function views, sync or async: reads from a replica for GET requests by a user
+    who has not written recently. Apply inside login_required, so request.user is known.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            await sync_to_async(allow_replica_reads)(request, request.user)
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            allow_replica_reads(request, request.user)
+            return view(request, *args, **kwargs)
+    return wrapper
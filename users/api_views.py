@@ -6,6 +6,7 @@
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import status
 from .serializers import CustomUserSerializer
 from .models import CustomUser
@@ -31,6 +32,7 @@ class UserDetailAPIView(APIView):
     API view to retrieve details of the currently authenticated user.
     Requires authentication.
     """
+    authentication_classes = [JWTAuthentication] # Serializes the full user row, not just the token claims
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -0,0 +1,118 @@
+# Project: meity_audit_portal
+# App: users
+# File: users/authentication.py
+# Description: JWT tokens that carry the user's role, and API authentication that trusts those claims for reads
+#              and a briefly cached user row for writes.
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# The user attributes copied into every token as claims of the same name.
+USER_CLAIMS = ('username', 'role', 'organization')
+
+# Seconds a user row loaded to authenticate a write is reused for that user's later writes;
+# 0 loads it for every write. Only worth setting with a cache shared by every worker (see below).
+USER_CACHE_TTL = getattr(settings, 'AUDIT_AUTH_USER_CACHE_TTL', 0)
+
+
+def set_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    A refresh token (and so the access tokens made from it) carrying USER_CLAIMS.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        return set_user_claims(super().for_user(user), user)
+
+
+class ClaimsUser(TokenUser):
+    """
+    The authenticated user as described by the access token's claims, without a database
+    row behind it. Has what the read endpoints use: pk, username, role and organization,
+    and the CustomUser role helpers.
+    """
+
+    @cached_property
+    def id(self):
+        # Simple JWT writes the id claim as a string; compare as the model's own pk type.
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @cached_property
+    def organization(self):
+        return self.token.get('organization')
+
+    @property
+    def is_csp(self):
+        return self.role == 'CSP'
+
+    @property
+    def is_meity_reviewer(self):
+        return self.role == 'MeitY_Reviewer'
+
+    @property
+    def is_stqc_auditor(self):
+        return self.role == 'STQC_Auditor'
+
+    @property
+    def is_scientist_f(self):
+        return self.role == 'Scientist_F'
+
+
+def user_cache_key(user_id):
+    return f"users:auth:{user_id}"
+
+
+def forget_user(user_id):
+    """
+    Drops the cached row for `user_id`, so the next write sees the user as saved. This only
+    reaches the workers sharing the cache: with a per-process cache, the others keep their
+    copy until USER_CACHE_TTL runs out.
+    """
+    cache.delete(user_cache_key(user_id))
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without the per-request user lookup:
+    - GET/HEAD/OPTIONS with a token carrying role claims get a ClaimsUser and no query.
+    - Writes (and tokens issued before the claims existed) load the user row, cached for
+      USER_CACHE_TTL seconds and dropped whenever the user is saved or deleted. The drop
+      reaches every worker only if the cache is shared (CACHE_URL); with a per-process
+      cache, a deactivated user or changed role can keep writing through other workers for
+      the full USER_CACHE_TTL, which is why settings.py leaves it at 0 without CACHE_URL.
+    Reads trust the claims until the access token expires; the refresh endpoint re-reads
+    them from the database.
+    """
+
+    def authenticate(self, request):
+        self.safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.safe_method and 'role' in validated_token:
+            return ClaimsUser(validated_token)
+        if not USER_CACHE_TTL:
+            return super().get_user(validated_token)
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, USER_CACHE_TTL)
+        return user
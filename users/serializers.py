@@ -4,6 +4,12 @@
 # Description: Defines serializers for the CustomUser model for API use.
 
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import RoleRefreshToken, set_user_claims
 from .models import CustomUser
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -49,3 +55,28 @@ class CustomUserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Issues token pairs carrying the user's username, role and organization as claims,
+    so API reads can authorize from the token alone (see RoleClaimsJWTAuthentication).
+    """
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Issues a new access token with the claims re-read from the user's current row, so a
+    role or organization change reaches API reads at the next refresh.
+    """
+    token_class = RoleRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = CustomUser.objects.filter(pk=access[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        data['access'] = str(set_user_claims(access, user))
+        return data
+
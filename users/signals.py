@@ -0,0 +1,20 @@
+# Project: meity_audit_portal
+# App: users
+# File: users/signals.py
+# Description: Signal handlers that keep the API authentication cache in sync with the user table.
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    """
+    Drops the user row cached by RoleClaimsJWTAuthentication, so role changes and
+    deactivation apply to the user's next write.
+    """
+    forget_user(instance.pk)